@@ -0,0 +1,281 @@
+"""
+Streaming audio readers for chunked Whisper transcription
+
+Audio is read through soundfile in small fixed-size blocks and mixed down to
+float32 mono directly into a preallocated chunk buffer. With reuse_buffer,
+every chunk is read into the same buffer, so only one chunk is held in
+memory at a time regardless of how long the file is; otherwise each chunk
+gets its own buffer and can be kept (e.g. queued by a prefetcher). With a target
+sample rate the blocks also pass through a streaming resampler whose state
+carries across chunk boundaries, so chunks join up exactly as if the whole
+file had been resampled at once.
+
+With a channel index, that channel is read on its own instead of the mix,
+e.g. to transcribe each side of a call recording separately.
+
+Formats libsndfile can't open (mp3 on older versions, m4a, video containers)
+are streamed through an ffmpeg pipe instead (see ffmpeg_stream). That decoder
+produces 16 kHz directly, so for those files every sample position counts
+samples at 16 kHz and audio_info reports a 16 kHz sample rate.
+"""
+
+import numpy as np
+import soundfile as sf
+from typing import Any, Iterator, List, Optional, Sequence, Tuple
+
+from ffmpeg_stream import FFMPEG_SAMPLE_RATE, FFmpegStream, iter_ffmpeg_chunks, probe_audio
+from resampler import StreamingResampler
+
+# Frames read from disk per block (~1.4 s at 48 kHz)
+DEFAULT_BLOCK_FRAMES = 65536
+
+
+def mix_to_mono(block: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Mix a (frames, channels) block down to a float32 mono vector
+
+    Args:
+        block (np.ndarray): Audio block, 1-D or (frames, channels)
+        out (np.ndarray): Optional float32 buffer to write the result into
+
+    Returns:
+        np.ndarray: Float32 mono audio
+    """
+    if block.ndim == 1:
+        if out is None:
+            return block.astype(np.float32, copy=False)
+        out[:] = block
+        return out
+    if block.shape[1] == 1:
+        if out is None:
+            return block[:, 0].astype(np.float32, copy=False)
+        out[:] = block[:, 0]
+        return out
+    return np.mean(block, axis=1, dtype=np.float32, out=out)
+
+
+def take_channel(block: np.ndarray, channel: Optional[int] = None, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    One channel of a (frames, channels) block as float32 mono, or the mix if channel is None
+
+    Args:
+        block (np.ndarray): Audio block, 1-D or (frames, channels)
+        channel (int): Index of the channel to keep (default: mix all channels)
+        out (np.ndarray): Optional float32 buffer to write the result into
+
+    Returns:
+        np.ndarray: Float32 mono audio
+    """
+    if channel is None or block.ndim == 1:
+        return mix_to_mono(block, out)
+    return mix_to_mono(block[:, channel], out)
+
+
+def _check_channel(file_path: str, channels: int, channel: Optional[int]) -> None:
+    if channel is not None and not 0 <= channel < channels:
+        raise ValueError(f"{file_path} has {channels} channel(s); there is no channel {channel}")
+
+
+class ChunkBuffer:
+    """Hands out chunk buffers: a fresh one each time, or views of one reused (and grown) buffer"""
+
+    def __init__(self, reuse: bool = False):
+        self.reuse = reuse
+        self._buffer = np.empty(0, dtype=np.float32)
+
+    def get(self, frames: int) -> np.ndarray:
+        if not self.reuse:
+            return np.empty(frames, dtype=np.float32)
+        if len(self._buffer) < frames:
+            # Drop the old buffer before allocating, so two are never alive at once
+            self._buffer = None
+            self._buffer = np.empty(frames, dtype=np.float32)
+        return self._buffer[:frames]
+
+
+def needs_ffmpeg(file_path: str) -> bool:
+    """True if libsndfile can't open a file, so it has to be decoded with ffmpeg"""
+    try:
+        sf.info(file_path)
+    except RuntimeError:
+        return True
+    return False
+
+
+def audio_info(file_path: str) -> Any:
+    """
+    soundfile-style info (samplerate, channels, frames, duration) for any input
+
+    Falls back to ffprobe for formats libsndfile can't open. Those files are
+    decoded at 16 kHz, so their info is reported at that rate.
+    """
+    try:
+        return sf.info(file_path)
+    except RuntimeError:
+        return probe_audio(file_path)
+
+
+def iter_audio_blocks(file_path: str, block_frames: int = DEFAULT_BLOCK_FRAMES) -> Iterator[np.ndarray]:
+    """Stream a whole file as float32 mono blocks of exactly block_frames frames (the last may be short)"""
+    if needs_ffmpeg(file_path):
+        with FFmpegStream(file_path) as stream:
+            yield from stream.blocks(block_frames)
+        return
+    with sf.SoundFile(file_path) as sound_file:
+        for block in sound_file.blocks(blocksize=block_frames, dtype="float32", always_2d=True):
+            yield mix_to_mono(block)
+
+
+def _read_mono(sound_file: sf.SoundFile, frames: int, block_frames: int,
+               channel: Optional[int] = None, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """Read `frames` frames from the current position into a float32 mono buffer (one channel or the mix)"""
+    chunk = np.empty(frames, dtype=np.float32) if out is None else out[:frames]
+    filled = 0
+    for block in sound_file.blocks(blocksize=block_frames, frames=frames,
+                                   dtype="float32", always_2d=True):
+        take_channel(block, channel, out=chunk[filled:filled + len(block)])
+        filled += len(block)
+    return chunk[:filled]
+
+
+def read_audio_range(file_path: str, start_sample: int, end_sample: int,
+                     block_frames: int = DEFAULT_BLOCK_FRAMES, sample_rate: Optional[int] = None) -> np.ndarray:
+    """
+    Read a single [start_sample, end_sample) range as float32 mono
+
+    Args:
+        file_path (str): Path to the audio file
+        start_sample (int): First frame to read (native sample rate)
+        end_sample (int): Frame after the last one to read
+        block_frames (int): Frames read from disk per block
+        sample_rate (int): Resample to this rate (default: keep the native rate)
+
+    Returns:
+        np.ndarray: Float32 mono audio
+    """
+    if sample_rate is not None or needs_ffmpeg(file_path):
+        chunks = iter_audio_chunks(file_path, block_frames=block_frames, ranges=[(start_sample, end_sample)],
+                                   sample_rate=sample_rate)
+        return next(chunks)[2]
+    with sf.SoundFile(file_path) as sound_file:
+        end_sample = min(end_sample, sound_file.frames)
+        sound_file.seek(start_sample)
+        return _read_mono(sound_file, max(end_sample - start_sample, 0), block_frames)
+
+
+def iter_audio_chunks(file_path: str, chunk_duration: float = 600,
+                      block_frames: int = DEFAULT_BLOCK_FRAMES,
+                      ranges: Optional[Sequence[Tuple[int, int]]] = None,
+                      sample_rate: Optional[int] = None,
+                      channel: Optional[int] = None,
+                      reuse_buffer: bool = False) -> Iterator[Tuple[int, int, np.ndarray]]:
+    """
+    Stream an audio file as float32 mono chunks
+
+    Args:
+        file_path (str): Path to the audio file
+        chunk_duration (float): Duration of each chunk in seconds, used when
+            no explicit ranges are given
+        block_frames (int): Frames read from disk per block
+        ranges (list): Optional (start_sample, end_sample) chunk plan, e.g.
+            from chunk_planner.plan_chunks
+        sample_rate (int): Resample chunks to this rate, e.g. 16000 for
+            Whisper (default: keep the native rate)
+        channel (int): Read only this channel (default: mix all channels)
+        reuse_buffer (bool): Read every chunk into one buffer, so a chunk is
+            only valid until the next one is requested (default: False)
+
+    Yields:
+        tuple: (start_sample, end_sample, chunk) with sample positions at the
+            file's native sample rate and the chunk at `sample_rate`
+    """
+    if needs_ffmpeg(file_path):
+        if sample_rate not in (None, FFMPEG_SAMPLE_RATE):
+            raise ValueError(f"{file_path} is decoded by ffmpeg at {FFMPEG_SAMPLE_RATE} Hz; "
+                             f"resampling to {sample_rate} Hz is not supported")
+        if channel is not None:
+            _check_channel(file_path, probe_audio(file_path).channels, channel)
+        yield from iter_ffmpeg_chunks(file_path, chunk_duration, block_frames, ranges, channel, reuse_buffer)
+        return
+    with sf.SoundFile(file_path) as sound_file:
+        _check_channel(file_path, sound_file.channels, channel)
+        if ranges is None:
+            chunk_size = int(chunk_duration * sound_file.samplerate)
+            ranges = [(start, min(start + chunk_size, sound_file.frames))
+                      for start in range(0, sound_file.frames, chunk_size)]
+        if sample_rate is not None and sample_rate != sound_file.samplerate:
+            yield from _iter_resampled_chunks(sound_file, ranges, sample_rate, block_frames, channel,
+                                              reuse_buffer)
+            return
+        buffer = ChunkBuffer(reuse_buffer)
+        for start_sample, end_sample in ranges:
+            end_sample = min(end_sample, sound_file.frames)
+            sound_file.seek(start_sample)
+            frames = max(end_sample - start_sample, 0)
+            yield start_sample, end_sample, _read_mono(sound_file, frames, block_frames, channel, buffer.get(frames))
+
+
+def _contiguous_runs(ranges: Sequence[Tuple[int, int]]) -> List[List[Tuple[int, int]]]:
+    """Split a chunk plan into runs of ranges that follow on from each other"""
+    runs = []
+    for start_sample, end_sample in ranges:
+        if runs and runs[-1][-1][1] == start_sample:
+            runs[-1].append((start_sample, end_sample))
+        else:
+            runs.append([(start_sample, end_sample)])
+    return runs
+
+
+def _iter_resampled_chunks(sound_file: sf.SoundFile, ranges: Sequence[Tuple[int, int]], sample_rate: int,
+                           block_frames: int, channel: Optional[int] = None,
+                           reuse_buffer: bool = False) -> Iterator[Tuple[int, int, np.ndarray]]:
+    """
+    Stream chunks through one resampler per contiguous run of ranges
+
+    Each run is read from a little before its start (filter history) to a
+    little past its end (filter lookahead), so every chunk is identical to
+    the same span of the whole file resampled in one piece.
+    """
+    buffer = ChunkBuffer(reuse_buffer)
+    for run in _contiguous_runs(ranges):
+        run_start = run[0][0]
+        run_end = min(run[-1][1], sound_file.frames)
+        resampler = StreamingResampler(sound_file.samplerate, sample_rate, start_sample=run_start)
+
+        history = min(run_start, resampler.half)
+        sound_file.seek(run_start - history)
+        resampler.prime(_read_mono(sound_file, history, block_frames, channel))
+        read_end = min(run_end + resampler.half, sound_file.frames)
+
+        def resampled_blocks():
+            for block in sound_file.blocks(blocksize=block_frames, frames=max(read_end - run_start, 0),
+                                           dtype="float32", always_2d=True):
+                yield resampler.process(take_channel(block, channel))
+            if read_end == sound_file.frames:
+                yield resampler.flush(sound_file.frames)
+
+        # Split the resampled stream at each chunk's boundary on the output timeline
+        boundaries = [resampler.output_index(run_start)]
+        boundaries += [resampler.output_index(min(end_sample, run_end)) for _, end_sample in run]
+        index, filled = 0, 0
+        chunk = buffer.get(boundaries[1] - boundaries[0])
+        for out in resampled_blocks():
+            while index < len(run):
+                take = min(len(out), len(chunk) - filled)
+                chunk[filled:filled + take] = out[:take]
+                filled += take
+                out = out[take:]
+                if filled < len(chunk):
+                    break
+                yield run[index][0], min(run[index][1], run_end), chunk
+                index += 1
+                if index < len(run):
+                    chunk = buffer.get(boundaries[index + 1] - boundaries[index])
+                    filled = 0
+            if index == len(run):
+                break
+
+        # Chunks past the end of the file come out short or empty
+        for start_sample, end_sample in run[index:]:
+            yield start_sample, min(end_sample, run_end), chunk[:filled]
+            chunk, filled = chunk[:0], 0
@@ -0,0 +1,304 @@
+"""
+Batch transcription of many audio files with one resident model
+
+Inputs can be files, directories (searched recursively) or glob patterns.
+The model is loaded once. Files are sorted into duration buckets so that
+short files are transcribed together: their 30-second windows are pooled
+into shared encoder/decoder batches instead of running one file at a time.
+Files longer than the last bucket go through the normal chunked pipeline.
+
+Usage:
+    python whisper_stt.py batch recordings/ "calls/**/*.wav" --model base --batch-size 8
+"""
+
+import argparse
+import glob
+import os
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from audio_stream import audio_info
+from batched_stt import transcribe_batched_many
+from chunk_planner import WHISPER_WINDOW_SECONDS
+from memory_budget import estimate_job_mb, get_memory_budget, set_memory_budget
+from model_registry import SUPPORTED_DTYPES, get_model, set_default_dtype
+from pcm_cache import open_pcm
+from transcription_cache import TranscriptionCache, file_sha256, get_cache
+
+AUDIO_EXTENSIONS = (".wav", ".mp3", ".m4a", ".flac", ".ogg", ".aac", ".wma", ".mp4", ".mov", ".webm")
+
+# Upper duration limits (seconds) of the buckets whose files are batched together
+DURATION_BUCKETS = (30, 120, 600)
+
+
+def expand_inputs(patterns: Sequence[str]) -> List[str]:
+    """
+    Expand files, directories and glob patterns into a sorted list of audio files
+
+    Args:
+        patterns (list): File paths, directories or glob patterns (``**`` allowed)
+
+    Returns:
+        list: Unique audio file paths
+    """
+    files = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for root, _, names in os.walk(pattern):
+                files.extend(os.path.join(root, name) for name in names
+                             if name.lower().endswith(AUDIO_EXTENSIONS))
+        elif os.path.isfile(pattern):
+            files.append(pattern)
+        else:
+            files.extend(path for path in glob.glob(pattern, recursive=True)
+                         if os.path.isfile(path) and path.lower().endswith(AUDIO_EXTENSIONS))
+    return sorted(dict.fromkeys(os.path.normpath(path) for path in files))
+
+
+def output_names(files: Sequence[str]) -> Dict[str, str]:
+    """
+    Name each file's output after its path below the files' common directory
+
+    recordings/a/talk.wav and recordings/b/talk.wav become a/talk and b/talk,
+    so files with the same base name don't overwrite each other's output.
+
+    Returns:
+        dict: {path: name without extension}
+
+    Raises:
+        ValueError: If two files would still share a name (e.g. talk.wav and talk.mp3)
+    """
+    if not files:
+        return {}
+    root = os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in files])
+    names, owners = {}, {}
+    for path in files:
+        name = os.path.splitext(os.path.relpath(os.path.abspath(path), root))[0]
+        if name in owners:
+            raise ValueError(f"{owners[name]} and {path} would both be saved as {name}; rename one of them")
+        names[path], owners[name] = name, path
+    return names
+
+
+def bucket_by_duration(durations: Dict[str, float]) -> Tuple[Dict[int, List[str]], List[str]]:
+    """
+    Sort files into duration buckets
+
+    Returns:
+        tuple: ({bucket_limit: files sorted by duration}, files longer than
+            the last bucket)
+    """
+    buckets = {limit: [] for limit in DURATION_BUCKETS}
+    long_files = []
+    for path in sorted(durations, key=durations.get):
+        limit = next((limit for limit in DURATION_BUCKETS if durations[path] <= limit), None)
+        if limit is None:
+            long_files.append(path)
+        else:
+            buckets[limit].append(path)
+    return buckets, long_files
+
+
+def batched_cache_key(file_path: str, model_size: str, language: Optional[str] = None,
+                      batch_size: int = 8, task: str = "transcribe") -> str:
+    """Cache key for a file transcribed with the pooled-window batched engine"""
+    return TranscriptionCache.make_key(file_sha256(file_path), model_size, language, task,
+                                       options={"batched_files": True, "batch_size": batch_size})
+
+
+def _file_windows(duration: float) -> int:
+    """Number of 30-second windows a file of this duration takes up"""
+    return max(1, -(-int(duration) // WHISPER_WINDOW_SECONDS))
+
+
+def _file_groups(files: Sequence[str], durations: Dict[str, float], max_windows: int) -> List[List[str]]:
+    """Split a bucket into groups of at most max_windows 30-second windows"""
+    groups, current, windows = [], [], 0
+    for path in files:
+        file_windows = _file_windows(durations[path])
+        if current and windows + file_windows > max_windows:
+            groups.append(current)
+            current, windows = [], 0
+        current.append(path)
+        windows += file_windows
+    if current:
+        groups.append(current)
+    return groups
+
+
+def _transcribe_group(model, paths: Sequence[str], audios: Sequence, batch_size: int,
+                      language: Optional[str]) -> List[Optional[Dict]]:
+    """Transcribe a group together, falling back to one file at a time if the batch fails"""
+    try:
+        return transcribe_batched_many(model, audios, batch_size, language=language)
+    except Exception as e:
+        if len(paths) == 1:
+            print(f"Failed {paths[0]}: {e}")
+            return [None]
+        print(f"Batch of {len(paths)} files failed ({e}); retrying them one at a time")
+    results = []
+    for path, audio in zip(paths, audios):
+        try:
+            results.extend(transcribe_batched_many(model, [audio], batch_size, language=language))
+        except Exception as e:
+            print(f"Failed {path}: {e}")
+            results.append(None)
+    return results
+
+
+def transcribe_files(files: Sequence[str], model_size: str = "base", batch_size: int = 8,
+                     use_cache: bool = True, language: Optional[str] = None,
+                     on_result=None) -> Dict[str, Optional[Dict]]:
+    """
+    Transcribe many files with one resident model, batching short files together
+
+    Args:
+        files (list): Audio file paths
+        model_size (str): Whisper model size
+        batch_size (int): 30-second windows per encoder/decoder pass
+        use_cache (bool): Reuse and store results in the transcription cache
+        language (str): Language for every file, or None to detect per file
+        on_result (callable): Called as on_result(path, result, cached) as soon
+            as each file finishes; cached is True for results from the cache
+
+    Returns:
+        dict: {path: result} with None for files that failed
+    """
+    # Imported here because whisper_stt dispatches its "batch" subcommand to this module
+    from whisper_stt import transcribe_audio_result
+
+    model = get_model(model_size)
+    cache = get_cache() if use_cache else None
+    results: Dict[str, Optional[Dict]] = {}
+
+    def finish(path, result, cached=False):
+        results[path] = result
+        if on_result is not None:
+            on_result(path, result, cached)
+
+    durations = {}
+    for path in files:
+        try:
+            durations[path] = audio_info(path).duration
+        except Exception as e:
+            print(f"Skipping {path}: {e}")
+            finish(path, None)
+
+    buckets, long_files = bucket_by_duration(durations)
+    for limit, bucket in buckets.items():
+        if bucket:
+            print(f"Bucket <= {limit}s: {len(bucket)} files")
+    if long_files:
+        print(f"Longer than {DURATION_BUCKETS[-1]}s: {len(long_files)} files (chunked one at a time)")
+
+    cache_keys = {}
+    for limit, bucket in buckets.items():
+        pending = []
+        for path in bucket:
+            if cache is not None:
+                cache_keys[path] = batched_cache_key(path, model_size, language, batch_size)
+                cached = cache.get(cache_keys[path])
+                if cached is not None:
+                    finish(path, cached, cached=True)
+                    continue
+            pending.append(path)
+
+        for group in _file_groups(pending, durations, max_windows=4 * batch_size):
+            audios, loaded = [], []
+            for path in group:
+                try:
+                    audios.append(open_pcm(path))
+                    loaded.append(path)
+                except Exception as e:
+                    print(f"Skipping {path}: {e}")
+                    finish(path, None)
+            if not loaded:
+                continue
+            print(f"Transcribing {len(loaded)} files (<= {limit}s) together...")
+            windows = sum(_file_windows(durations[path]) for path in loaded)
+            peak_mb = estimate_job_mb(model_size, windows * WHISPER_WINDOW_SECONDS, batch_size, prefetch_depth=0,
+                                      batched=True)
+            with get_memory_budget().reserve(peak_mb, f"{len(loaded)} files"):
+                group_results = _transcribe_group(model, loaded, audios, batch_size, language)
+            for path, result in zip(loaded, group_results):
+                if cache is not None and result is not None:
+                    cache.put(cache_keys[path], result)
+                finish(path, result)
+
+    for path in long_files:
+        try:
+            hits = cache.hits if cache is not None else 0
+            result = transcribe_audio_result(path, model_size, batch_size=batch_size, use_cache=use_cache)
+            finish(path, result, cached=cache is not None and cache.hits > hits)
+        except Exception as e:
+            print(f"Failed {path}: {e}")
+            finish(path, None)
+
+    return results
+
+
+def batch_main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="whisper_stt.py batch",
+        description="Transcribe many audio files with one resident Whisper model",
+        epilog='Example: python whisper_stt.py batch recordings/ "calls/*.mp3" --model base --batch-size 8')
+    parser.add_argument("inputs", nargs="+", help="Audio files, directories or glob patterns")
+    parser.add_argument("--model", default="base",
+                        help="Model size: tiny, base, small, medium, large (default: base)")
+    parser.add_argument("--batch-size", type=int, default=8,
+                        help="30-second windows per batched encoder/decoder pass (default: 8)")
+    parser.add_argument("--language", default=None, help="Language for every file (default: detect per file)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Don't reuse or store results in the transcription cache")
+    parser.add_argument("--dtype", choices=SUPPORTED_DTYPES, default=None,
+                        help="Weight precision; int8 quantizes Linear layers for faster CPU inference "
+                             "(default: fp32, or $WHISPER_STT_DTYPE)")
+    parser.add_argument("--memory-mb", type=float, default=None,
+                        help="Memory budget shared by all transcription jobs on this machine "
+                             "(default: 80%% of RAM, or $WHISPER_STT_MEMORY_MB)")
+    args = parser.parse_args(argv)
+    if args.model == "auto":
+        parser.error("--model auto picks a model per file; batches share one model, so give a size")
+    if args.dtype:
+        set_default_dtype(args.dtype)
+    if args.memory_mb:
+        set_memory_budget(args.memory_mb)
+
+    # Imported here because whisper_stt dispatches its "batch" subcommand to this module
+    from whisper_stt import save_transcription_to_output_folder
+
+    files = expand_inputs(args.inputs)
+    if not files:
+        print("No audio files found")
+        return
+    print(f"Found {len(files)} audio files")
+    try:
+        names = output_names(files)
+    except ValueError as e:
+        parser.error(str(e))
+
+    # Cache hits cost next to nothing, so they are kept out of the throughput figures
+    audio_seconds = {False: 0.0, True: 0.0}
+    counts = {False: 0, True: 0}
+
+    def save(path, result, cached):
+        if result is None:
+            return
+        output_file = save_transcription_to_output_folder(result, path, output_name=names[path])
+        audio_seconds[cached] += audio_info(path).duration
+        counts[cached] += 1
+        print(f"{path} -> {output_file}{' (cached)' if cached else ''}")
+
+    start = time.perf_counter()
+    results = transcribe_files(files, args.model, batch_size=args.batch_size,
+                               use_cache=not args.no_cache, language=args.language, on_result=save)
+    wall_seconds = time.perf_counter() - start
+
+    failed = [path for path, result in results.items() if result is None]
+    print(f"\nTranscribed {counts[False]}/{len(files)} files: "
+          f"{audio_seconds[False]/3600:.2f} audio-hours in {wall_seconds/3600:.3f} wall-hours "
+          f"({audio_seconds[False] / max(wall_seconds, 1e-9):.1f} audio-hours per wall-hour)")
+    if counts[True]:
+        print(f"From cache: {counts[True]} files, {audio_seconds[True]/3600:.2f} audio-hours")
+    for path in failed:
+        print(f"  failed: {path}")
@@ -0,0 +1,358 @@
+"""
+Batched multi-window Whisper inference
+
+`model.transcribe` walks a file one 30-second mel window at a time. This
+engine slices a chunk into fixed 30-second windows, runs the encoder once
+over a whole batch of windows and decodes the batch together with Whisper's
+batched greedy/beam decoder. The temperature fallback and no-speech rules
+are the same as in `model.transcribe`, and the result has the same
+{"text", "segments", "language"} structure.
+
+Windows are decoded independently, so there is no conditioning on the
+previous window's text and window boundaries are fixed at 30-second steps.
+Because the windows are fixed, an EncoderCache (encoder_cache.py) can hand
+back every window's encoder output when the same audio is decoded again with
+another task, language or prompt.
+"""
+
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import torch
+from whisper.audio import HOP_LENGTH, N_FRAMES, N_SAMPLES, SAMPLE_RATE, log_mel_spectrogram, pad_or_trim
+from whisper.decoding import DecodingOptions, DecodingResult, decode
+from whisper.tokenizer import get_tokenizer
+
+from encoder_cache import EncoderCache
+from stt_profiler import profile_span
+
+DEFAULT_TEMPERATURES = (0.0, 0.2, 0.4, 0.6, 0.8, 1.0)
+
+# Seconds per output timestamp token (two mel frames per encoder position)
+TIME_PRECISION = 2 * HOP_LENGTH / SAMPLE_RATE
+
+
+def needs_fallback(result: DecodingResult, compression_ratio_threshold: Optional[float],
+                   logprob_threshold: Optional[float], no_speech_threshold: Optional[float]) -> bool:
+    """Same fallback rule as model.transcribe: repetitive or improbable, unless it is silence"""
+    failed = False
+    if compression_ratio_threshold is not None and result.compression_ratio > compression_ratio_threshold:
+        failed = True  # too repetitive
+    if logprob_threshold is not None and result.avg_logprob < logprob_threshold:
+        failed = True  # average log probability is too low
+    if (no_speech_threshold is not None and result.no_speech_prob > no_speech_threshold
+            and logprob_threshold is not None and result.avg_logprob < logprob_threshold):
+        failed = False  # silence
+    return failed
+
+
+def is_silent(result: DecodingResult, logprob_threshold: Optional[float],
+              no_speech_threshold: Optional[float]) -> bool:
+    """Same no-speech skip rule as model.transcribe"""
+    if no_speech_threshold is None or result.no_speech_prob <= no_speech_threshold:
+        return False
+    # don't skip if the logprob is high enough, despite the no_speech_prob
+    return not (logprob_threshold is not None and result.avg_logprob > logprob_threshold)
+
+
+def decode_with_fallback(model: Any, audio_features: torch.Tensor,
+                         temperatures: Sequence[float] = DEFAULT_TEMPERATURES,
+                         compression_ratio_threshold: Optional[float] = 2.4,
+                         logprob_threshold: Optional[float] = -1.0,
+                         no_speech_threshold: Optional[float] = 0.6,
+                         **decode_options) -> List[DecodingResult]:
+    """
+    Decode a batch of encoded windows, retrying only the failed ones at higher temperatures
+
+    Args:
+        model: Whisper model
+        audio_features (torch.Tensor): Encoder output, (batch, n_audio_ctx, n_audio_state)
+        temperatures (sequence): Temperatures tried in order for windows that fail
+        compression_ratio_threshold (float): Gzip compression ratio above which a window fails
+        logprob_threshold (float): Average log probability below which a window fails
+        no_speech_threshold (float): No-speech probability above which a failure counts as silence
+        **decode_options: Keyword arguments for whisper.DecodingOptions
+
+    Returns:
+        list: One DecodingResult per window
+    """
+    results: List[Optional[DecodingResult]] = [None] * audio_features.shape[0]
+    pending = list(range(audio_features.shape[0]))
+
+    for t in temperatures:
+        kwargs = {**decode_options}
+        if t > 0:
+            # disable beam_size and patience when t > 0
+            kwargs.pop("beam_size", None)
+            kwargs.pop("patience", None)
+        else:
+            # disable best_of when t == 0
+            kwargs.pop("best_of", None)
+
+        batch_results = decode(model, audio_features[pending], DecodingOptions(**kwargs, temperature=t))
+        still_failing = []
+        for index, result in zip(pending, batch_results):
+            results[index] = result
+            if needs_fallback(result, compression_ratio_threshold, logprob_threshold, no_speech_threshold):
+                still_failing.append(index)
+        pending = still_failing
+        if not pending:
+            break
+
+    return results
+
+
+def window_segments(tokens: List[int], tokenizer: Any, result: DecodingResult, seek: int,
+                    time_offset: float, window_duration: float) -> List[Dict]:
+    """
+    Split one window's tokens into segments at timestamp-token pairs
+
+    Mirrors the segment parsing in model.transcribe. Because windows are
+    fixed, trailing tokens after the last timestamp pair are kept as a final
+    segment instead of being re-decoded in the next window.
+    """
+    def new_segment(start: float, end: float, segment_tokens: List[int]) -> Dict:
+        text_tokens = [token for token in segment_tokens if token < tokenizer.eot]
+        return {
+            "seek": seek,
+            "start": start,
+            "end": end,
+            "text": tokenizer.decode(text_tokens),
+            "tokens": segment_tokens,
+            "temperature": result.temperature,
+            "avg_logprob": result.avg_logprob,
+            "compression_ratio": result.compression_ratio,
+            "no_speech_prob": result.no_speech_prob,
+        }
+
+    def timestamp(token: int) -> float:
+        return (token - tokenizer.timestamp_begin) * TIME_PRECISION
+
+    is_timestamp = [token >= tokenizer.timestamp_begin for token in tokens]
+    consecutive = [i + 1 for i in range(len(tokens) - 1) if is_timestamp[i] and is_timestamp[i + 1]]
+
+    if not consecutive:
+        timestamps = [token for token in tokens if token >= tokenizer.timestamp_begin]
+        duration = window_duration
+        if timestamps and timestamps[-1] != tokenizer.timestamp_begin:
+            # no consecutive timestamps but it has a timestamp; use the last one.
+            duration = timestamp(timestamps[-1])
+        return [new_segment(time_offset, time_offset + duration, tokens)]
+
+    segments = []
+    last_slice = 0
+    for current_slice in consecutive:
+        sliced = tokens[last_slice:current_slice]
+        segments.append(new_segment(time_offset + timestamp(sliced[0]),
+                                    time_offset + timestamp(sliced[-1]), sliced))
+        last_slice = current_slice
+
+    remaining = tokens[last_slice:]
+    if any(not flag for flag in is_timestamp[last_slice:]):
+        start = timestamp(remaining[0])
+        end = timestamp(remaining[-1]) if is_timestamp[-1] else window_duration
+        segments.append(new_segment(time_offset + start, time_offset + max(start, end), remaining))
+    return segments
+
+
+def detect_languages(model: Any, mel_windows: torch.Tensor) -> List[str]:
+    """Detect the spoken language of each 30-second mel window in one batched pass"""
+    if not model.is_multilingual:
+        return ["en"] * mel_windows.shape[0]
+    _, probs = model.detect_language(mel_windows)
+    return [max(window_probs, key=window_probs.get) for window_probs in probs]
+
+
+def detect_language(model: Any, mel_window: torch.Tensor) -> str:
+    """Detect the spoken language from one 30-second mel window"""
+    return detect_languages(model, mel_window.unsqueeze(0))[0]
+
+
+def transcribe_batched(model: Any, audio: Union[np.ndarray, torch.Tensor], batch_size: int = 8,
+                       language: Optional[str] = None, task: str = "transcribe",
+                       temperature: Union[float, Tuple[float, ...]] = DEFAULT_TEMPERATURES,
+                       compression_ratio_threshold: Optional[float] = 2.4,
+                       logprob_threshold: Optional[float] = -1.0,
+                       no_speech_threshold: Optional[float] = 0.6,
+                       time_offset: float = 0.0, fp16: bool = False,
+                       encoder_cache: Optional[EncoderCache] = None, **decode_options) -> Dict:
+    """
+    Transcribe audio by encoding and decoding 30-second windows in batches
+
+    Args:
+        model: Whisper model
+        audio (np.ndarray): 16 kHz float32 mono audio, or its padded_mel()
+        batch_size (int): Number of 30-second windows per encoder/decoder pass
+        language (str): Language code; detected from the first window if None
+        task (str): 'transcribe' or 'translate'
+        temperature (float or tuple): Temperatures for fallback decoding
+        compression_ratio_threshold (float): See model.transcribe
+        logprob_threshold (float): See model.transcribe
+        no_speech_threshold (float): See model.transcribe
+        time_offset (float): Seconds added to every segment timestamp
+        fp16 (bool): Run inference in half precision (GPU only)
+        encoder_cache (EncoderCache): Reuse and store encoder outputs per window (default: None)
+        **decode_options: Extra keyword arguments for whisper.DecodingOptions
+            (e.g. beam_size, best_of)
+
+    Returns:
+        dict: {"text", "segments", "language"} as returned by model.transcribe
+    """
+    return transcribe_batched_many(model, [audio], batch_size, language, task, temperature,
+                                   compression_ratio_threshold, logprob_threshold, no_speech_threshold,
+                                   [time_offset], fp16, encoder_cache, **decode_options)[0]
+
+
+def transcribe_batched_many(model: Any, audios: Sequence[Union[np.ndarray, torch.Tensor]], batch_size: int = 8,
+                            language: Optional[Union[str, Sequence[str]]] = None, task: str = "transcribe",
+                            temperature: Union[float, Tuple[float, ...]] = DEFAULT_TEMPERATURES,
+                            compression_ratio_threshold: Optional[float] = 2.4,
+                            logprob_threshold: Optional[float] = -1.0,
+                            no_speech_threshold: Optional[float] = 0.6,
+                            time_offsets: Optional[Sequence[float]] = None, fp16: bool = False,
+                            encoder_cache: Optional[EncoderCache] = None, **decode_options) -> List[Dict]:
+    """
+    Transcribe several audios at once, pooling all their 30-second windows into shared batches
+
+    Short files that each fit in one window can fill a whole batch together.
+    Windows are grouped by language so each batch decodes with one tokenizer,
+    and batched in time order across the audios, so the channels of one
+    recording are encoded together window by window.
+
+    Args:
+        audios (list): 16 kHz float32 mono audio arrays (or their padded_mel())
+        language (str or list): Language code for all audios, or one per
+            audio; detected per audio (in one batched pass over their first
+            windows) if None
+        time_offsets (list): Seconds added to each audio's segment timestamps
+
+    The other arguments are the same as for transcribe_batched.
+
+    Returns:
+        list: One {"text", "segments", "language"} result per audio
+    """
+    time_offsets = time_offsets or [0.0] * len(audios)
+    mels, languages = _prepare_audios(model, audios, language, fp16, encoder_cache)
+
+    segments_per_audio: List[List[Dict]] = [[] for _ in audios]
+    for i, segment in _iter_window_segments(model, mels, languages, batch_size, task, temperature,
+                                            compression_ratio_threshold, logprob_threshold, no_speech_threshold,
+                                            time_offsets, fp16, encoder_cache, **decode_options):
+        segments_per_audio[i].append({"id": len(segments_per_audio[i]), **segment})
+
+    results = []
+    for segments, audio_language in zip(segments_per_audio, languages):
+        tokenizer = get_tokenizer(model.is_multilingual, num_languages=model.num_languages,
+                                  language=audio_language, task=task)
+        all_tokens = [token for segment in segments for token in segment["tokens"]]
+        results.append(dict(text=tokenizer.decode(all_tokens), segments=segments, language=audio_language))
+    return results
+
+
+def iter_batched_segments(model: Any, audio: Union[np.ndarray, torch.Tensor], batch_size: int = 8,
+                          language: Optional[str] = None, task: str = "transcribe",
+                          temperature: Union[float, Tuple[float, ...]] = DEFAULT_TEMPERATURES,
+                          compression_ratio_threshold: Optional[float] = 2.4,
+                          logprob_threshold: Optional[float] = -1.0,
+                          no_speech_threshold: Optional[float] = 0.6,
+                          time_offset: float = 0.0, fp16: bool = False,
+                          encoder_cache: Optional[EncoderCache] = None, **decode_options) -> Iterator[Dict]:
+    """
+    Yield segments in time order as each batch of windows finishes decoding
+
+    Takes the same arguments as transcribe_batched. Segments have no "id";
+    the caller numbers them.
+    """
+    mels, languages = _prepare_audios(model, [audio], language, fp16, encoder_cache)
+    for _, segment in _iter_window_segments(model, mels, languages, batch_size, task, temperature,
+                                            compression_ratio_threshold, logprob_threshold, no_speech_threshold,
+                                            [time_offset], fp16, encoder_cache, **decode_options):
+        yield segment
+
+
+def padded_mel(audio: Union[np.ndarray, torch.Tensor], n_mels: int) -> torch.Tensor:
+    """
+    Log-mel spectrogram of a chunk, padded with 30 s of silence like model.transcribe
+
+    The batched engine accepts the result in place of the audio, so the mel
+    can be computed ahead of time, e.g. in a prefetch thread.
+    """
+    with profile_span("log_mel"):
+        return log_mel_spectrogram(audio, n_mels, padding=N_SAMPLES)
+
+
+def _mel_window(mel: torch.Tensor, seek: int) -> torch.Tensor:
+    return pad_or_trim(mel[:, seek:seek + N_FRAMES], N_FRAMES)
+
+
+def _prepare_audios(model: Any, audios: Sequence[Union[np.ndarray, torch.Tensor]],
+                    language: Optional[Union[str, Sequence[str]]], fp16: bool,
+                    encoder_cache: Optional[EncoderCache] = None) -> Tuple[List[torch.Tensor], List[str]]:
+    """Compute each audio's mel and its language (detected in one batched pass if not given)"""
+    # One mel per audio; 2-D inputs are already padded_mel() output
+    mels = [audio if audio.ndim == 2 else padded_mel(audio, model.dims.n_mels) for audio in audios]
+    if isinstance(language, str):
+        return mels, [language] * len(audios)
+    if language is not None:
+        return mels, list(language)
+    first_windows = torch.stack([_mel_window(mel, 0) for mel in mels])
+    dtype = torch.float16 if fp16 else torch.float32
+    first_windows = first_windows.to(model.device).to(dtype)
+    if encoder_cache is not None:
+        # Full first windows' encoder output is reused when they are decoded; like model.transcribe,
+        # detection sees a short audio's silence padding, which decoding replaces with zeros
+        first_windows = encoder_cache.embed(model, first_windows)
+    return mels, detect_languages(model, first_windows)
+
+
+def _iter_window_segments(model: Any, mels: Sequence[torch.Tensor], languages: Sequence[str], batch_size: int,
+                          task: str, temperature: Union[float, Tuple[float, ...]],
+                          compression_ratio_threshold: Optional[float], logprob_threshold: Optional[float],
+                          no_speech_threshold: Optional[float], time_offsets: Sequence[float], fp16: bool,
+                          encoder_cache: Optional[EncoderCache] = None,
+                          **decode_options) -> Iterator[Tuple[int, Dict]]:
+    """
+    Decode every window of every mel in batches, yielding (audio index, segment)
+
+    Windows are grouped by language; within an audio they come out in time order.
+    """
+    dtype = torch.float16 if fp16 else torch.float32
+    temperatures = [temperature] if isinstance(temperature, (int, float)) else list(temperature)
+    content_frames = [mel.shape[-1] - N_FRAMES for mel in mels]
+
+    for group_language in dict.fromkeys(languages):
+        tokenizer = get_tokenizer(model.is_multilingual, num_languages=model.num_languages,
+                                  language=group_language, task=task)
+        # Time order across audios: windows at the same offset share a batch
+        windows = sorted(((i, seek) for i in range(len(mels)) if languages[i] == group_language
+                          for seek in range(0, content_frames[i], N_FRAMES)), key=lambda window: window[1])
+
+        for batch_start in range(0, len(windows), batch_size):
+            batch_windows = windows[batch_start:batch_start + batch_size]
+            # Like model.transcribe, a partial last window is padded with zeros, not the mel of silence
+            mel_batch = torch.stack([_mel_window(mels[i][:, :content_frames[i]], seek) for i, seek in batch_windows])
+            mel_batch = mel_batch.to(model.device).to(dtype)
+
+            # One encoder forward pass for the whole batch of windows (or just its uncached ones)
+            if encoder_cache is not None:
+                audio_features = encoder_cache.embed(model, mel_batch)
+            else:
+                with torch.no_grad():
+                    audio_features = model.embed_audio(mel_batch)
+
+            results = decode_with_fallback(model, audio_features, temperatures, compression_ratio_threshold,
+                                           logprob_threshold, no_speech_threshold, language=group_language,
+                                           task=task, fp16=fp16, **decode_options)
+
+            for (i, seek), result in zip(batch_windows, results):
+                if is_silent(result, logprob_threshold, no_speech_threshold):
+                    continue
+                segment_frames = min(N_FRAMES, content_frames[i] - seek)
+                window_offset = time_offsets[i] + seek * HOP_LENGTH / SAMPLE_RATE
+                for segment in window_segments(list(result.tokens), tokenizer, result, seek, window_offset,
+                                               segment_frames * HOP_LENGTH / SAMPLE_RATE):
+                    # if a segment is instantaneous or does not contain text, clear it
+                    if segment["start"] == segment["end"] or segment["text"].strip() == "":
+                        segment["text"] = ""
+                        segment["tokens"] = []
+                    yield i, segment
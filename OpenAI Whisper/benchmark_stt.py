@@ -0,0 +1,522 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the Whisper STT pipeline
+
+Usage:
+    python benchmark_stt.py memory [--durations 120 300 600]
+    python benchmark_stt.py batched [--model tiny] [--audio file.wav] [--batch-sizes 1 4 8]
+    python benchmark_stt.py encoder [--model tiny] [--audio file.wav] [--batch-size 8]
+    python benchmark_stt.py resample [--duration 600] [--sample-rates 44100 48000]
+    python benchmark_stt.py int8 [--model base] [--audio a.wav b.wav ...]
+    python benchmark_stt.py speculative [--model small] [--draft tiny] [--draft-tokens 2 4 6]
+    python benchmark_stt.py coldstart [--models tiny base small medium large]
+"""
+
+import argparse
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+from typing import List, Optional, Sequence
+
+import numpy as np
+import soundfile as sf
+
+# Committed speech samples for the int8 and speculative benchmarks (example.wav is silent).
+# A <name>.txt next to an audio file is its reference transcript.
+BENCHMARK_SAMPLES = ("sample_test.wav",)
+
+
+def create_benchmark_audio(filename: str, duration_seconds: float, sample_rate: int = 48000,
+                           channels: int = 2, block_seconds: int = 60) -> str:
+    """
+    Write a synthetic noise+tone WAV file block by block
+
+    Args:
+        filename (str): Output filename
+        duration_seconds (float): Duration of audio in seconds
+        sample_rate (int): Sample rate in Hz
+        channels (int): Number of channels
+        block_seconds (int): Seconds generated per write so creation stays small in memory
+
+    Returns:
+        str: Path to the created file
+    """
+    rng = np.random.default_rng(0)
+    total_frames = int(duration_seconds * sample_rate)
+    block_frames = block_seconds * sample_rate
+    with sf.SoundFile(filename, "w", samplerate=sample_rate, channels=channels, subtype="PCM_16") as f:
+        for start in range(0, total_frames, block_frames):
+            frames = min(block_frames, total_frames - start)
+            t = (start + np.arange(frames)) / sample_rate
+            tone = 0.3 * np.sin(2 * np.pi * 440 * t)
+            block = tone[:, None] + rng.normal(0, 0.05, (frames, channels))
+            f.write(block.astype(np.float32))
+    return filename
+
+
+def _peak_rss_mb() -> float:
+    """Peak resident set size of the current process in MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _process_peak_rss_mb() -> float:
+    """
+    Peak RSS of this process alone in MB
+
+    ru_maxrss survives exec, so a spawned child would report its parent's
+    peak if that was higher; Linux's VmHWM starts fresh with the new program.
+    """
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return _peak_rss_mb()
+
+
+def _measure_read(mode: str, file_path: str, chunk_duration: float, results) -> None:
+    """Read a file with the given strategy in a fresh process and report peak RSS"""
+    # Imported in both modes so both peaks include the same module baseline
+    from audio_stream import iter_audio_chunks
+
+    start = time.perf_counter()
+    if mode == "full":
+        audio_data, _ = sf.read(file_path)
+        if len(audio_data.shape) > 1:
+            audio_data = audio_data.mean(axis=1)
+    else:
+        for _ in iter_audio_chunks(file_path, chunk_duration, reuse_buffer=True):
+            pass
+    results.put((_process_peak_rss_mb(), time.perf_counter() - start))
+
+
+def benchmark_streaming_memory(durations, chunk_duration: float = 600, sample_rate: int = 48000,
+                               channels: int = 2) -> None:
+    """
+    Compare peak RSS of a full sf.read against the streaming chunk reader
+
+    Each measurement runs in a freshly spawned process so the peaks don't mix.
+    Once a file holds at least one full chunk, the streaming peak must not
+    grow with its length by as much as another chunk.
+    """
+    print("Peak RSS vs. duration (full read vs. streaming chunks)")
+    print(f"{sample_rate} Hz, {channels} channel(s), {chunk_duration:.0f} s chunks")
+    print("-" * 60)
+    print(f"{'duration (min)':>15} {'full (MB)':>12} {'stream (MB)':>12} {'stream (s)':>12}")
+
+    ctx = multiprocessing.get_context("spawn")
+    rows = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for duration in durations:
+            file_path = create_benchmark_audio(os.path.join(tmp_dir, f"bench_{duration}.wav"),
+                                               duration, sample_rate, channels)
+            row = {}
+            rows[duration] = row
+            for mode in ("full", "stream"):
+                results = ctx.Queue()
+                proc = ctx.Process(target=_measure_read, args=(mode, file_path, chunk_duration, results))
+                proc.start()
+                row[mode] = results.get()
+                proc.join()
+            os.remove(file_path)
+            print(f"{duration / 60:>15.1f} {row['full'][0]:>12.1f} {row['stream'][0]:>12.1f} "
+                  f"{row['stream'][1]:>12.2f}")
+
+    # Mono float32 at the native rate
+    chunk_mb = chunk_duration * sample_rate * 4 / (1024 * 1024)
+    full_chunk = [rows[duration]["stream"][0] for duration in durations if duration >= chunk_duration]
+    if len(full_chunk) > 1:
+        growth = max(full_chunk) - min(full_chunk)
+        print(f"Streaming peak growth past one chunk: {growth:.1f} MB (one chunk is {chunk_mb:.1f} MB)")
+        assert growth < chunk_mb, "streaming peak memory grows with file length"
+
+
+def load_benchmark_audio(audio_path: Optional[str], duration_seconds: float) -> np.ndarray:
+    """
+    Load 16 kHz float32 mono audio for inference benchmarks
+
+    Uses the given file if there is one; otherwise synthesizes a tone with noise.
+    """
+    if audio_path:
+        import whisper
+        return whisper.load_audio(audio_path)
+    rng = np.random.default_rng(0)
+    t = np.arange(int(duration_seconds * 16000)) / 16000
+    audio = 0.3 * np.sin(2 * np.pi * 440 * t) + rng.normal(0, 0.05, t.shape)
+    return audio.astype(np.float32)
+
+
+def benchmark_batched(model_size: str, audio_path: Optional[str], duration_seconds: float,
+                      batch_sizes) -> None:
+    """
+    Compare model.transcribe (one window at a time) against the batched engine
+    """
+    from batched_stt import transcribe_batched
+    from model_registry import get_model
+
+    model = get_model(model_size)
+    audio = load_benchmark_audio(audio_path, duration_seconds)
+    audio_seconds = len(audio) / 16000
+
+    print(f"Batched vs. per-window transcription ({model_size}, {audio_seconds / 60:.1f} min audio)")
+    print("-" * 60)
+    print(f"{'path':>20} {'seconds':>10} {'RTF':>8} {'speedup':>8}")
+
+    start = time.perf_counter()
+    model.transcribe(audio, fp16=False)
+    baseline = time.perf_counter() - start
+    print(f"{'model.transcribe':>20} {baseline:>10.2f} {baseline / audio_seconds:>8.3f} {1.0:>8.2f}")
+
+    for batch_size in batch_sizes:
+        start = time.perf_counter()
+        transcribe_batched(model, audio, batch_size=batch_size)
+        elapsed = time.perf_counter() - start
+        print(f"{f'batched (bs={batch_size})':>20} {elapsed:>10.2f} {elapsed / audio_seconds:>8.3f} "
+              f"{baseline / elapsed:>8.2f}")
+
+
+def benchmark_encoder_cache(model_size: str, audio_path: Optional[str], duration_seconds: float,
+                            batch_size: int, repeats: int = 3) -> None:
+    """
+    Encoder passes without an encoder cache, with an empty one, and with a full one
+
+    The empty cache is what a single pass sees: every window is hashed and
+    stored, none is found. Only the encoder step is timed, since decoding is
+    the same on every path. Each path runs repeats times; the fastest run counts.
+    """
+    import torch
+    from batched_stt import _mel_window, padded_mel
+    from encoder_cache import EncoderCache
+    from model_registry import get_model, model_identity
+    from whisper.audio import N_FRAMES
+
+    model = get_model(model_size)
+    audio = load_benchmark_audio(audio_path, duration_seconds)
+    audio_seconds = len(audio) / 16000
+    mel = padded_mel(audio, model.dims.n_mels)
+    content = mel[:, :mel.shape[-1] - N_FRAMES]
+    windows = torch.stack([_mel_window(content, seek) for seek in range(0, content.shape[-1], N_FRAMES)])
+    batches = list(torch.split(windows, batch_size))
+
+    def empty_cache():
+        return EncoderCache(model_identity(model_size), persist=False)
+
+    def run(make_cache):
+        best, cache = float("inf"), None
+        for _ in range(repeats):
+            cache = make_cache()
+            start = time.perf_counter()
+            for batch in batches:
+                if cache is None:
+                    with torch.no_grad():
+                        model.embed_audio(batch)
+                else:
+                    cache.embed(model, batch)
+            best = min(best, time.perf_counter() - start)
+        return best, cache
+
+    # Filling the full cache also warms up the encoder for the timed runs
+    warm = empty_cache()
+    for batch in batches:
+        warm.embed(model, batch)
+
+    print(f"Encoder cache ({model_size}, {len(windows)} windows, {audio_seconds / 60:.1f} min audio, "
+          f"batch size {batch_size})")
+    print("-" * 60)
+    print(f"{'path':>12} {'seconds':>10} {'ms/window':>10} {'vs. none':>9} {'hits':>6}")
+    baseline, _ = run(lambda: None)
+    print(f"{'no cache':>12} {baseline:>10.2f} {1000 * baseline / len(windows):>10.1f} {1.0:>9.3f}")
+    for name, make_cache in (("empty cache", empty_cache), ("full cache", lambda: warm)):
+        elapsed, cache = run(make_cache)
+        print(f"{name:>12} {elapsed:>10.2f} {1000 * elapsed / len(windows):>10.1f} {elapsed / baseline:>9.3f} "
+              f"{cache.hits:>6}")
+
+
+def benchmark_resample(duration_seconds: float, sample_rates, chunk_duration: float = 600) -> None:
+    """
+    Compare the streaming polyphase resampler against ffmpeg (whisper.load_audio)
+
+    Both produce 16 kHz float32 mono from the same stereo WAV file.
+    """
+    import whisper
+    from audio_stream import iter_audio_chunks
+
+    print(f"Resampling to 16 kHz mono ({duration_seconds / 60:.1f} min stereo audio)")
+    print("-" * 60)
+    print(f"{'input rate':>10} {'path':>10} {'seconds':>10} {'x realtime':>12}")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for sample_rate in sample_rates:
+            file_path = create_benchmark_audio(os.path.join(tmp_dir, f"bench_{sample_rate}.wav"),
+                                               duration_seconds, sample_rate, channels=2)
+
+            start = time.perf_counter()
+            for _ in iter_audio_chunks(file_path, chunk_duration, sample_rate=16000, reuse_buffer=True):
+                pass
+            elapsed = time.perf_counter() - start
+            print(f"{sample_rate:>10} {'streaming':>10} {elapsed:>10.2f} {duration_seconds / elapsed:>12.0f}")
+
+            try:
+                start = time.perf_counter()
+                whisper.load_audio(file_path)
+                elapsed = time.perf_counter() - start
+                print(f"{sample_rate:>10} {'ffmpeg':>10} {elapsed:>10.2f} {duration_seconds / elapsed:>12.0f}")
+            except (FileNotFoundError, RuntimeError) as e:
+                print(f"{sample_rate:>10} {'ffmpeg':>10} {'skipped':>10} ({type(e).__name__}: ffmpeg unavailable)")
+            os.remove(file_path)
+
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    """
+    Word error rate (substitutions + deletions + insertions over reference words)
+
+    Both texts go through Whisper's basic normalizer (lowercase, no punctuation) first.
+    """
+    from whisper.normalizers import BasicTextNormalizer
+    normalizer = BasicTextNormalizer()
+    ref, hyp = normalizer(reference).split(), normalizer(hypothesis).split()
+    if not ref:
+        return float(len(hyp) > 0)
+
+    # Levenshtein distance over words, one row at a time
+    row = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        previous, row[0] = row[0], i
+        for j, hyp_word in enumerate(hyp, 1):
+            previous, row[j] = row[j], min(row[j] + 1, row[j - 1] + 1, previous + (ref_word != hyp_word))
+    return row[-1] / len(ref)
+
+
+def benchmark_quantized(model_size: str, audio_paths: Sequence[str]) -> None:
+    """
+    Compare int8 dynamic quantization against fp32 on a fixed set of local files
+
+    Reports the real-time factor of each and the WER of the int8 transcript
+    against the fp32 one, which measures agreement between the two, not
+    accuracy. Accuracy is only reported where a reference transcript
+    (<name>.txt) exists: each precision's WER against it and the delta.
+    """
+    from model_registry import get_model, model_memory_mb
+    from pcm_cache import open_pcm
+
+    files = [path for path in audio_paths if os.path.exists(path)]
+    if not files:
+        print("No benchmark audio found")
+        return
+    audios = [open_pcm(path) for path in files]
+    audio_seconds = sum(len(audio) for audio in audios) / 16000
+
+    texts = {}
+    print(f"int8 vs. fp32 on CPU ({model_size}, {len(files)} files, {audio_seconds / 60:.1f} min audio)")
+    print("-" * 60)
+    print(f"{'dtype':>6} {'load s':>8} {'seconds':>10} {'RTF':>8} {'MB':>8}")
+    for dtype in ("fp32", "int8"):
+        start = time.perf_counter()
+        model = get_model(model_size, device="cpu", dtype=dtype)
+        load_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        texts[dtype] = [model.transcribe(audio, fp16=False, temperature=0.0)["text"] for audio in audios]
+        elapsed = time.perf_counter() - start
+        print(f"{dtype:>6} {load_seconds:>8.2f} {elapsed:>10.2f} {elapsed / audio_seconds:>8.3f} "
+              f"{model_memory_mb(model):>8.0f}")
+
+    print()
+    print(f"{'file':>24} {'int8/fp32 diff':>15} {'fp32 WER':>10} {'int8 WER':>10} {'delta':>8}")
+    deltas: List[float] = []
+    for path, fp32_text, int8_text in zip(files, texts["fp32"], texts["int8"]):
+        line = f"{os.path.basename(path)[:24]:>24} {word_error_rate(fp32_text, int8_text):>15.3f}"
+        reference_path = os.path.splitext(path)[0] + ".txt"
+        if os.path.exists(reference_path):
+            with open(reference_path, "r", encoding="utf-8") as f:
+                reference = f.read()
+            fp32_wer, int8_wer = word_error_rate(reference, fp32_text), word_error_rate(reference, int8_text)
+            deltas.append(int8_wer - fp32_wer)
+            line += f" {fp32_wer:>10.3f} {int8_wer:>10.3f} {int8_wer - fp32_wer:>+8.3f}"
+        print(line)
+    print("int8/fp32 diff: WER of the int8 transcript against the fp32 one (agreement, not accuracy)")
+    if deltas:
+        print(f"Mean WER delta (int8 - fp32) over {len(deltas)} referenced files: {np.mean(deltas):+.3f}")
+    else:
+        print("No reference transcripts (<name>.txt) found, so accuracy was not measured")
+
+
+def benchmark_speculative(model_size: str, draft_size: str, audio_paths: Sequence[str],
+                          draft_token_counts) -> None:
+    """
+    Compare speculative greedy decoding against plain greedy decoding
+
+    Reports decoded tokens per second, the share of draft tokens the main
+    model accepted, and whether each transcript matches plain greedy decoding.
+    """
+    from language_id import resolve_language
+    from model_registry import get_model
+    from pcm_cache import decoded_path, open_pcm
+    from speculative_decoding import SpeculativeModel
+
+    files = [decoded_path(path) for path in audio_paths if os.path.exists(path)]
+    if not files:
+        print("No benchmark audio found")
+        return
+    model = get_model(model_size)
+    draft_model = get_model(draft_size)
+    audios = [open_pcm(path) for path in files]
+    # Speculation needs a known language; temperature 0 keeps both paths on greedy decoding
+    languages = [resolve_language(model, path, model_size) for path in files]
+
+    def run(decoder):
+        start = time.perf_counter()
+        results = [decoder.transcribe(audio, fp16=False, temperature=0.0, language=language)
+                   for audio, language in zip(audios, languages)]
+        elapsed = time.perf_counter() - start
+        tokens = sum(len(segment["tokens"]) for result in results for segment in result["segments"])
+        return [result["text"] for result in results], tokens, elapsed
+
+    audio_seconds = sum(len(audio) for audio in audios) / 16000
+    print(f"Speculative decoding ({model_size} with {draft_size} drafts, {len(files)} files, "
+          f"{audio_seconds / 60:.1f} min audio)")
+    print("-" * 60)
+    print(f"{'path':>20} {'seconds':>10} {'tokens/s':>10} {'speedup':>8} {'accepted':>9} {'same':>5}")
+    texts, tokens, baseline = run(model)
+    print(f"{'greedy':>20} {baseline:>10.2f} {tokens / baseline:>10.1f} {1.0:>8.2f}")
+
+    for draft_tokens in draft_token_counts:
+        speculative = SpeculativeModel(model, draft_model, draft_tokens)
+        speculative_texts, tokens, elapsed = run(speculative)
+        stats = speculative.stats
+        accepted = stats.get("accepted", 0) / max(stats.get("proposed", 0), 1)
+        print(f"{f'speculative (k={draft_tokens})':>20} {elapsed:>10.2f} {tokens / elapsed:>10.1f} "
+              f"{baseline / elapsed:>8.2f} {100 * accepted:>8.0f}% {str(speculative_texts == texts):>5}")
+
+
+def _measure_load(mode: str, model_size: str, results) -> None:
+    """Load a model in a fresh process, run one window, and report timings and peak RSS"""
+    import torch
+    import whisper
+    from whisper.decoding import DecodingOptions
+
+    start = time.perf_counter()
+    if mode == "torch.load":
+        model = whisper.load_model(model_size, device="cpu")
+    else:
+        from mmap_weights import load_mmap_model
+        model = load_mmap_model(model_size, device="cpu")
+    load_seconds = time.perf_counter() - start
+    load_rss = _process_peak_rss_mb()
+
+    # The first window touches every encoder weight and the decoder weights it needs
+    start = time.perf_counter()
+    mel = whisper.log_mel_spectrogram(np.zeros(480000, dtype=np.float32), model.dims.n_mels)
+    with torch.no_grad():
+        model.decode(mel, DecodingOptions(language="en", fp16=False, sample_len=8))
+    results.put((load_seconds, load_rss, time.perf_counter() - start, _process_peak_rss_mb()))
+
+
+def benchmark_cold_start(model_sizes) -> None:
+    """
+    Compare whisper.load_model against memory-mapped weights in fresh processes
+
+    Models are converted first, outside the measurement. The page cache is
+    warm for both paths; the difference is unpickling and copying versus
+    mapping.
+    """
+    from mmap_weights import convert_model
+
+    for model_size in model_sizes:
+        convert_model(model_size)
+
+    print("Cold start: whisper.load_model vs. memory-mapped weights (CPU)")
+    print("-" * 60)
+    print(f"{'model':>8} {'loader':>11} {'load s':>8} {'RSS MB':>8} {'1st window s':>13} {'peak RSS MB':>12}")
+
+    ctx = multiprocessing.get_context("spawn")
+    for model_size in model_sizes:
+        for mode in ("torch.load", "mmap"):
+            results = ctx.Queue()
+            proc = ctx.Process(target=_measure_load, args=(mode, model_size, results))
+            proc.start()
+            load_seconds, load_rss, window_seconds, peak_rss = results.get()
+            proc.join()
+            print(f"{model_size:>8} {mode:>11} {load_seconds:>8.2f} {load_rss:>8.0f} {window_seconds:>13.2f} "
+                  f"{peak_rss:>12.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks for the Whisper STT pipeline")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    memory_parser = subparsers.add_parser("memory", help="Peak RSS of full vs. streaming audio reads")
+    memory_parser.add_argument("--durations", type=float, nargs="+", default=[60, 600, 1800],
+                               help="Audio durations to test, in seconds")
+    memory_parser.add_argument("--chunk-duration", type=float, default=600,
+                               help="Streaming chunk duration in seconds")
+
+    batched_parser = subparsers.add_parser("batched", help="Batched engine vs. model.transcribe")
+    batched_parser.add_argument("--model", default="tiny", help="Model size (default: tiny)")
+    batched_parser.add_argument("--audio", help="Audio file to use instead of synthetic audio")
+    batched_parser.add_argument("--duration", type=float, default=300,
+                                help="Synthetic audio duration in seconds")
+    batched_parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 4, 8],
+                                help="Batch sizes to test")
+
+    encoder_parser = subparsers.add_parser("encoder", help="Encoder passes with and without the encoder cache")
+    encoder_parser.add_argument("--model", default="tiny", help="Model size (default: tiny)")
+    encoder_parser.add_argument("--audio", help="Audio file to use instead of synthetic audio")
+    encoder_parser.add_argument("--duration", type=float, default=300,
+                                help="Synthetic audio duration in seconds")
+    encoder_parser.add_argument("--batch-size", type=int, default=8, help="Windows per batched pass")
+
+    resample_parser = subparsers.add_parser("resample", help="Streaming resampler vs. ffmpeg")
+    resample_parser.add_argument("--duration", type=float, default=600,
+                                 help="Synthetic audio duration in seconds")
+    resample_parser.add_argument("--sample-rates", type=int, nargs="+", default=[44100, 48000],
+                                 help="Input sample rates to test")
+
+    int8_parser = subparsers.add_parser("int8", help="Dynamic int8 quantization vs. fp32 (RTF and agreement)")
+    int8_parser.add_argument("--model", default="base", help="Model size (default: base)")
+    int8_parser.add_argument("--audio", nargs="+", default=None,
+                             help="Audio files (default: the bundled speech sample)")
+
+    speculative_parser = subparsers.add_parser("speculative", help="Speculative vs. plain greedy decoding")
+    speculative_parser.add_argument("--model", default="small", help="Main model size (default: small)")
+    speculative_parser.add_argument("--draft", default="tiny", help="Draft model size (default: tiny)")
+    speculative_parser.add_argument("--draft-tokens", type=int, nargs="+", default=[2, 4, 6],
+                                    help="Draft tokens per verification pass to test")
+    speculative_parser.add_argument("--audio", nargs="+", default=None,
+                                    help="Audio files (default: the bundled speech sample)")
+
+    coldstart_parser = subparsers.add_parser("coldstart", help="whisper.load_model vs. memory-mapped weights")
+    coldstart_parser.add_argument("--models", nargs="+", default=["tiny", "base", "small", "medium", "large"],
+                                  help="Model sizes to test")
+
+    args = parser.parse_args()
+
+    if args.benchmark == "memory":
+        benchmark_streaming_memory(args.durations, args.chunk_duration)
+    elif args.benchmark == "batched":
+        benchmark_batched(args.model, args.audio, args.duration, args.batch_sizes)
+    elif args.benchmark == "encoder":
+        benchmark_encoder_cache(args.model, args.audio, args.duration, args.batch_size)
+    elif args.benchmark == "resample":
+        benchmark_resample(args.duration, args.sample_rates)
+    elif args.benchmark == "int8":
+        here = os.path.dirname(os.path.abspath(__file__))
+        benchmark_quantized(args.model, args.audio or [os.path.join(here, name) for name in BENCHMARK_SAMPLES])
+    elif args.benchmark == "speculative":
+        here = os.path.dirname(os.path.abspath(__file__))
+        benchmark_speculative(args.model, args.draft,
+                              args.audio or [os.path.join(here, name) for name in BENCHMARK_SAMPLES],
+                              args.draft_tokens)
+    elif args.benchmark == "coldstart":
+        benchmark_cold_start(args.models)
+
+
+if __name__ == "__main__":
+    main()
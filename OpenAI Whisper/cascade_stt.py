@@ -0,0 +1,214 @@
+"""
+Confidence-driven model cascade
+
+A small model transcribes everything first. Each of its segments carries
+Whisper's own confidence signals (avg_logprob, compression_ratio,
+no_speech_prob), and a segment that fails any threshold is marked weak.
+Only the time spans of weak segments, with a little surrounding context,
+are transcribed again by a larger model. The large model's segments replace
+the weak ones by timestamp, so most of the audio is paid for at small-model
+cost and the large model only runs where it is needed.
+"""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from whisper.audio import SAMPLE_RATE
+
+from audio_stream import iter_audio_chunks
+from chunk_planner import plan_chunks
+from language_id import resolve_language
+from model_registry import get_model
+from pcm_cache import decoded_path
+
+# Same thresholds model.transcribe uses to decide on a temperature fallback
+DEFAULT_LOGPROB_THRESHOLD = -1.0
+DEFAULT_COMPRESSION_RATIO_THRESHOLD = 2.4
+DEFAULT_NO_SPEECH_THRESHOLD = 0.6
+
+# Audio included on each side of an escalated span so the large model has context
+CONTEXT_SECONDS = 1.0
+
+# Weak segments closer together than this are escalated as one span
+MERGE_GAP_SECONDS = 1.0
+
+
+def weak_reasons(segment: Dict, logprob_threshold: Optional[float] = DEFAULT_LOGPROB_THRESHOLD,
+                 compression_ratio_threshold: Optional[float] = DEFAULT_COMPRESSION_RATIO_THRESHOLD,
+                 no_speech_threshold: Optional[float] = DEFAULT_NO_SPEECH_THRESHOLD) -> List[str]:
+    """
+    List the confidence checks a segment fails
+
+    Text on a likely-silent window (high no_speech_prob) is a common source of
+    hallucinations, so it counts as weak too.
+
+    Returns:
+        list: Names of the failed metrics; empty if the segment is trusted
+    """
+    reasons = []
+    if logprob_threshold is not None and segment["avg_logprob"] < logprob_threshold:
+        reasons.append("avg_logprob")
+    if compression_ratio_threshold is not None and segment["compression_ratio"] > compression_ratio_threshold:
+        reasons.append("compression_ratio")
+    if no_speech_threshold is not None and segment["no_speech_prob"] > no_speech_threshold:
+        reasons.append("no_speech_prob")
+    return reasons
+
+
+def escalation_spans(segments: Sequence[Dict], weak: Sequence[bool],
+                     merge_gap: float = MERGE_GAP_SECONDS) -> List[Tuple[float, float]]:
+    """Group weak segments into (start, end) spans in seconds, merging nearby ones"""
+    spans: List[Tuple[float, float]] = []
+    for segment, is_weak in zip(segments, weak):
+        if not is_weak:
+            continue
+        if spans and segment["start"] - spans[-1][1] <= merge_gap:
+            spans[-1] = (spans[-1][0], max(spans[-1][1], segment["end"]))
+        else:
+            spans.append((segment["start"], segment["end"]))
+    return spans
+
+
+def _midpoint_in(segment: Dict, spans: Sequence[Tuple[float, float]]) -> bool:
+    midpoint = (segment["start"] + segment["end"]) / 2
+    return any(start <= midpoint < end for start, end in spans)
+
+
+def merge_by_timestamp(small_segments: Sequence[Dict], large_segments: Sequence[Dict],
+                       spans: Sequence[Tuple[float, float]],
+                       reasons: Optional[Sequence[Sequence[str]]] = None) -> List[Dict]:
+    """
+    Replace the small model's segments inside escalated spans with the large model's
+
+    A segment belongs to a span if its midpoint falls inside it. Large-model
+    segments that only cover the context around a span are dropped, so no
+    speech is transcribed twice. If the large model produced nothing inside a
+    span, the small model's segments there are kept, except those flagged for
+    no_speech_prob: silence is then the more likely reading.
+
+    Args:
+        reasons (list): weak_reasons() of each small segment (default: none flagged)
+    """
+    reasons = reasons or [[] for _ in small_segments]
+    replaced = [segment for segment in large_segments if _midpoint_in(segment, spans)]
+    empty_spans = [span for span in spans if not any(_midpoint_in(segment, [span]) for segment in replaced)]
+    kept = [segment for segment, segment_reasons in zip(small_segments, reasons)
+            if not _midpoint_in(segment, spans)
+            or (_midpoint_in(segment, empty_spans) and "no_speech_prob" not in segment_reasons)]
+    return sorted(kept + replaced, key=lambda segment: segment["start"])
+
+
+def transcribe_cascade(small_model: Any, large_model: Any, audio: np.ndarray, language: Optional[str] = None,
+                       time_offset: float = 0.0,
+                       logprob_threshold: Optional[float] = DEFAULT_LOGPROB_THRESHOLD,
+                       compression_ratio_threshold: Optional[float] = DEFAULT_COMPRESSION_RATIO_THRESHOLD,
+                       no_speech_threshold: Optional[float] = DEFAULT_NO_SPEECH_THRESHOLD) -> Dict:
+    """
+    Transcribe 16 kHz audio with the small model and escalate weak segments
+
+    Args:
+        small_model: Whisper model used for the first pass
+        large_model: Whisper model used on weak spans
+        audio (np.ndarray): 16 kHz float32 mono audio
+        language (str): Language code; detected by the small model if None
+        time_offset (float): Seconds added to every timestamp (chunk start in the file)
+        logprob_threshold (float): Segments with a lower avg_logprob are escalated
+        compression_ratio_threshold (float): Segments with a higher compression ratio are escalated
+        no_speech_threshold (float): Segments with a higher no_speech_prob are escalated
+
+    Returns:
+        dict: {"text", "segments", "language"} in file time, plus "cascade"
+            with the escalated spans and reasons
+    """
+    first = small_model.transcribe(audio, fp16=False, language=language)
+    language = first["language"]
+    segments = first["segments"]
+    reasons = [weak_reasons(segment, logprob_threshold, compression_ratio_threshold, no_speech_threshold)
+               for segment in segments]
+    spans = escalation_spans(segments, [bool(r) for r in reasons])
+
+    large_segments = []
+    for start, end in spans:
+        context_start = max(start - CONTEXT_SECONDS, 0.0)
+        span_audio = audio[int(context_start * SAMPLE_RATE):int((end + CONTEXT_SECONDS) * SAMPLE_RATE)]
+        # Condition the large model on the trusted text just before the span
+        prompt = "".join(segment["text"] for segment, r in zip(segments, reasons)
+                         if not r and segment["end"] <= start)[-200:]
+        second = large_model.transcribe(span_audio, fp16=False, language=language,
+                                        initial_prompt=prompt or None, condition_on_previous_text=False)
+        for segment in second["segments"]:
+            segment["start"] += context_start
+            segment["end"] += context_start
+            large_segments.append(segment)
+
+    merged = merge_by_timestamp(segments, large_segments, spans, reasons)
+    for i, segment in enumerate(merged):
+        segment["id"] = i
+        segment["start"] += time_offset
+        segment["end"] += time_offset
+
+    reason_counts: Dict[str, int] = {}
+    for segment_reasons in reasons:
+        for reason in segment_reasons:
+            reason_counts[reason] = reason_counts.get(reason, 0) + 1
+    cascade = dict(total_seconds=len(audio) / SAMPLE_RATE,
+                   escalated_seconds=sum(end - start for start, end in spans),
+                   total_segments=len(segments), escalated_segments=sum(1 for r in reasons if r),
+                   reasons=reason_counts,
+                   spans=[[start + time_offset, end + time_offset] for start, end in spans])
+    return dict(text="".join(segment["text"] for segment in merged), segments=merged, language=language,
+                cascade=cascade)
+
+
+def transcribe_cascade_file(file_path: str, model_size: str = "tiny", cascade_model: str = "medium",
+                            language: Optional[str] = None, use_cache: bool = True,
+                            chunk_duration: float = 600) -> Dict:
+    """
+    Run the cascade over a whole file, one planned chunk at a time
+
+    Args:
+        file_path (str): Path to the audio file
+        model_size (str): Small first-pass model
+        cascade_model (str): Larger model for weak segments
+        language (str): Language code; detected once per file if None
+        use_cache (bool): Reuse the cached language detection
+        chunk_duration (float): Seconds of audio per chunk
+
+    Returns:
+        dict: {"text", "segments", "language"} in file time, plus "cascade"
+            with the fraction of audio that needed the larger model
+    """
+    audio_path = decoded_path(file_path)
+    small_model = get_model(model_size)
+    large_model = get_model(cascade_model)
+    language = resolve_language(small_model, audio_path, model_size, language, use_cache)
+
+    results = []
+    plan = plan_chunks(audio_path, chunk_duration)
+    for start_sample, _, audio_chunk in iter_audio_chunks(audio_path, ranges=plan, sample_rate=SAMPLE_RATE,
+                                                          reuse_buffer=True):
+        results.append(transcribe_cascade(small_model, large_model, audio_chunk, language,
+                                          time_offset=start_sample / SAMPLE_RATE))
+
+    segments = [segment for result in results for segment in result["segments"]]
+    for i, segment in enumerate(segments):
+        segment["id"] = i
+    reasons: Dict[str, int] = {}
+    for result in results:
+        for reason, count in result["cascade"]["reasons"].items():
+            reasons[reason] = reasons.get(reason, 0) + count
+    total_seconds = sum(result["cascade"]["total_seconds"] for result in results)
+    escalated_seconds = sum(result["cascade"]["escalated_seconds"] for result in results)
+    cascade = dict(small_model=model_size, large_model=cascade_model,
+                   total_seconds=total_seconds, escalated_seconds=escalated_seconds,
+                   escalated_fraction=escalated_seconds / total_seconds if total_seconds else 0.0,
+                   total_segments=sum(result["cascade"]["total_segments"] for result in results),
+                   escalated_segments=sum(result["cascade"]["escalated_segments"] for result in results),
+                   reasons=reasons,
+                   spans=[span for result in results for span in result["cascade"]["spans"]])
+
+    print(f"Cascade {model_size} -> {cascade_model}: escalated {cascade['escalated_segments']} of "
+          f"{cascade['total_segments']} segments, {escalated_seconds:.0f} of {total_seconds:.0f} audio-seconds "
+          f"({100 * cascade['escalated_fraction']:.0f}%)")
+    return dict(text="".join(segment["text"] for segment in segments), segments=segments,
+                language=language, cascade=cascade)
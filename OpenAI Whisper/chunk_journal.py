@@ -0,0 +1,129 @@
+"""
+Append-only per-chunk journal for resumable long-file transcription
+
+The journal is a JSON-lines file next to the transcription output. The first
+line records the chunk plan and a fingerprint of the model and settings.
+Every finished chunk's result is appended and fsynced as it completes. A
+rerun with the same plan and fingerprint loads the finished chunks and only
+transcribes the rest. A journal that doesn't match the current run is
+discarded.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from typing import Any, Dict, List, Sequence, Tuple
+
+import whisper
+
+from model_registry import model_identity
+
+
+def journal_path(original_file_path: str, output_dir: str = "output") -> str:
+    """
+    Journal location next to the transcription output for a file
+
+    The name carries a short hash of the file's absolute path, so files with
+    the same name in different directories keep separate journals.
+    """
+    base_name = os.path.splitext(os.path.basename(original_file_path))[0]
+    path_hash = hashlib.sha256(os.path.abspath(original_file_path).encode("utf-8")).hexdigest()[:12]
+    return os.path.join(output_dir, f"{base_name}_{path_hash}_journal.jsonl")
+
+
+def model_fingerprint(model_size: str, audio_hash: str, **options: Any) -> Dict[str, Any]:
+    """
+    Identify everything that must match for journaled chunks to be reused
+
+    Args:
+        model_size (str): Whisper model size or checkpoint path
+        audio_hash (str): SHA-256 of the audio file
+        **options: Any other settings that change chunk results
+
+    Returns:
+        dict: JSON-serializable fingerprint
+    """
+    return dict(model=model_identity(model_size), whisper_version=whisper.__version__, audio=audio_hash, options=options)
+
+
+class ChunkJournal:
+    def __init__(self, path: str, plan: Sequence[Tuple[int, int]], fingerprint: Dict[str, Any]):
+        """
+        Open or create a journal for one chunked transcription
+
+        Args:
+            path (str): Journal file path
+            plan (list): (start_sample, end_sample) chunk ranges
+            fingerprint (dict): Model and settings fingerprint (see model_fingerprint)
+        """
+        self.path = path
+        self.plan = [[int(start), int(end)] for start, end in plan]
+        self.fingerprint = fingerprint
+        self.completed: Dict[int, Dict] = {}
+        self._load()
+
+    def _header(self) -> Dict[str, Any]:
+        return {"type": "header", "plan": self.plan, "fingerprint": self.fingerprint}
+
+    def _load(self) -> None:
+        """Load finished chunks from a matching journal, then rewrite it cleanly"""
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                lines = f.read().splitlines()
+            try:
+                header = json.loads(lines[0]) if lines else None
+            except json.JSONDecodeError:
+                header = None
+
+            if header == self._header():
+                for line in lines[1:]:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        break  # Torn write from a crash; everything before it is good
+                    index = entry["index"]
+                    if 0 <= index < len(self.plan) and [entry["start"], entry["end"]] == self.plan[index]:
+                        self.completed[index] = entry["result"]
+            else:
+                print(f"Journal {self.path} is from a different plan or model; starting over")
+
+        # Rewrite header plus valid entries so a torn last line can't corrupt later appends
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(json.dumps(self._header()) + "\n")
+            for index in sorted(self.completed):
+                f.write(json.dumps(self._entry(index, self.completed[index]), ensure_ascii=False) + "\n")
+        os.replace(tmp_path, self.path)
+
+    def _entry(self, index: int, result: Dict) -> Dict[str, Any]:
+        start, end = self.plan[index]
+        return {"type": "chunk", "index": index, "start": start, "end": end, "result": result}
+
+    def append(self, index: int, result: Dict) -> None:
+        """Durably record a finished chunk"""
+        self.completed[index] = result
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(self._entry(index, result), ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def pending(self) -> List[int]:
+        """Indices of chunks that still need to be transcribed"""
+        return [i for i in range(len(self.plan)) if i not in self.completed]
+
+    def remove(self) -> None:
+        """Delete the journal once the whole file is done"""
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def open_journal(original_file_path: str, plan: Sequence[Tuple[int, int]],
+                 fingerprint: Dict[str, Any], output_dir: str = "output") -> ChunkJournal:
+    """Open the journal for a file, reporting how many chunks can be skipped"""
+    journal = ChunkJournal(journal_path(original_file_path, output_dir), plan, fingerprint)
+    if journal.completed:
+        print(f"Resuming from journal: {len(journal.completed)}/{len(plan)} chunks already done")
+    return journal
@@ -0,0 +1,99 @@
+"""
+Silence-aligned chunk planning for long-audio transcription
+
+Instead of cutting at fixed sample offsets, the planner runs one streaming
+RMS energy pass over the file and places each chunk boundary in the quietest
+spot shortly before the target length. Targets are whole multiples of
+Whisper's 30-second window, and boundaries are only ever moved earlier, so a
+chunk never spills a few seconds into an extra, mostly-padding window.
+"""
+
+import math
+from typing import List, Tuple
+
+import numpy as np
+
+from audio_stream import audio_info, iter_audio_blocks
+from ffmpeg_stream import StreamInfo
+
+WHISPER_WINDOW_SECONDS = 30
+
+
+def compute_frame_rms(file_path: str, frame_duration: float = 0.02,
+                      frames_per_block: int = 4096) -> Tuple[np.ndarray, int]:
+    """
+    Stream a file once and compute the RMS energy of each frame
+
+    Args:
+        file_path (str): Path to the audio file
+        frame_duration (float): Length of one energy frame in seconds
+        frames_per_block (int): Energy frames computed per disk read
+
+    Returns:
+        tuple: (rms, frame_size) where rms is a float32 array with one value
+            per frame and frame_size is the frame length in samples
+    """
+    file_info = audio_info(file_path)
+    frame_size = max(1, int(round(frame_duration * file_info.samplerate)))
+    # ffprobe durations are estimates, so leave room for a few extra frames
+    rms = np.empty(math.ceil(file_info.frames / frame_size) + 64, dtype=np.float32)
+    filled = 0
+    for mono in iter_audio_blocks(file_path, frame_size * frames_per_block):
+        n_full = len(mono) // frame_size
+        if filled + n_full + 1 > len(rms):
+            rms = np.concatenate((rms, np.empty(max(len(rms), n_full + 1), dtype=np.float32)))
+        if n_full:
+            frames = mono[:n_full * frame_size].reshape(n_full, frame_size)
+            rms[filled:filled + n_full] = np.sqrt(np.mean(frames * frames, axis=1))
+            filled += n_full
+        if len(mono) % frame_size:
+            # Only the last block of the file can end in a partial frame
+            tail = mono[n_full * frame_size:]
+            rms[filled] = np.sqrt(np.mean(tail * tail))
+            filled += 1
+    return rms[:filled], frame_size
+
+
+def plan_chunks(file_path: str, chunk_duration: float = 600, search_duration: float = 10,
+                frame_duration: float = 0.02, smoothing_duration: float = 0.3) -> List[Tuple[int, int]]:
+    """
+    Plan chunk boundaries at low-energy gaps, packed into whole 30-second windows
+
+    Args:
+        file_path (str): Path to the audio file
+        chunk_duration (float): Target chunk duration in seconds, rounded to a
+            whole number of 30-second windows
+        search_duration (float): How far before the target length to look for a gap
+        frame_duration (float): Length of one energy frame in seconds
+        smoothing_duration (float): Moving-average length so boundaries land in
+            a pause rather than on a single quiet frame
+
+    Returns:
+        list: (start_sample, end_sample) ranges at the file's native sample
+            rate, covering the whole file in order
+    """
+    file_info = audio_info(file_path)
+    sample_rate = file_info.samplerate
+    rms, frame_size = compute_frame_rms(file_path, frame_duration)
+    # An ffprobe length is an estimate; the RMS pass has seen the whole stream, so use that instead
+    total_samples = len(rms) * frame_size if isinstance(file_info, StreamInfo) else file_info.frames
+
+    windows_per_chunk = max(1, round(chunk_duration / WHISPER_WINDOW_SECONDS))
+    target_samples = windows_per_chunk * WHISPER_WINDOW_SECONDS * sample_rate
+    search_frames = max(1, int(search_duration * sample_rate / frame_size))
+
+    smoothing_frames = max(1, int(smoothing_duration / frame_duration))
+    energy = np.convolve(rms, np.ones(smoothing_frames, dtype=np.float32) / smoothing_frames, mode="same")
+
+    plan = []
+    start = 0
+    while total_samples - start > target_samples:
+        # Search [target - search, target) and cut at the quietest frame
+        last_frame = (start + target_samples) // frame_size
+        first_frame = max(start // frame_size + 1, last_frame - search_frames)
+        gap = first_frame + int(np.argmin(energy[first_frame:last_frame]))
+        end = gap * frame_size
+        plan.append((start, end))
+        start = end
+    plan.append((start, total_samples))
+    return plan
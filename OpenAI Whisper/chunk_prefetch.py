@@ -0,0 +1,153 @@
+"""
+Background prefetch of the next chunk while the current one is transcribed
+
+Reading a chunk (decoding, mixing to mono, resampling) and computing its
+log-mel spectrogram only need the CPU for a moment compared with inference,
+but done inline they add up: chunk N+1 isn't read until chunk N is
+transcribed. prefetch() moves that work to a background thread that stays
+up to `depth` prepared chunks ahead, so the model rarely waits for input.
+
+The queue is bounded, so at most `depth` prepared chunks plus the one being
+prepared and the one being transcribed are in memory at once. With the
+default depth of 1 that is classic double buffering.
+
+StageTimer records where the time went. Time spent reading and preparing in
+the background, minus the time the consumer actually waited for a chunk, is
+the latency the overlap hid. While a profiler is active (stt_profiler.py)
+every timed stage is also recorded there as an event.
+"""
+
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+
+from stt_profiler import record_stage
+
+# Prepared chunks kept ready ahead of the one being transcribed
+DEFAULT_PREFETCH_DEPTH = 1
+
+_DONE = object()
+_ERROR = object()
+
+
+class StageTimer:
+    def __init__(self):
+        """Seconds spent per pipeline stage, safe to update from several threads"""
+        self.seconds: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self.seconds[stage] = self.seconds.get(stage, 0.0) + seconds
+
+    @contextmanager
+    def stage(self, stage: str):
+        """Time the enclosed block as `stage`"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            self.add(stage, seconds)
+            record_stage(stage, start, seconds)
+
+    def hidden_seconds(self) -> float:
+        """Reading and preparation time that overlapped with inference"""
+        with self._lock:
+            background = self.seconds.get("read", 0.0) + self.seconds.get("mel", 0.0)
+            return max(background - self.seconds.get("wait", 0.0), 0.0)
+
+    def summary(self) -> str:
+        """One-line report, e.g. for the end of a run"""
+        with self._lock:
+            stages = ", ".join(f"{stage} {seconds:.1f} s" for stage, seconds in self.seconds.items())
+        return f"Pipeline: {stages}; {self.hidden_seconds():.1f} s of input preparation hidden behind inference"
+
+
+def prefetch(items: Iterable[Any], prepare: Optional[Callable[[Any], Any]] = None,
+             depth: int = DEFAULT_PREFETCH_DEPTH, timer: Optional[StageTimer] = None) -> Iterator[Any]:
+    """
+    Iterate `items` in a background thread, staying up to `depth` items ahead
+
+    Args:
+        items (iterable): Source of chunks, e.g. iter_audio_chunks(...); its
+            iteration time is recorded as the "read" stage
+        prepare (callable): Optional per-item step run in the background
+            thread too, e.g. the log-mel spectrogram; recorded as "mel"
+        depth (int): Prepared items kept in the queue; 0 runs everything inline
+        timer (StageTimer): Receives the "read", "mel" and "wait" timings
+
+    Yields:
+        Items in order, after `prepare` if given. An exception raised while
+        reading or preparing is raised here, at the item where it happened.
+    """
+    timer = timer if timer is not None else StageTimer()
+    if depth <= 0:
+        # Inline: the consumer waits for every read, so nothing is hidden
+        inline = _timed(items, prepare, timer)
+        try:
+            while True:
+                with timer.stage("wait"):
+                    item = next(inline, _DONE)
+                if item is _DONE:
+                    return
+                yield item
+        finally:
+            inline.close()
+
+    slots: "queue.Queue" = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+
+    def put(entry) -> None:
+        while not stop.is_set():
+            try:
+                slots.put(entry, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def produce() -> None:
+        try:
+            for item in _timed(items, prepare, timer):
+                put((None, item))
+                if stop.is_set():
+                    return
+            put((_DONE, None))
+        except BaseException as e:
+            put((_ERROR, e))
+
+    thread = threading.Thread(target=produce, name="chunk-prefetch", daemon=True)
+    thread.start()
+    try:
+        while True:
+            with timer.stage("wait"):
+                kind, value = slots.get()
+            if kind is _DONE:
+                return
+            if kind is _ERROR:
+                raise value
+            yield value
+    finally:
+        # The consumer stopped early or finished: let the producer exit after its current item
+        stop.set()
+        thread.join()
+
+
+def _timed(items: Iterable[Any], prepare: Optional[Callable[[Any], Any]], timer: StageTimer) -> Iterator[Any]:
+    iterator = iter(items)
+    try:
+        while True:
+            with timer.stage("read"):
+                item = next(iterator, _DONE)
+            if item is _DONE:
+                return
+            if prepare is not None:
+                with timer.stage("mel"):
+                    item = prepare(item)
+            yield item
+    finally:
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            close()
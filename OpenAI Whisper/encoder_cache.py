@@ -0,0 +1,226 @@
+"""
+Cache of Whisper encoder outputs per 30-second window
+
+Transcribing and then translating the same audio, or decoding it again with
+another language or prompt, runs the encoder over exactly the same mel
+windows each time. The encoder output for a window depends only on the
+window and the model, so it is cached under the SHA-256 of the window's mel
+values. Later decodes pass the cached (n_audio_ctx, n_audio_state) features
+straight to whisper's decoder, which skips the encoder for inputs of that
+shape.
+
+Entries are kept in memory up to a size budget (least recently used first
+out). Optionally they are also written to the cache directory as one .npy
+file per window, in a directory per model, so later runs and other
+processes skip the encoder too. On-disk entries are written atomically and
+trimmed to their own size budget like the other caches.
+
+Windows are hashed by value, so a hit needs the same 30 seconds of audio
+at the same offset. The batched engine always cuts fixed 30-second windows
+and hits on every window. model.transcribe moves its window by the decoded
+timestamps, so a second pass with another task only hits where the windows
+line up.
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import torch
+import whisper
+from whisper.decoding import DecodingOptions, decode, detect_language
+
+from model_registry import model_identity
+from transcription_cache import DEFAULT_CACHE_DIR, evict_lru
+
+# In-memory budget per model in MB (override with WHISPER_STT_ENCODER_MB); a base window is 3 MB
+DEFAULT_MEMORY_MB = float(os.environ.get("WHISPER_STT_ENCODER_MB", 256))
+
+# Set WHISPER_STT_ENCODER_DISK=1 to also keep encoder outputs on disk
+DEFAULT_PERSIST = os.environ.get("WHISPER_STT_ENCODER_DISK", "") not in ("", "0")
+
+# On-disk budget for encoder outputs in MB (override with WHISPER_STT_ENCODER_DISK_MB)
+DEFAULT_MAX_DISK_MB = float(os.environ.get("WHISPER_STT_ENCODER_DISK_MB", 2048))
+
+
+def encoder_dir(cache_dir: Optional[str] = None) -> str:
+    """Directory holding the on-disk encoder outputs"""
+    return os.path.join(cache_dir or DEFAULT_CACHE_DIR, "encoder")
+
+
+def window_key(mel_window: torch.Tensor) -> str:
+    """SHA-256 of one (n_mels, n_frames) mel window's values and dtype"""
+    values = mel_window.detach().cpu().contiguous().numpy()
+    digest = hashlib.sha256(str(values.dtype).encode("utf-8"))
+    digest.update(memoryview(values).cast("B"))
+    return digest.hexdigest()
+
+
+class EncoderCache:
+    def __init__(self, model_name: str, memory_mb: Optional[float] = None, persist: Optional[bool] = None,
+                 cache_dir: Optional[str] = None, max_disk_mb: Optional[float] = None):
+        """
+        Encoder outputs of one model, keyed by mel window
+
+        Args:
+            model_name (str): Model identity (see model_registry.model_identity);
+                names the on-disk directory
+            memory_mb (float): In-memory budget in MB
+            persist (bool): Also read and write entries on disk (default: $WHISPER_STT_ENCODER_DISK)
+            cache_dir (str): Base cache directory (default: ~/.cache/whisper_stt)
+            max_disk_mb (float): On-disk budget in MB, shared by all models
+        """
+        self.model_name = model_name
+        self.memory_mb = DEFAULT_MEMORY_MB if memory_mb is None else memory_mb
+        self.max_disk_mb = DEFAULT_MAX_DISK_MB if max_disk_mb is None else max_disk_mb
+        self.directory = None
+        if DEFAULT_PERSIST if persist is None else persist:
+            name_key = hashlib.sha256(model_name.encode("utf-8")).hexdigest()[:16]
+            name = os.path.basename(model_name).replace(":", "-")
+            self.directory = os.path.join(encoder_dir(cache_dir), f"{name}-{name_key}")
+            os.makedirs(self.directory, exist_ok=True)
+        self._entries: "OrderedDict[str, torch.Tensor]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.npy")
+
+    def get(self, key: str, device: Any = None) -> Optional[torch.Tensor]:
+        """Return a window's encoder output, or None on a miss"""
+        with self._lock:
+            features = self._entries.get(key)
+            if features is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return features
+        if self.directory is not None:
+            path = self._path(key)
+            try:
+                features = torch.from_numpy(np.load(path)).to(device)
+                os.utime(path)
+            except (FileNotFoundError, ValueError, OSError):
+                features = None
+            if features is not None:
+                self._remember(key, features)
+                with self._lock:
+                    self.hits += 1
+                return features
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, features: torch.Tensor) -> None:
+        """Store a window's encoder output, on disk too if persistent"""
+        features = features.detach().clone()
+        self._remember(key, features)
+        if self.directory is None:
+            return
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, features.cpu().numpy())
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        evict_lru(self.directory, self.max_disk_mb, ".npy")
+
+    def _remember(self, key: str, features: torch.Tensor) -> None:
+        size = features.numel() * features.element_size()
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = features
+            self._bytes += size
+            while self._bytes > self.memory_mb * 1024 * 1024 and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.numel() * evicted.element_size()
+
+    def embed(self, model: Any, mel: torch.Tensor) -> torch.Tensor:
+        """
+        Encoder output for mel windows, running the encoder only on uncached ones
+
+        Args:
+            model: Whisper model the cache belongs to
+            mel (torch.Tensor): (n_mels, n_frames) or (batch, n_mels, n_frames) windows
+
+        Returns:
+            torch.Tensor: (n_audio_ctx, n_audio_state) or (batch, n_audio_ctx, n_audio_state)
+        """
+        single = mel.ndim == 2
+        mels = mel[None] if single else mel
+        keys = [window_key(window) for window in mels]
+        features: List[Optional[torch.Tensor]] = [self.get(key, mels.device) for key in keys]
+        missing = [i for i, window_features in enumerate(features) if window_features is None]
+        if missing:
+            # One encoder pass over all the uncached windows
+            with torch.no_grad():
+                encoded = model.embed_audio(mels[missing])
+            for i, window_features in zip(missing, encoded):
+                features[i] = window_features
+                self.put(keys[i], window_features)
+        stacked = torch.stack([window_features.to(mels.device) for window_features in features])
+        return stacked[0] if single else stacked
+
+    def clear(self) -> None:
+        """Drop the in-memory entries (on-disk ones stay)"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+class CachedEncoderModel:
+    def __init__(self, model: Any, cache: EncoderCache):
+        """
+        A Whisper model whose encoder outputs go through an EncoderCache
+
+        decode() and detect_language() look up each mel window first, so
+        model.transcribe and whisper.decode on it skip the encoder for
+        windows seen before. Every other attribute is the wrapped model's.
+        """
+        self._model = model
+        self.cache = cache
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._model, name)
+
+    def __call__(self, *args, **kwargs):
+        return self._model(*args, **kwargs)
+
+    def _features(self, mel: torch.Tensor) -> torch.Tensor:
+        if mel.shape[-2:] == (self._model.dims.n_audio_ctx, self._model.dims.n_audio_state):
+            return mel
+        return self.cache.embed(self._model, mel)
+
+    def embed_audio(self, mel: torch.Tensor) -> torch.Tensor:
+        return self.cache.embed(self._model, mel)
+
+    def decode(self, mel: torch.Tensor, options: DecodingOptions = DecodingOptions(), **kwargs):
+        return decode(self._model, self._features(mel), options, **kwargs)
+
+    def detect_language(self, mel: torch.Tensor, tokenizer: Any = None):
+        return detect_language(self._model, self._features(mel), tokenizer)
+
+    def transcribe(self, audio: Any, **transcribe_options) -> Dict:
+        return whisper.transcribe(self, audio, **transcribe_options)
+
+
+_caches: Dict[str, EncoderCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_encoder_cache(model_size: str) -> EncoderCache:
+    """Return the process-wide encoder cache for a model size (and the default dtype)"""
+    name = model_identity(model_size)
+    with _caches_lock:
+        if name not in _caches:
+            _caches[name] = EncoderCache(name)
+        return _caches[name]
@@ -57,5 +57,25 @@ def main():
     
     print(f"\nDetailed transcription: {result_detailed['text']}")
 
+    # Example 3: Transcribe and translate the same audio, encoding it only once
+    print("\n\nTranscribe + Translate with Shared Encoder Outputs:")
+    print("-" * 50)
+
+    from batched_stt import transcribe_batched
+    from encoder_cache import EncoderCache
+
+    # The batched engine cuts fixed 30-second windows, so the second pass
+    # finds every window's encoder output in the cache
+    audio = whisper.load_audio(audio_file)
+    encoder_cache = EncoderCache("base")
+    language = result["language"]
+    transcript = transcribe_batched(model, audio, language=language, encoder_cache=encoder_cache)
+    translation = transcribe_batched(model, audio, language=language, task="translate",
+                                     encoder_cache=encoder_cache)
+
+    print(f"Transcript: {transcript['text']}")
+    print(f"Translation: {translation['text']}")
+    print(f"Encoder windows computed: {encoder_cache.misses}, reused: {encoder_cache.hits}")
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
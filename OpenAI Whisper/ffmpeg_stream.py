@@ -0,0 +1,221 @@
+"""
+Streaming ffmpeg decoder for compressed and container formats
+
+libsndfile reads WAV, FLAC and OGG directly, but mp3 (on older versions),
+m4a/AAC and video containers such as mov or mp4 need ffmpeg. whisper.load_audio
+also uses ffmpeg, but it reads the whole decode into memory, which is what
+the chunked pipeline is meant to avoid. Here ffmpeg runs as a subprocess that
+writes raw 16 kHz float32 mono samples to stdout, and the pipe is read in
+fixed-size blocks, so only the block being processed is held in memory.
+
+Positions in these streams count samples at the 16 kHz decode rate. The
+duration comes from ffprobe, so long compressed files can be planned and
+routed like any WAV file.
+"""
+
+import json
+import shutil
+import subprocess
+import tempfile
+from typing import Iterator, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+from whisper.audio import SAMPLE_RATE
+
+# Rate ffmpeg decodes to; also the unit of every sample position in these streams
+FFMPEG_SAMPLE_RATE = SAMPLE_RATE
+
+# Samples read from the pipe per block (~4 s at 16 kHz)
+DEFAULT_PIPE_FRAMES = 65536
+
+# Forward seeks shorter than this are read and discarded instead of restarting ffmpeg
+MAX_SKIP_SECONDS = 60
+
+
+class StreamInfo(NamedTuple):
+    """The subset of soundfile's info used by the pipeline, at the 16 kHz decode rate"""
+    samplerate: int
+    channels: int
+    frames: int
+    duration: float
+    format: str
+
+
+def ffmpeg_available() -> bool:
+    """True if both ffmpeg and ffprobe are on PATH"""
+    return shutil.which("ffmpeg") is not None and shutil.which("ffprobe") is not None
+
+
+def _require(tool: str) -> str:
+    path = shutil.which(tool)
+    if path is None:
+        raise RuntimeError(f"{tool} is required to read this file format but was not found on PATH")
+    return path
+
+
+def probe_audio(file_path: str) -> StreamInfo:
+    """
+    Read duration and channel count with ffprobe, without decoding the file
+
+    Returns:
+        StreamInfo: Info with samplerate=16000 and frames counted at that
+            rate, since that is the rate the decoder produces
+    """
+    command = [_require("ffprobe"), "-v", "error", "-select_streams", "a:0",
+               "-show_entries", "stream=channels,duration:format=duration,format_name",
+               "-of", "json", file_path]
+    completed = subprocess.run(command, capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f"ffprobe failed on {file_path}: {completed.stderr.strip()}")
+    probe = json.loads(completed.stdout or "{}")
+    streams = probe.get("streams") or []
+    if not streams:
+        raise RuntimeError(f"No audio stream in {file_path}")
+
+    # The stream duration is missing for some containers; fall back to the format's
+    duration = streams[0].get("duration") or probe.get("format", {}).get("duration") or 0
+    duration = float(duration)
+    return StreamInfo(samplerate=FFMPEG_SAMPLE_RATE, channels=int(streams[0].get("channels", 1)),
+                      frames=int(round(duration * FFMPEG_SAMPLE_RATE)), duration=duration,
+                      format=probe.get("format", {}).get("format_name", "ffmpeg"))
+
+
+class FFmpegStream:
+    def __init__(self, file_path: str, start_sample: int = 0, channel: Optional[int] = None):
+        """
+        Sequential 16 kHz float32 mono reader over an ffmpeg pipe
+
+        Args:
+            file_path (str): Path to any file ffmpeg can decode
+            start_sample (int): First sample to read, at 16 kHz
+            channel (int): Read only this channel (default: mix all channels)
+        """
+        self.file_path = file_path
+        self.channel = channel
+        self.position = 0
+        self._eof = False
+        self._process = None
+        self._stderr = None
+        self._start(start_sample)
+
+    def _start(self, start_sample: int) -> None:
+        self.close()
+        command = [_require("ffmpeg"), "-nostdin", "-v", "error"]
+        if start_sample > 0:
+            # Input seeking is sample accurate when transcoding
+            command += ["-ss", f"{start_sample / FFMPEG_SAMPLE_RATE:.6f}"]
+        command += ["-i", self.file_path, "-vn", "-f", "f32le"]
+        if self.channel is None:
+            command += ["-ac", "1"]
+        else:
+            command += ["-af", f"pan=mono|c0=c{self.channel}"]
+        command += ["-ar", str(FFMPEG_SAMPLE_RATE), "-threads", "0", "-"]
+        # stderr goes to a file so a chatty decoder can never block on a full pipe
+        self._stderr = tempfile.TemporaryFile()
+        self._process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=self._stderr)
+        self.position = start_sample
+        self._eof = False
+
+    def read(self, frames: int) -> np.ndarray:
+        """Read up to `frames` samples; fewer only at the end of the stream"""
+        buffer = np.empty(max(frames, 0) if not self._eof else 0, dtype=np.float32)
+        view = memoryview(buffer).cast("B")
+        filled = 0
+        while filled < len(view):
+            n = self._process.stdout.readinto(view[filled:])
+            if not n:
+                break
+            filled += n
+        if filled < len(view):
+            self._eof = True
+            self._check_exit()
+        self.position += filled // 4
+        return buffer[:filled // 4]
+
+    def blocks(self, block_frames: int = DEFAULT_PIPE_FRAMES,
+               frames: Optional[int] = None) -> Iterator[np.ndarray]:
+        """Yield full blocks of `block_frames` samples (the last may be short) until `frames` or the end"""
+        remaining = frames
+        while remaining is None or remaining > 0:
+            block = self.read(block_frames if remaining is None else min(block_frames, remaining))
+            if len(block) == 0:
+                return
+            if remaining is not None:
+                remaining -= len(block)
+            yield block
+
+    def seek(self, sample: int) -> None:
+        """Move to a sample; short forward seeks read through, others restart ffmpeg"""
+        skip = sample - self.position
+        if 0 <= skip <= MAX_SKIP_SECONDS * FFMPEG_SAMPLE_RATE:
+            for _ in self.blocks(frames=skip):
+                pass
+        else:
+            self._start(sample)
+
+    def _check_exit(self) -> None:
+        self._process.stdout.close()
+        if self._process.wait() != 0:
+            self._stderr.seek(0)
+            message = self._stderr.read().decode(errors="replace").strip()
+            raise RuntimeError(f"Failed to decode {self.file_path} with ffmpeg: {message}")
+
+    def close(self) -> None:
+        if self._process is not None:
+            if self._process.poll() is None:
+                self._process.kill()
+            self._process.stdout.close()
+            self._process.wait()
+            self._process = None
+        if self._stderr is not None:
+            self._stderr.close()
+            self._stderr = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def iter_ffmpeg_chunks(file_path: str, chunk_duration: float = 600,
+                       block_frames: int = DEFAULT_PIPE_FRAMES,
+                       ranges: Optional[Sequence[Tuple[int, int]]] = None,
+                       channel: Optional[int] = None,
+                       reuse_buffer: bool = False) -> Iterator[Tuple[int, int, np.ndarray]]:
+    """
+    Stream a file through ffmpeg as 16 kHz float32 mono chunks
+
+    Same interface as audio_stream.iter_audio_chunks, with sample positions at 16 kHz.
+
+    Yields:
+        tuple: (start_sample, end_sample, chunk); end_sample is clipped to
+            the actual end of the stream
+    """
+    from audio_stream import ChunkBuffer  # audio_stream imports this module
+
+    buffer = ChunkBuffer(reuse_buffer)
+    with FFmpegStream(file_path, ranges[0][0] if ranges else 0, channel) as stream:
+        if ranges is None:
+            chunk_size = int(chunk_duration * FFMPEG_SAMPLE_RATE)
+            while True:
+                start_sample = stream.position
+                chunk = _read_chunk(stream, chunk_size, block_frames, buffer.get(chunk_size))
+                if len(chunk) == 0:
+                    return
+                yield start_sample, start_sample + len(chunk), chunk
+        for start_sample, end_sample in ranges:
+            stream.seek(start_sample)
+            frames = max(end_sample - start_sample, 0)
+            chunk = _read_chunk(stream, frames, block_frames, buffer.get(frames))
+            yield start_sample, start_sample + len(chunk), chunk
+
+
+def _read_chunk(stream: FFmpegStream, frames: int, block_frames: int, out: np.ndarray) -> np.ndarray:
+    """Fill one chunk buffer block by block from the pipe"""
+    chunk = out[:frames]
+    filled = 0
+    for block in stream.blocks(block_frames, frames):
+        chunk[filled:filled + len(block)] = block
+        filled += len(block)
+    return chunk[:filled]
@@ -4,7 +4,7 @@ import numpy as np
 from scipy.io.wavfile import write
 import os
 
-def reduce_noise_file(input_file, output_file=None, noise_sample_duration=0.5):
+def reduce_noise_file(input_file, output_file=None, noise_sample_duration=0.5, shared_decode=False):
     """
     Reduce noise in an audio file using the noisereduce library
     
@@ -12,6 +12,8 @@ def reduce_noise_file(input_file, output_file=None, noise_sample_duration=0.5):
         input_file (str): Path to the input audio file
         output_file (str): Path to the output denoised file (optional)
         noise_sample_duration (float): Duration of noise sample to use for noise profiling (seconds)
+        shared_decode (bool): Read the cached 16 kHz mono decode that transcription
+            also uses (see pcm_cache.py) and write a 16 kHz WAV (default: False)
     
     Returns:
         str: Path to the denoised audio file
@@ -22,7 +24,12 @@ def reduce_noise_file(input_file, output_file=None, noise_sample_duration=0.5):
     
     # Load audio file
     print(f"Loading audio file: {input_file}")
-    audio_data, sample_rate = sf.read(input_file)
+    if shared_decode:
+        from pcm_cache import open_pcm
+        from whisper.audio import SAMPLE_RATE
+        audio_data, sample_rate = open_pcm(input_file), SAMPLE_RATE
+    else:
+        audio_data, sample_rate = sf.read(input_file)
     
     # Convert to mono if stereo
     if len(audio_data.shape) > 1:
@@ -45,11 +52,11 @@ def reduce_noise_file(input_file, output_file=None, noise_sample_duration=0.5):
     # Generate output file name if not provided
     if output_file is None:
         name, ext = os.path.splitext(input_file)
-        output_file = f"{name}_denoised{ext}"
+        output_file = f"{name}_denoised{'.wav' if shared_decode else ext}"
     
     # Save denoised audio
     print(f"Saving denoised audio to: {output_file}")
-    sf.write(output_file, reduced_noise, sample_rate)
+    sf.write(output_file, reduced_noise, sample_rate, subtype="FLOAT" if shared_decode else None)
     
     print("Noise reduction completed successfully!")
     return output_file
@@ -0,0 +1,122 @@
+"""
+File-level language detection
+
+Whisper detects the language from each 30-second window it is given, so a
+chunked file pays for one detection per chunk and can switch languages
+between chunks. This module detects the language once per file instead:
+the energy VAD picks the 30-second windows with the most speech, Whisper
+scores them in one batched pass, and the averaged probabilities decide. The
+result is cached by file hash and model, so reruns skip detection entirely.
+"""
+
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import torch
+from whisper.audio import SAMPLE_RATE, log_mel_spectrogram, pad_or_trim
+
+from audio_stream import audio_info, read_audio_range
+from chunk_planner import WHISPER_WINDOW_SECONDS
+from speech_regions import detect_speech_regions
+from transcription_cache import file_sha256, get_cache
+
+# Speech windows scored per file
+DEFAULT_SAMPLE_WINDOWS = 3
+
+
+def speech_windows(file_path: str, count: int = DEFAULT_SAMPLE_WINDOWS) -> List[int]:
+    """
+    Pick the non-overlapping 30-second windows that contain the most speech
+
+    Args:
+        file_path (str): Path to the audio file
+        count (int): Maximum number of windows
+
+    Returns:
+        list: Window start samples at the file's native rate, in file order
+    """
+    sample_rate = audio_info(file_path).samplerate
+    window = WHISPER_WINDOW_SECONDS * sample_rate
+    regions = detect_speech_regions(file_path)
+    if not regions:
+        return [0]
+
+    starts = np.array([start for start, _ in regions], dtype=np.int64)
+    ends = np.array([end for _, end in regions], dtype=np.int64)
+    covered = np.concatenate(([0], np.cumsum(ends - starts)))
+
+    def speech_before(t):
+        # Speech samples before each time t
+        k = np.searchsorted(starts, t, side="right")
+        last = np.maximum(k - 1, 0)
+        partial = np.where(k > 0, ends[last] - np.minimum(t, ends[last]), 0)
+        return covered[k] - partial
+
+    # Candidate windows start where speech starts
+    speech = speech_before(starts + window) - speech_before(starts)
+    chosen: List[int] = []
+    for index in np.argsort(-speech, kind="stable"):
+        start = int(starts[index])
+        if all(abs(start - other) >= window for other in chosen):
+            chosen.append(start)
+        if len(chosen) == count:
+            break
+    return sorted(chosen)
+
+
+def detect_file_language(model: Any, file_path: str, model_size: str, use_cache: bool = True,
+                         sample_windows: int = DEFAULT_SAMPLE_WINDOWS) -> str:
+    """
+    Detect a file's language once from its most speech-dense windows
+
+    Args:
+        model: Whisper model
+        file_path (str): Path to the audio file
+        model_size (str): Model size, part of the cache key
+        use_cache (bool): Reuse and store the result in the transcription cache
+        sample_windows (int): Number of 30-second speech windows to score
+
+    Returns:
+        str: Language code
+    """
+    if not model.is_multilingual:
+        return "en"
+
+    cache_key = None
+    if use_cache:
+        cache_key = get_cache().make_key(file_sha256(file_path), model_size, task="detect_language",
+                                         options={"sample_windows": sample_windows})
+        cached = get_cache().get(cache_key)
+        if cached is not None:
+            return cached["language"]
+
+    sample_rate = audio_info(file_path).samplerate
+    starts = speech_windows(file_path, sample_windows)
+    mels = torch.stack([
+        log_mel_spectrogram(pad_or_trim(read_audio_range(file_path, start, start + WHISPER_WINDOW_SECONDS * sample_rate,
+                                                         sample_rate=SAMPLE_RATE)), model.dims.n_mels)
+        for start in starts])
+    with torch.no_grad():
+        _, probs = model.detect_language(mels.to(model.device).to(next(model.parameters()).dtype))
+
+    # Average the windows' language probabilities
+    totals: Dict[str, float] = {}
+    for window_probs in probs:
+        for code, probability in window_probs.items():
+            totals[code] = totals.get(code, 0.0) + probability / len(probs)
+    language = max(totals, key=totals.get)
+    print(f"Detected language: {language} ({100 * totals[language]:.0f}% over {len(starts)} speech windows)")
+
+    if cache_key is not None:
+        top = sorted(totals.items(), key=lambda item: -item[1])[:5]
+        get_cache().put(cache_key, dict(language=language, probabilities=dict(top),
+                                        sample_starts=[start / sample_rate for start in starts]))
+    return language
+
+
+def resolve_language(model: Any, file_path: str, model_size: str, language: Optional[str] = None,
+                     use_cache: bool = True) -> str:
+    """Return the per-file override if given, otherwise the detected language"""
+    if language is not None:
+        return language
+    return detect_file_language(model, file_path, model_size, use_cache)
@@ -0,0 +1,422 @@
+"""
+Memory-budget planning and admission control for transcription jobs
+
+Peak memory of a job is estimated from the model's dimensions, the chunk
+length and how the chunks are processed:
+
+- Per process: the Python/torch runtime and the model weights (shared
+  between workers when the weights are memory-mapped). whisper.load_model
+  briefly holds a second copy while it copies the checkpoint in; the
+  larger of that and the transcription peak counts.
+- Per chunk: its 16 kHz float32 audio, and the log-mel spectrogram, which
+  briefly needs about 435 KB per audio-second while the STFT is computed.
+  Prefetched chunks (see chunk_prefetch.py) count too.
+- Per inference pass: encoder activations for the windows in the batch and
+  the decoder's cross-attention keys and values, five candidates per window
+  when model.transcribe falls back to sampling with best_of=5.
+- The batched engine's in-memory encoder cache, at its size budget, when
+  the job uses one.
+- In multichannel mode, every channel's audio and mel per chunk, and each
+  batch holds the same windows of every channel.
+
+The source sample rate and channel count only matter for the block buffers
+of the one-time 16 kHz decode; every chunk is read from that mono copy.
+
+plan_job picks the largest chunk length (in whole 30-second windows) and
+the most workers that keep the estimate under the budget, and decides
+whether a file is short enough to transcribe in one piece. The budget is
+WHISPER_STT_MEMORY_MB, or 80% of physical memory if unset.
+
+MemoryBudget is admission control across every transcription process on
+the machine: jobs reserve their estimated peak in a shared ledger under the
+cache directory before they start, and a job that doesn't fit next to the
+running ones waits, first come first served. A job larger than the whole
+budget still runs, but only on its own.
+"""
+
+import itertools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional
+
+import torch
+from whisper.audio import HOP_LENGTH, SAMPLE_RATE
+from whisper.model import ModelDimensions
+
+from audio_stream import DEFAULT_BLOCK_FRAMES
+from chunk_planner import WHISPER_WINDOW_SECONDS
+from chunk_prefetch import DEFAULT_PREFETCH_DEPTH
+from encoder_cache import DEFAULT_MEMORY_MB as ENCODER_CACHE_MB
+from model_registry import default_dtype, split_model_name
+from transcription_cache import DEFAULT_CACHE_DIR, _FileLock
+
+# Memory budget for all transcription jobs on this machine in MB
+MEMORY_ENV = "WHISPER_STT_MEMORY_MB"
+
+# Share of physical memory used when no budget is set
+DEFAULT_MEMORY_FRACTION = 0.8
+
+# Private memory of a process with torch and whisper imported (measured: ~300 MB anonymous)
+PROCESS_OVERHEAD_MB = 300
+
+# Transient memory per audio-second while log_mel_spectrogram runs: padded
+# copy, complex STFT, magnitudes and mel (measured: 280 MB for 10 minutes)
+MEL_BYTES_PER_SECOND = 435 * 1024
+
+# Encoder activations relative to its output, per window (measured on base)
+ENCODER_ACTIVATION_FACTOR = 16
+
+# Candidates decoded per window: model.transcribe samples best_of=5 when it
+# falls back to a higher temperature; the batched engine decodes one
+SEQUENTIAL_DECODE_GROUPS = 5
+
+# Chunk lengths tried, longest first, in whole 30-second windows
+CHUNK_DURATIONS = (600, 480, 360, 300, 240, 180, 120, 90, 60, 30)
+
+# Longest file transcribed in one piece; longer files are chunked so they can be journaled and resumed
+MAX_DIRECT_DURATION = 1800
+
+# Seconds between checks while a job waits for memory
+WAIT_POLL_SECONDS = 0.5
+
+# Official model dimensions, so planning doesn't load or download checkpoints
+_OFFICIAL_DIMS = {
+    "tiny": (80, 384, 6, 4, 4),
+    "base": (80, 512, 8, 6, 6),
+    "small": (80, 768, 12, 12, 12),
+    "medium": (80, 1024, 16, 24, 24),
+    "large-v1": (80, 1280, 20, 32, 32),
+    "large-v2": (80, 1280, 20, 32, 32),
+    "large-v3": (128, 1280, 20, 32, 32),
+    "large": (128, 1280, 20, 32, 32),
+    "large-v3-turbo": (128, 1280, 20, 32, 4),
+    "turbo": (128, 1280, 20, 32, 4),
+}
+
+_MB = 1024 * 1024
+
+
+class JobPlan(NamedTuple):
+    """How a job is run so that it fits the memory budget"""
+    chunked: bool
+    chunk_duration: float  # Seconds per chunk; the whole file if not chunked
+    workers: int
+    peak_mb: float  # Estimated peak memory of the job
+    budget_mb: float
+
+    @property
+    def fits(self) -> bool:
+        return self.peak_mb <= self.budget_mb
+
+    def describe(self) -> str:
+        """One-line summary for the console"""
+        if self.chunked:
+            how = f"{self.chunk_duration / 60:.1f}-minute chunks"
+            if self.workers > 1:
+                how += f", {self.workers} workers"
+        else:
+            how = "one piece"
+        budget = "unlimited" if self.budget_mb == float("inf") else f"{self.budget_mb:.0f} MB"
+        note = "" if self.fits else " (over budget even at the smallest chunk size; runs alone)"
+        return f"Memory plan: {how}, estimated peak {self.peak_mb:.0f} MB of {budget}{note}"
+
+
+def system_memory_mb() -> Optional[float]:
+    """Physical memory in MB, or None if it can't be determined"""
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") / _MB
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def memory_budget_mb() -> float:
+    """Memory budget in MB: WHISPER_STT_MEMORY_MB, else 80% of physical memory (unlimited if unknown)"""
+    value = os.environ.get(MEMORY_ENV)
+    if value:
+        return float(value)
+    total = system_memory_mb()
+    return float("inf") if total is None else DEFAULT_MEMORY_FRACTION * total
+
+
+def set_memory_budget(budget_mb: float) -> None:
+    """Set the memory budget for this process and the processes it starts"""
+    os.environ[MEMORY_ENV] = str(budget_mb)
+
+
+def model_dims(model_size: str) -> ModelDimensions:
+    """
+    Dimensions of a model by name or checkpoint path, without loading its weights
+
+    Unknown names get the large model's dimensions, so estimates err high.
+    """
+    model_size, _ = split_model_name(model_size)
+    if os.path.isfile(model_size):
+        try:
+            checkpoint = torch.load(model_size, map_location="cpu", mmap=True, weights_only=True)
+            return ModelDimensions(**checkpoint["dims"])
+        except Exception:
+            pass
+    name = model_size[:-len(".en")] if model_size.endswith(".en") else model_size
+    n_mels, n_state, n_head, n_audio_layer, n_text_layer = _OFFICIAL_DIMS.get(name, _OFFICIAL_DIMS["large"])
+    n_vocab = 51864 if model_size.endswith(".en") else 51865 + (n_mels == 128)
+    return ModelDimensions(n_mels=n_mels, n_audio_ctx=1500, n_audio_state=n_state, n_audio_head=n_head,
+                           n_audio_layer=n_audio_layer, n_vocab=n_vocab, n_text_ctx=448, n_text_state=n_state,
+                           n_text_head=n_head, n_text_layer=n_text_layer)
+
+
+def weights_mb(model_size: str, dtype: Optional[str] = None) -> float:
+    """Estimated resident weight size of a model in MB"""
+    dims = model_dims(model_size)
+    model_size, named_dtype = split_model_name(model_size)
+    audio, text = dims.n_audio_state, dims.n_text_state
+    # Attention is 4 d^2, the MLP 8 d^2; decoder blocks also have cross-attention
+    encoder = 3 * dims.n_mels * audio + 3 * audio * audio + 12 * audio * audio * dims.n_audio_layer
+    decoder = 16 * text * text * dims.n_text_layer
+    embeddings = (dims.n_vocab + dims.n_text_ctx) * text + dims.n_audio_ctx * audio
+    dtype = dtype or named_dtype or default_dtype()
+    if dtype == "int8":
+        # Linear layers are quantized; embeddings and convolutions stay fp32
+        return ((encoder + decoder) + 4 * embeddings) / _MB
+    return (encoder + decoder + embeddings) * (2 if dtype == "fp16" else 4) / _MB
+
+
+def estimate_job_mb(model_size: str, chunk_duration: float, batch_size: int = 1, workers: int = 1,
+                    prefetch_depth: int = DEFAULT_PREFETCH_DEPTH, channels: int = 1,
+                    dtype: Optional[str] = None, mapped_weights: Optional[bool] = None,
+                    streams: int = 1, batched: bool = False, encoder_cache: bool = False) -> float:
+    """
+    Estimate the peak memory of a transcription job in MB
+
+    Args:
+        model_size (str): Whisper model size or checkpoint path
+        chunk_duration (float): Seconds of audio per chunk (the whole file if unchunked)
+        batch_size (int): 30-second windows per batched pass; 1 uses model.transcribe
+        workers (int): Worker processes, each with its own model and chunk
+        prefetch_depth (int): Chunks prepared ahead in the background (0 for an unchunked file)
+        channels (int): Channels of the source file
+        dtype (str): Weight precision (default: the default dtype)
+        mapped_weights (bool): Whether the weights are memory-mapped, which
+            skips the load-time copy and shares them between workers
+            (default: whether memory-mapped weights are in use)
+        streams (int): Channels transcribed as separate streams (multichannel
+            mode, always batched); batch_size is per stream
+        batched (bool): Whether the batched engine runs even at batch_size 1
+            (pooled groups of short files)
+        encoder_cache (bool): Whether the batched engine fills an in-memory
+            encoder cache (see encoder_cache.py)
+
+    Returns:
+        float: Estimated peak resident memory in MB
+    """
+    dims = model_dims(model_size)
+    weights = weights_mb(model_size, dtype)
+    padded = chunk_duration + WHISPER_WINDOW_SECONDS
+    audio = chunk_duration * SAMPLE_RATE * 4 / _MB
+    mel = dims.n_mels * padded * SAMPLE_RATE / HOP_LENGTH * 4 / _MB
+    mel_transient = padded * MEL_BYTES_PER_SECOND / _MB
+    # The one-time decode holds a source block and its mono mix
+    decode_buffers = DEFAULT_BLOCK_FRAMES * (channels + 1) * 4 / _MB
+
+    def inference(windows: int, groups: int) -> float:
+        features = windows * dims.n_audio_ctx * dims.n_audio_state * 4 / _MB
+        cross_kv = windows * groups * 2 * dims.n_text_layer * dims.n_audio_ctx * dims.n_text_state * 4 / _MB
+        return features * ENCODER_ACTIVATION_FACTOR + cross_kv
+
+    if mapped_weights is None:
+        from mmap_weights import has_mmap_weights, mmap_enabled
+        model_size, named_dtype = split_model_name(model_size)
+        dtype = dtype or named_dtype or default_dtype()
+        mapped_weights = dtype != "int8" and (mmap_enabled() or has_mmap_weights(model_size))
+    load_copy = 0 if mapped_weights else weights
+
+    if workers > 1:
+        # Workers read their own chunk and run model.transcribe on it
+        running = audio + mel_transient + inference(1, SEQUENTIAL_DECODE_GROUPS)
+        per_worker = PROCESS_OVERHEAD_MB + max(load_copy, running)
+        return (PROCESS_OVERHEAD_MB + decode_buffers + workers * per_worker
+                + weights * (1 if mapped_weights else workers))
+
+    if batched or batch_size > 1 or streams > 1:
+        # Current and queued chunks as mel; the next one being read and turned into mel in the background
+        running = ((ENCODER_CACHE_MB if encoder_cache else 0) + streams * ((prefetch_depth + 1) * mel + audio)
+                   + mel_transient + inference(batch_size * streams, 1))
+    else:
+        # Current, queued and next chunk as audio; model.transcribe computes the mel of the current one
+        running = (prefetch_depth + 2) * audio + mel_transient + inference(1, SEQUENTIAL_DECODE_GROUPS)
+    return PROCESS_OVERHEAD_MB + weights + decode_buffers + max(load_copy, running)
+
+
+def plan_job(duration: float, model_size: str, budget_mb: Optional[float] = None, workers: int = 1,
+             batch_size: int = 1, prefetch_depth: int = DEFAULT_PREFETCH_DEPTH, channels: int = 1,
+             chunked: Optional[bool] = None, dtype: Optional[str] = None, streams: int = 1,
+             encoder_cache: bool = False) -> JobPlan:
+    """
+    Choose chunking, chunk length and worker count to fit the memory budget
+
+    Args:
+        duration (float): Length of the audio in seconds
+        model_size (str): Whisper model size or checkpoint path
+        budget_mb (float): Memory budget (default: memory_budget_mb())
+        workers (int): Most worker processes to use
+        batch_size (int): 30-second windows per batched pass for chunked files
+        prefetch_depth (int): Chunks prepared ahead in the background
+        channels (int): Channels of the source file
+        chunked (bool): Force chunked (True) or whole-file (False)
+            transcription; None decides from the duration and the budget
+        dtype (str): Weight precision (default: the default dtype)
+        streams (int): Channels transcribed as separate streams (multichannel mode)
+        encoder_cache (bool): Whether batched chunks fill an in-memory encoder cache
+
+    Returns:
+        JobPlan: The plan, with fits False if even 30-second chunks on one
+            worker exceed the budget
+    """
+    budget_mb = memory_budget_mb() if budget_mb is None else budget_mb
+    if chunked is not True:
+        peak_mb = estimate_job_mb(model_size, duration, prefetch_depth=0, channels=channels, dtype=dtype)
+        if chunked is False or (duration <= MAX_DIRECT_DURATION and peak_mb <= budget_mb):
+            return JobPlan(False, duration, 1, peak_mb, budget_mb)
+
+    # Batching applies to the single-process path, as in transcribe_audio_result
+    batch_size = batch_size if workers <= 1 else 1
+    for worker_count in range(max(workers, 1), 0, -1):
+        for chunk_duration in CHUNK_DURATIONS:
+            peak_mb = estimate_job_mb(model_size, chunk_duration, batch_size, worker_count, prefetch_depth,
+                                      channels, dtype, streams=streams, encoder_cache=encoder_cache)
+            if peak_mb <= budget_mb:
+                return JobPlan(True, chunk_duration, worker_count, peak_mb, budget_mb)
+    chunk_duration = CHUNK_DURATIONS[-1]
+    return JobPlan(True, chunk_duration, 1, estimate_job_mb(model_size, chunk_duration, batch_size, 1,
+                                                            prefetch_depth, channels, dtype, streams=streams,
+                                                            encoder_cache=encoder_cache),
+                   budget_mb)
+
+
+def _pid_alive(pid: int) -> bool:
+    if os.name == "nt":
+        return True  # os.kill would terminate the process; entries are removed when jobs finish
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class MemoryBudget:
+    def __init__(self, budget_mb: Optional[float] = None, cache_dir: Optional[str] = None,
+                 poll_seconds: float = WAIT_POLL_SECONDS):
+        """
+        Machine-wide admission control for transcription jobs
+
+        Reservations live in a JSON ledger under an inter-process lock, so
+        jobs in other processes (CLI runs, workers of the service) are
+        counted too. Entries of processes that died are dropped.
+
+        Args:
+            budget_mb (float): Memory budget (default: memory_budget_mb() at each reservation)
+            cache_dir (str): Base cache directory (default: ~/.cache/whisper_stt)
+            poll_seconds (float): Seconds between checks while waiting
+        """
+        self.budget_mb = budget_mb
+        self.directory = os.path.join(cache_dir or DEFAULT_CACHE_DIR, "memory")
+        self.ledger_path = os.path.join(self.directory, "jobs.json")
+        self.poll_seconds = poll_seconds
+        self._ids = itertools.count()
+        self._id_lock = threading.Lock()
+
+    def _load(self) -> List[Dict[str, Any]]:
+        try:
+            with open(self.ledger_path, "r", encoding="utf-8") as f:
+                jobs = json.load(f)
+        except (OSError, ValueError):
+            return []
+        return [job for job in jobs if _pid_alive(job["pid"])]
+
+    def _save(self, jobs: List[Dict[str, Any]]) -> None:
+        tmp_path = f"{self.ledger_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(jobs, f)
+        os.replace(tmp_path, self.ledger_path)
+
+    @contextmanager
+    def _ledger(self) -> Iterator[List[Dict[str, Any]]]:
+        """Locked read-modify-write of the ledger"""
+        os.makedirs(self.directory, exist_ok=True)
+        with _FileLock(os.path.join(self.directory, "jobs.lock")):
+            jobs = self._load()
+            yield jobs
+            self._save(jobs)
+
+    def acquire(self, mb: float, label: str = "") -> str:
+        """
+        Reserve memory for a job, waiting until it fits next to the running jobs
+
+        Returns:
+            str: Ticket to pass to release()
+        """
+        with self._id_lock:
+            ticket = f"{os.getpid()}-{threading.get_ident()}-{next(self._ids)}"
+        with self._ledger() as jobs:
+            jobs.append(dict(ticket=ticket, pid=os.getpid(), mb=round(mb, 1), label=label,
+                             running=False, since=time.time()))
+        announced = False
+        try:
+            while True:
+                with self._ledger() as jobs:
+                    if self._admit(jobs, ticket, mb):
+                        return ticket
+                    running = [job for job in jobs if job["running"]]
+                if not announced:
+                    budget_mb = memory_budget_mb() if self.budget_mb is None else self.budget_mb
+                    print(f"Waiting for memory: {label or 'job'} needs {mb:.0f} MB; "
+                          f"{sum(job['mb'] for job in running):.0f} of {budget_mb:.0f} MB "
+                          f"reserved by {len(running)} running jobs")
+                    announced = True
+                time.sleep(self.poll_seconds)
+        except BaseException:
+            self.release(ticket)
+            raise
+
+    def _admit(self, jobs: List[Dict[str, Any]], ticket: str, mb: float) -> bool:
+        """Start the job if it is first in line and fits (or nothing else runs)"""
+        budget_mb = memory_budget_mb() if self.budget_mb is None else self.budget_mb
+        waiting = [job for job in jobs if not job["running"]]
+        if not waiting or waiting[0]["ticket"] != ticket:
+            return False
+        reserved = sum(job["mb"] for job in jobs if job["running"])
+        if reserved and reserved + mb > budget_mb:
+            return False
+        waiting[0]["running"] = True
+        return True
+
+    def release(self, ticket: str) -> None:
+        """Give back a reservation"""
+        with self._ledger() as jobs:
+            jobs[:] = [job for job in jobs if job["ticket"] != ticket]
+
+    @contextmanager
+    def reserve(self, mb: float, label: str = ""):
+        """Hold a reservation for the duration of the block"""
+        ticket = self.acquire(mb, label)
+        try:
+            yield
+        finally:
+            self.release(ticket)
+
+    def jobs(self) -> List[Dict[str, Any]]:
+        """Current reservations: running jobs first, then the queue in order"""
+        with self._ledger() as jobs:
+            return sorted((dict(job) for job in jobs), key=lambda job: not job["running"])
+
+
+_budget = MemoryBudget()
+
+
+def get_memory_budget() -> MemoryBudget:
+    """Return the process-wide admission control"""
+    return _budget
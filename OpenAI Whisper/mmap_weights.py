@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Pre-converted, memory-mapped Whisper weights for fast cold starts
+
+whisper.load_model unpickles the whole checkpoint with torch.load, builds
+the model with freshly initialized weights and then copies the checkpoint
+into it, on every process start. For short CLI runs that is most of the
+run time.
+
+Instead, each model is converted once into a flat file: a small JSON header
+(model dimensions plus the name, dtype, shape and offset of every tensor)
+followed by the raw tensor bytes, each aligned to 64 bytes. Loading maps the
+file with np.memmap in copy-on-write mode and wraps each tensor's slice
+with torch.from_numpy, so nothing is read or copied up front. The model
+skeleton is built with its parameters left uninitialized and the mapped
+tensors are assigned to it with load_state_dict(assign=True). Pages are read from the OS page cache
+when first used and are shared between processes loading the same model,
+e.g. parallel chunk workers. Copy-on-write means an in-place change to a
+weight never reaches the file.
+
+Usage:
+    python mmap_weights.py tiny base small     # convert once
+    WHISPER_STT_MMAP=1 python whisper_stt.py audio.mp3 base
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import struct
+import tempfile
+from dataclasses import asdict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import torch
+import whisper
+from torch.overrides import TorchFunctionMode
+from whisper.model import ModelDimensions, Whisper
+
+from transcription_cache import DEFAULT_CACHE_DIR
+
+FORMAT_MAGIC = b"WSTTMMAP"
+FORMAT_VERSION = 1
+
+# Tensor data alignment in bytes
+ALIGNMENT = 64
+
+# Set WHISPER_STT_MMAP=1 to convert models on first load; converted models are always used
+MMAP_ENV = "WHISPER_STT_MMAP"
+
+# Magic, then the format version and header length
+_PREAMBLE = struct.Struct("<8sIQ")
+
+
+def mmap_enabled() -> bool:
+    """True if models should be converted to memory-mapped weights on first load"""
+    return os.environ.get(MMAP_ENV, "") not in ("", "0")
+
+
+def mmap_dir(cache_dir: Optional[str] = None) -> str:
+    """Directory holding the converted weights"""
+    return os.path.join(cache_dir or DEFAULT_CACHE_DIR, "mmap")
+
+
+def checkpoint_id(model_size: str) -> str:
+    """Identify the checkpoint behind a model name or path"""
+    if os.path.isfile(model_size):
+        # Path, size and mtime: hashing a multi-GB checkpoint on every load would undo the fast start
+        stat = os.stat(model_size)
+        return f"{os.path.abspath(model_size)}|{stat.st_size}|{stat.st_mtime_ns}"
+    # Official checkpoint URLs contain the file's SHA-256
+    return whisper._MODELS.get(model_size, model_size)
+
+
+def mmap_path(model_size: str, cache_dir: Optional[str] = None) -> str:
+    """File holding a model's converted weights; the format version is part of the key"""
+    key = hashlib.sha256(f"{checkpoint_id(model_size)}|{FORMAT_VERSION}".encode("utf-8")).hexdigest()[:16]
+    name = os.path.splitext(os.path.basename(model_size))[0]
+    return os.path.join(mmap_dir(cache_dir), f"{name}-{key}.bin")
+
+
+# Random fills used by the layers' reset_parameters
+_INIT_OPS = (torch.Tensor.uniform_, torch.Tensor.normal_)
+
+
+class _SkipInit(TorchFunctionMode):
+    """Leave new parameters uninitialized; the mapped weights replace them right away"""
+
+    def __torch_function__(self, func, types, args=(), kwargs=None):
+        # Mode-local, so models built by other threads meanwhile are unaffected
+        if func in _INIT_OPS or getattr(func, "__module__", None) == "torch.nn.init":
+            return args[0] if args else kwargs["tensor"]
+        return func(*args, **(kwargs or {}))
+
+
+def _aligned(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def write_weights(model: Whisper, path: str) -> None:
+    """
+    Write a model's parameters and buffers to a flat weights file atomically
+
+    Non-persistent buffers (the decoder mask and alignment heads) are stored
+    too, the sparse alignment heads as a dense tensor.
+    """
+    state_dict = model.state_dict()
+    tensors: List[Tuple[Dict[str, Any], np.ndarray]] = []
+    offset = 0
+    for name, tensor in list(state_dict.items()) + [(name, buffer) for name, buffer in model.named_buffers()
+                                                    if name not in state_dict]:
+        sparse = tensor.is_sparse
+        array = (tensor.to_dense() if sparse else tensor).detach().cpu().contiguous().numpy()
+        entry = dict(name=name, dtype=str(array.dtype), shape=list(array.shape), offset=offset,
+                     persistent=name in state_dict, sparse=sparse)
+        tensors.append((entry, array))
+        offset = _aligned(offset + array.nbytes)
+
+    header = json.dumps(dict(dims=asdict(model.dims), tensors=[entry for entry, _ in tensors])).encode("utf-8")
+    data_start = _aligned(_PREAMBLE.size + len(header))
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_PREAMBLE.pack(FORMAT_MAGIC, FORMAT_VERSION, len(header)))
+            f.write(header)
+            for entry, array in tensors:
+                f.seek(data_start + entry["offset"])
+                f.write(memoryview(array).cast("B"))
+            f.truncate(data_start + offset)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def read_weights(path: str) -> Tuple[ModelDimensions, List[Tuple[Dict[str, Any], torch.Tensor]]]:
+    """
+    Map a weights file without reading it
+
+    Returns:
+        tuple: (ModelDimensions, [(tensor entry, tensor backed by the mapping)])
+    """
+    with open(path, "rb") as f:
+        magic, version, header_length = _PREAMBLE.unpack(f.read(_PREAMBLE.size))
+        if magic != FORMAT_MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} weights file")
+        header = json.loads(f.read(header_length))
+    data_start = _aligned(_PREAMBLE.size + header_length)
+
+    # Copy-on-write: tensors are writable, but changes never reach the file
+    data = np.memmap(path, dtype=np.uint8, mode="c")
+    tensors = []
+    for entry in header["tensors"]:
+        dtype = np.dtype(entry["dtype"])
+        start = data_start + entry["offset"]
+        count = int(np.prod(entry["shape"], dtype=np.int64))
+        array = data[start:start + count * dtype.itemsize].view(dtype).reshape(entry["shape"])
+        tensors.append((entry, torch.from_numpy(array)))
+    return ModelDimensions(**header["dims"]), tensors
+
+
+def load_weights(path: str) -> Whisper:
+    """Build a CPU Whisper model whose tensors are views of a memory-mapped weights file"""
+    dims, tensors = read_weights(path)
+    # Untouched torch.empty pages cost no memory, and skipping the random init
+    # is what makes this fast. (Building on the meta device would import
+    # torch's Python reference ops, which takes longer than the load itself.)
+    with _SkipInit():
+        model = Whisper(dims)
+    model.load_state_dict({entry["name"]: tensor for entry, tensor in tensors if entry["persistent"]},
+                          assign=True)
+    for entry, tensor in tensors:
+        if not entry["persistent"]:
+            module_name, _, buffer_name = entry["name"].rpartition(".")
+            model.get_submodule(module_name).register_buffer(
+                buffer_name, tensor.to_sparse() if entry["sparse"] else tensor, persistent=False)
+    return model.eval()
+
+
+def convert_model(model_size: str, cache_dir: Optional[str] = None) -> str:
+    """
+    Convert a model to a memory-mappable weights file (once)
+
+    Args:
+        model_size (str): Whisper model size or checkpoint path
+        cache_dir (str): Base cache directory (default: ~/.cache/whisper_stt)
+
+    Returns:
+        str: Path of the weights file
+    """
+    path = mmap_path(model_size, cache_dir)
+    if not os.path.exists(path):
+        print(f"Converting Whisper {model_size} to memory-mapped weights (once)...")
+        write_weights(whisper.load_model(model_size, device="cpu"), path)
+    return path
+
+
+def load_mmap_model(model_size: str, device: Optional[str] = None, cache_dir: Optional[str] = None) -> Whisper:
+    """
+    Load a Whisper model from memory-mapped weights, converting it on first use
+
+    Args:
+        model_size (str): Whisper model size or checkpoint path
+        device (str): Torch device; anything but the CPU gets a copy of the weights
+        cache_dir (str): Base cache directory (default: ~/.cache/whisper_stt)
+
+    Returns:
+        whisper.model.Whisper: The loaded model
+    """
+    path = mmap_path(model_size, cache_dir)
+    model = None
+    if os.path.exists(path):
+        try:
+            model = load_weights(path)
+        except Exception as e:
+            print(f"Converting again; unreadable weights file {path}: {e}")
+            os.remove(path)
+    if model is None:
+        model = load_weights(convert_model(model_size, cache_dir))
+    if device is not None and torch.device(device).type != "cpu":
+        model = model.to(device)
+    return model
+
+
+def has_mmap_weights(model_size: str, cache_dir: Optional[str] = None) -> bool:
+    """True if a model has already been converted"""
+    return os.path.exists(mmap_path(model_size, cache_dir))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert Whisper models to memory-mapped weights")
+    parser.add_argument("models", nargs="*", default=["base"],
+                        help="Model sizes or checkpoint paths (default: base)")
+    args = parser.parse_args()
+    for model_size in args.models:
+        print(convert_model(model_size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""
+Process-wide registry of loaded Whisper models
+
+Models are keyed by (size, device, dtype) and stay resident between calls so
+repeated transcriptions don't reload weights from disk. The registry keeps the
+total resident weight size under a memory budget by evicting the least
+recently used model.
+
+The "int8" dtype loads a CPU model with dynamically quantized Linear layers
+(see quantization.py). It is opt-in: set WHISPER_STT_DTYPE=int8, call
+set_default_dtype("int8") or pass --dtype int8 on the command line, and every
+get_model call without an explicit dtype uses it. The default dtype is part
+of the transcription cache key, so int8 and fp32 results are cached apart.
+A single model can also be named with its dtype, e.g. "base.en:int8", which
+takes precedence over the default.
+
+fp32 and fp16 models that were converted to memory-mapped weights (see
+mmap_weights.py) are loaded from the mapping instead of the checkpoint.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, List, Optional, Tuple
+
+import torch
+import whisper
+
+# Resident weight budget in MB (override with WHISPER_MODEL_BUDGET_MB)
+DEFAULT_MEMORY_BUDGET_MB = float(os.environ.get("WHISPER_MODEL_BUDGET_MB", 4096))
+
+SUPPORTED_DTYPES = ("fp32", "fp16", "int8")
+
+# Environment variable holding the default dtype; spawned worker processes inherit it
+DTYPE_ENV = "WHISPER_STT_DTYPE"
+
+
+def default_dtype() -> str:
+    """Weight precision used when get_model is called without a dtype (default: fp32)"""
+    return os.environ.get(DTYPE_ENV, "fp32")
+
+
+def set_default_dtype(dtype: str) -> None:
+    """Set the default weight precision for this process and the worker processes it starts"""
+    if dtype not in SUPPORTED_DTYPES:
+        raise ValueError(f"Unsupported dtype '{dtype}'; choose from {SUPPORTED_DTYPES}")
+    os.environ[DTYPE_ENV] = dtype
+
+
+def split_model_name(model_name: str) -> Tuple[str, Optional[str]]:
+    """
+    Split a "size:dtype" model name, e.g. "base.en:int8" -> ("base.en", "int8")
+
+    Returns:
+        tuple: (model size or checkpoint path, dtype or None if not given)
+    """
+    model_size, _, dtype = model_name.rpartition(":")
+    if model_size and dtype in SUPPORTED_DTYPES:
+        return model_size, dtype
+    return model_name, None
+
+
+def model_identity(model_size: str) -> str:
+    """Model name as used in cache keys: the size, plus the dtype unless it is fp32"""
+    model_size, dtype = split_model_name(model_size)
+    dtype = dtype or default_dtype()
+    return model_size if dtype == "fp32" else f"{model_size}:{dtype}"
+
+
+def resolve_device(device: Optional[str] = None) -> str:
+    """Return the device a model would be loaded on ('cuda' if available, else 'cpu')"""
+    if device is None:
+        return "cuda" if torch.cuda.is_available() else "cpu"
+    return str(device)
+
+
+def model_memory_mb(model: Any) -> float:
+    """
+    Size of a model's parameters and buffers in MB
+
+    Args:
+        model: A loaded Whisper model
+
+    Returns:
+        float: Resident weight size in MB
+    """
+    tensors = list(model.parameters()) + list(model.buffers())
+    # Quantized layers keep their packed int8 weights outside parameters()
+    for module in model.modules():
+        if hasattr(module, "_weight_bias"):
+            tensors.extend(t for t in module._weight_bias() if t is not None)
+    return sum(t.numel() * t.element_size() for t in tensors) / (1024 * 1024)
+
+
+class ModelRegistry:
+    def __init__(self, memory_budget_mb: float = DEFAULT_MEMORY_BUDGET_MB):
+        """
+        Registry of resident Whisper models with LRU eviction
+
+        Args:
+            memory_budget_mb (float): Maximum total weight size kept resident.
+                The most recently used model is always kept, even if it alone
+                exceeds the budget.
+        """
+        self.memory_budget_mb = memory_budget_mb
+        self._models = OrderedDict()  # key -> (model, size in MB)
+        self._lock = threading.RLock()
+
+    def get(self, model_size: str = "base", device: Optional[str] = None, dtype: Optional[str] = None) -> Any:
+        """
+        Return a loaded model, loading it on first use
+
+        Args:
+            model_size (str): Whisper model size ('tiny', 'base', 'small', ...),
+                optionally with a dtype ('base:int8')
+            device (str): Torch device; defaults to 'cuda' if available, else 'cpu'
+                ('cpu' for int8)
+            dtype (str): Weight precision, one of SUPPORTED_DTYPES (default: default_dtype())
+
+        Returns:
+            whisper.model.Whisper: The loaded model
+        """
+        model_size, named_dtype = split_model_name(model_size)
+        dtype = dtype or named_dtype or default_dtype()
+        if dtype not in SUPPORTED_DTYPES:
+            raise ValueError(f"Unsupported dtype '{dtype}'; choose from {SUPPORTED_DTYPES}")
+        if dtype == "int8":
+            device = device or "cpu"
+            if resolve_device(device) != "cpu":
+                raise ValueError("int8 models run on the CPU only")
+
+        key = (model_size, resolve_device(device), dtype)
+        with self._lock:
+            if key in self._models:
+                self._models.move_to_end(key)
+                return self._models[key][0]
+
+            model = self._load(*key)
+            self._models[key] = (model, model_memory_mb(model))
+            self._evict()
+            return model
+
+    def _load(self, model_size: str, device: str, dtype: str) -> Any:
+        """Load a model from disk for the given key"""
+        print(f"Loading Whisper {model_size} model...")
+        if dtype == "int8":
+            from quantization import load_quantized_model
+            return load_quantized_model(model_size)
+        from mmap_weights import has_mmap_weights, load_mmap_model, mmap_enabled
+        if mmap_enabled() or has_mmap_weights(model_size):
+            model = load_mmap_model(model_size, device=device)
+        else:
+            model = whisper.load_model(model_size, device=device)
+        if dtype == "fp16":
+            model = model.half()
+        return model
+
+    def _evict(self) -> None:
+        """Drop least recently used models until the budget is met"""
+        while len(self._models) > 1 and self.resident_mb() > self.memory_budget_mb:
+            (model_size, device, dtype), (_, size_mb) = self._models.popitem(last=False)
+            print(f"Evicting Whisper {model_size} model ({device}, {dtype}, {size_mb:.0f} MB)")
+            if device.startswith("cuda"):
+                torch.cuda.empty_cache()
+
+    def evict(self, model_size: str, device: Optional[str] = None, dtype: Optional[str] = None) -> bool:
+        """
+        Remove a model from the registry
+
+        Returns:
+            bool: True if the model was resident
+        """
+        model_size, named_dtype = split_model_name(model_size)
+        dtype = dtype or named_dtype or default_dtype()
+        if dtype == "int8":
+            device = device or "cpu"
+        with self._lock:
+            return self._models.pop((model_size, resolve_device(device), dtype), None) is not None
+
+    def clear(self) -> None:
+        """Remove all resident models"""
+        with self._lock:
+            self._models.clear()
+
+    def resident_mb(self) -> float:
+        """Total weight size of resident models in MB"""
+        with self._lock:
+            return sum(size_mb for _, size_mb in self._models.values())
+
+    def keys(self) -> List[Tuple[str, str, str]]:
+        """Resident model keys, least recently used first"""
+        with self._lock:
+            return list(self._models.keys())
+
+
+_registry = ModelRegistry()
+
+
+def get_registry() -> ModelRegistry:
+    """Return the process-wide model registry"""
+    return _registry
+
+
+def get_model(model_size: str = "base", device: Optional[str] = None, dtype: Optional[str] = None) -> Any:
+    """
+    Return a loaded Whisper model from the process-wide registry
+
+    Args:
+        model_size (str): Whisper model size ('tiny', 'base', 'small', ...),
+            optionally with a dtype ('base:int8')
+        device (str): Torch device; defaults to 'cuda' if available, else 'cpu'
+        dtype (str): Weight precision, one of SUPPORTED_DTYPES (default: default_dtype())
+
+    Returns:
+        whisper.model.Whisper: The loaded model
+    """
+    return _registry.get(model_size, device, dtype)
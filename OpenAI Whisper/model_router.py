@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Per-file model routing from measured throughput
+
+Instead of one model size for every file, the router picks a model per file:
+the most accurate model whose measured speed transcribes the file within
+its time budget. The budget is a target real-time factor (processing time /
+audio duration; 0.25 means 10 minutes of audio in 2.5 minutes) or a
+deadline in seconds for the file, whichever is tighter.
+
+Speed comes from a local calibration run, which times each candidate model
+(and dtype, e.g. "small:int8") on a sample file on this machine and stores
+its real-time factor in ~/.cache/whisper_stt/router/calibration.json:
+
+    python model_router.py calibrate tiny base small small:int8 medium:int8
+
+For English audio the English-only variants (tiny.en ... medium.en) are
+used: they are the same size as the multilingual models and more accurate
+on English at the small sizes. They run at the speed measured for their own
+name, or for the multilingual model of the same size if only that was
+calibrated. The language is detected once with the fastest calibrated
+multilingual model if it isn't given, and the result is cached.
+
+Larger models rank above smaller ones; at the same size fp32 ranks above
+fp16 and int8. Every decision and its reason is printed and appended to
+output/model_routing.jsonl.
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from typing import Any, Dict, NamedTuple, Optional, Sequence
+
+import torch
+from whisper.audio import SAMPLE_RATE
+
+from audio_stream import audio_info, read_audio_range
+from language_id import resolve_language
+from memory_budget import weights_mb
+from model_registry import get_model, get_registry, resolve_device, split_model_name
+from pcm_cache import decoded_path
+from transcription_cache import DEFAULT_CACHE_DIR
+
+# Model name that asks for routing instead of a fixed model
+AUTO_MODEL = "auto"
+
+# Default time budget: no slower than real time (override with WHISPER_STT_TARGET_RTF)
+DEFAULT_TARGET_RTF = float(os.environ.get("WHISPER_STT_TARGET_RTF", 1.0))
+
+# Models with an English-only variant
+ENGLISH_ONLY_SIZES = ("tiny", "base", "small", "medium")
+
+# Seconds of the sample file used per calibration run
+DEFAULT_CALIBRATION_SECONDS = 60
+
+# Decision log, next to the transcriptions
+ROUTING_LOG = os.path.join("output", "model_routing.jsonl")
+
+# Accuracy rank of a dtype at the same model size
+_DTYPE_RANK = {"fp32": 2, "fp16": 1, "int8": 0}
+
+
+class RouteDecision(NamedTuple):
+    """The model chosen for one file and why"""
+    model: str  # Model name for get_model, e.g. "base.en:int8"
+    language: Optional[str]
+    duration: float  # Audio seconds
+    expected_seconds: Optional[float]  # Predicted transcription time; None without calibration
+    limit_seconds: float  # Time budget for the file
+    reason: str
+
+
+def calibration_path(cache_dir: Optional[str] = None) -> str:
+    """File holding the measured real-time factors"""
+    return os.path.join(cache_dir or DEFAULT_CACHE_DIR, "router", "calibration.json")
+
+
+def machine_key() -> str:
+    """Calibrations are only valid on the hardware they were measured on"""
+    return f"{resolve_device()}-{os.cpu_count() or 1}cpu-{torch.get_num_threads()}threads"
+
+
+def load_calibration(cache_dir: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Measured real-time factors for this machine
+
+    Returns:
+        dict: {model name: {"rtf", "audio_seconds", "measured"}}
+    """
+    try:
+        with open(calibration_path(cache_dir), "r", encoding="utf-8") as f:
+            return json.load(f).get(machine_key(), {})
+    except (OSError, ValueError):
+        return {}
+
+
+def save_calibration(models: Dict[str, Dict[str, Any]], cache_dir: Optional[str] = None) -> None:
+    """Merge measurements into the calibration file, atomically"""
+    path = calibration_path(cache_dir)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            calibration = json.load(f)
+    except (OSError, ValueError):
+        calibration = {}
+    calibration.setdefault(machine_key(), {}).update(models)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(calibration, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def calibrate(models: Sequence[str], audio_path: str, seconds: float = DEFAULT_CALIBRATION_SECONDS,
+              language: Optional[str] = "en", cache_dir: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Time each model on a sample file and store its real-time factor
+
+    Each model is warmed up on the first 30 seconds before it is timed, so
+    loading and first-call setup don't count. Models are evicted from the
+    registry afterwards.
+
+    Args:
+        models (list): Model names, optionally with a dtype ("small:int8")
+        audio_path (str): Sample audio, ideally speech like the files to route
+        seconds (float): Seconds of the sample to transcribe per model
+        language (str): Language of the sample, so detection isn't timed
+        cache_dir (str): Base cache directory (default: ~/.cache/whisper_stt)
+
+    Returns:
+        dict: {model name: {"rtf", "audio_seconds", "measured"}}
+    """
+    audio_path = decoded_path(audio_path)
+    info = audio_info(audio_path)
+    audio = read_audio_range(audio_path, 0, int(min(seconds, info.duration) * info.samplerate),
+                             sample_rate=SAMPLE_RATE)
+    audio_seconds = len(audio) / SAMPLE_RATE
+    measured = {}
+    for name in models:
+        model = get_model(name)
+        model.transcribe(audio[:30 * SAMPLE_RATE], fp16=False, language=language)
+        start = time.perf_counter()
+        model.transcribe(audio, fp16=False, language=language)
+        rtf = (time.perf_counter() - start) / audio_seconds
+        measured[name] = dict(rtf=round(rtf, 4), audio_seconds=round(audio_seconds, 1), measured=time.time())
+        print(f"{name}: RTF {rtf:.3f} ({1 / rtf:.1f}x real time)")
+        get_registry().evict(name)
+    save_calibration(measured, cache_dir)
+    return measured
+
+
+def _size_of(model_size: str) -> str:
+    return model_size[:-len(".en")] if model_size.endswith(".en") else model_size
+
+
+def _with_size(name: str, model_size: str) -> str:
+    _, dtype = split_model_name(name)
+    return f"{model_size}:{dtype}" if dtype else model_size
+
+
+def _rank(name: str) -> tuple:
+    """Larger models first, then higher precision"""
+    model_size, dtype = split_model_name(name)
+    return weights_mb(_size_of(model_size), "fp32"), _DTYPE_RANK[dtype or "fp32"]
+
+
+def candidate_models(calibration: Dict[str, Dict[str, Any]], language: Optional[str]) -> Dict[str, float]:
+    """
+    Models that can transcribe this language, with their real-time factors
+
+    Returns:
+        dict: {model name: rtf}, English-only variants for English audio
+    """
+    candidates = {}
+    for name, entry in calibration.items():
+        model_size, _ = split_model_name(name)
+        size = _size_of(model_size)
+        if language == "en" and size in ENGLISH_ONLY_SIZES:
+            english = _with_size(name, f"{size}.en")
+            # A measurement of the variant itself wins over the multilingual one
+            if english not in candidates or model_size.endswith(".en"):
+                candidates[english] = entry["rtf"]
+        elif not model_size.endswith(".en"):
+            candidates[name] = entry["rtf"]
+    return candidates
+
+
+def choose_model(duration: float, language: Optional[str], calibration: Dict[str, Dict[str, Any]],
+                 target_rtf: Optional[float] = None, deadline: Optional[float] = None,
+                 fallback_model: str = "base") -> RouteDecision:
+    """
+    Pick the most accurate calibrated model that meets the time budget
+
+    Args:
+        duration (float): Audio seconds
+        language (str): Language code, or None if unknown
+        calibration (dict): Measured real-time factors (see load_calibration)
+        target_rtf (float): Largest acceptable processing time / audio duration
+            (default: DEFAULT_TARGET_RTF unless a deadline is given)
+        deadline (float): Seconds the file may take
+        fallback_model (str): Used when nothing is calibrated
+
+    Returns:
+        RouteDecision: The model and the reason for it
+    """
+    limits = []
+    if target_rtf is not None or deadline is None:
+        rtf = DEFAULT_TARGET_RTF if target_rtf is None else target_rtf
+        limits.append((rtf * duration, f"target RTF {rtf:g}"))
+    if deadline is not None:
+        limits.append((deadline, f"deadline {deadline:g} s"))
+    limit_seconds, limit_reason = min(limits)
+
+    candidates = candidate_models(calibration, language)
+    if not candidates:
+        return RouteDecision(fallback_model, language, duration, None, limit_seconds,
+                             f"no calibrated models for this machine; using {fallback_model} "
+                             f"(run: python model_router.py calibrate)")
+
+    language_note = "English-only variants for English audio; " if language == "en" else ""
+    ranked = sorted(candidates, key=_rank, reverse=True)
+    for name in ranked:
+        expected = candidates[name] * duration
+        if expected <= limit_seconds:
+            too_slow = ranked[:ranked.index(name)]
+            note = f"; {', '.join(too_slow)} too slow" if too_slow else ""
+            return RouteDecision(name, language, duration, expected, limit_seconds,
+                                 f"{language_note}most accurate model within {limit_reason} "
+                                 f"({expected:.0f} s expected of {limit_seconds:.0f} s allowed{note})")
+    fastest = min(candidates, key=candidates.get)
+    expected = candidates[fastest] * duration
+    return RouteDecision(fastest, language, duration, expected, limit_seconds,
+                         f"{language_note}no model meets {limit_reason} ({limit_seconds:.0f} s allowed); "
+                         f"fastest model, {expected:.0f} s expected")
+
+
+def route_file(file_path: str, language: Optional[str] = None, target_rtf: Optional[float] = None,
+               deadline: Optional[float] = None, use_cache: bool = True, cache_dir: Optional[str] = None,
+               log_path: Optional[str] = ROUTING_LOG) -> RouteDecision:
+    """
+    Choose the model for one file and log the decision
+
+    Args:
+        file_path (str): Path to the audio file
+        language (str): Language code; detected with the fastest calibrated
+            multilingual model if None
+        target_rtf (float): Largest acceptable processing time / audio duration
+        deadline (float): Seconds the file may take
+        use_cache (bool): Reuse a cached language detection
+        cache_dir (str): Base cache directory for the calibration (default: ~/.cache/whisper_stt)
+        log_path (str): JSON-lines decision log; None to only print
+
+    Returns:
+        RouteDecision: The model and the reason for it
+    """
+    calibration = load_calibration(cache_dir)
+    audio_path = decoded_path(file_path)
+    duration = audio_info(audio_path).duration
+
+    if language is None:
+        multilingual = {name: entry["rtf"] for name, entry in calibration.items()
+                        if not split_model_name(name)[0].endswith(".en")}
+        detector = min(multilingual, key=multilingual.get) if multilingual else "tiny"
+        language = resolve_language(get_model(detector), audio_path, detector, None, use_cache)
+
+    decision = choose_model(duration, language, calibration, target_rtf, deadline)
+    print(f"Model router: {os.path.basename(file_path)} -> {decision.model} "
+          f"({duration / 60:.1f} min, language {language}): {decision.reason}")
+    if log_path:
+        os.makedirs(os.path.dirname(log_path) or ".", exist_ok=True)
+        with open(log_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(dict(file=os.path.abspath(file_path), time=time.time(), **decision._asdict()),
+                               ensure_ascii=False) + "\n")
+    return decision
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calibrate and test the per-file model router")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    calibrate_parser = subparsers.add_parser("calibrate", help="Measure each model's real-time factor here")
+    calibrate_parser.add_argument("models", nargs="*", default=["tiny", "base", "small"],
+                                  help="Models, optionally with a dtype, e.g. small:int8 (default: tiny base small)")
+    calibrate_parser.add_argument("--audio", default=os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                                  "sample_test.wav"),
+                                  help="Sample speech to time the models on (default: sample_test.wav)")
+    calibrate_parser.add_argument("--seconds", type=float, default=DEFAULT_CALIBRATION_SECONDS,
+                                  help=f"Seconds of the sample per model (default: {DEFAULT_CALIBRATION_SECONDS})")
+    calibrate_parser.add_argument("--language", default="en", help="Language of the sample (default: en)")
+
+    route_parser = subparsers.add_parser("route", help="Show which model each file would get")
+    route_parser.add_argument("files", nargs="+", help="Audio files")
+    route_parser.add_argument("--target-rtf", type=float, default=None,
+                              help=f"Largest processing time / audio duration (default: {DEFAULT_TARGET_RTF:g})")
+    route_parser.add_argument("--deadline", type=float, default=None, help="Seconds each file may take")
+    route_parser.add_argument("--language", default=None, help="Language code (default: detect per file)")
+    args = parser.parse_args()
+
+    if args.command == "calibrate":
+        calibrate(args.models, args.audio, args.seconds, args.language)
+        print(f"Saved to {calibration_path()}")
+    else:
+        for path in args.files:
+            route_file(path, args.language, args.target_rtf, args.deadline, log_path=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Multichannel transcription: every channel of a file as its own stream
+
+The other modes mix a file down to mono, which merges the two sides of a
+call recording into one transcript and loses whoever talks over the other.
+Multichannel mode transcribes each channel separately instead, on a shared
+timeline:
+
+- Every channel is decoded once to its own 16 kHz mono copy (pcm_cache).
+- Chunks are cut at quiet gaps in the mono mix, so the same sample ranges
+  are read from every channel.
+- The channels' 30-second windows at the same offset are stacked into one
+  batch of the batched engine, so the encoder and decoder run once per step
+  for all channels. As long as the batch fits the hardware, a stereo file
+  takes little longer than one channel.
+
+The result has the usual {"text", "segments", "language"} keys, with the
+segments of all channels merged in time order and tagged with their
+"channel" index, and "text" as one "Channel N: ..." line per turn. The
+per-channel results are under "channels".
+"""
+
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import torch
+
+from audio_stream import audio_info, iter_audio_chunks
+from batched_stt import transcribe_batched_many
+from encoder_cache import EncoderCache
+from pcm_cache import decoded_path
+from stt_results import merge_results
+
+
+def channel_paths(file_path: str, cache_dir: Optional[str] = None) -> List[str]:
+    """
+    16 kHz mono decode of each channel of a file, decoding them on first use
+
+    Args:
+        file_path (str): Path to the source audio file
+        cache_dir (str): Base cache directory (default: ~/.cache/whisper_stt)
+
+    Returns:
+        list: One WAV path per channel, in channel order
+    """
+    channels = audio_info(file_path).channels
+    return [decoded_path(file_path, cache_dir, channel=channel) for channel in range(channels)]
+
+
+def iter_channel_chunks(paths: Sequence[str], ranges: Sequence[Tuple[int, int]],
+                        sample_rate: Optional[int] = None) -> Iterator[Tuple[int, int, List[np.ndarray]]]:
+    """
+    Read the same chunk plan from every channel's file
+
+    Args:
+        paths (list): One mono file per channel, e.g. from channel_paths
+        ranges (list): (start_sample, end_sample) chunk ranges
+        sample_rate (int): Resample chunks to this rate (default: keep the native rate)
+
+    Yields:
+        tuple: (start_sample, end_sample, chunks) with one chunk per channel
+    """
+    readers = [iter_audio_chunks(path, ranges=ranges, sample_rate=sample_rate) for path in paths]
+    for channel_chunks in zip(*readers):
+        start_sample, end_sample, _ = channel_chunks[0]
+        yield start_sample, end_sample, [chunk for _, _, chunk in channel_chunks]
+
+
+def merge_channels(channel_results: Sequence[Dict]) -> Dict:
+    """
+    Combine per-channel results into one result on the shared timeline
+
+    Args:
+        channel_results (list): One {"text", "segments", "language"} result
+            per channel, with file-time timestamps
+
+    Returns:
+        dict: {"text", "segments", "language", "channels"}; segments of all
+            channels in time order with a "channel" key, and text as one
+            "Channel N: ..." line per run of segments from the same channel
+    """
+    channels = [dict(channel=channel, **result) for channel, result in enumerate(channel_results)]
+    tagged = [{**segment, "channel": channel} for channel, result in enumerate(channel_results)
+              for segment in result["segments"] if segment["text"].strip()]
+    tagged.sort(key=lambda segment: (segment["start"], segment["channel"]))
+    segments = [{**segment, "id": i} for i, segment in enumerate(tagged)]
+
+    turns: List[List[Any]] = []
+    for segment in segments:
+        if turns and turns[-1][0] == segment["channel"]:
+            turns[-1][1].append(segment["text"].strip())
+        else:
+            turns.append([segment["channel"], [segment["text"].strip()]])
+    text = "\n".join(f"Channel {channel}: {' '.join(texts)}" for channel, texts in turns)
+    language = next((result["language"] for result in channel_results if result.get("language")), None)
+    return dict(text=text, segments=segments, language=language, channels=channels)
+
+
+def merge_channel_chunks(results: Sequence[Optional[Dict]]) -> Dict:
+    """
+    Combine per-chunk multichannel results, in order, into one for the whole file
+
+    Chunks that failed (None) are skipped in every channel.
+    """
+    channel_count = max((len(result["channels"]) for result in results if result), default=0)
+    return merge_channels([merge_results([result["channels"][channel] if result else None for result in results])
+                           for channel in range(channel_count)])
+
+
+def transcribe_channels(model: Any, audios: Sequence[Union[np.ndarray, torch.Tensor]], batch_size: int = 1,
+                        language: Optional[Union[str, Sequence[str]]] = None, time_offset: float = 0.0,
+                        encoder_cache: Optional[EncoderCache] = None, **decode_options) -> Dict:
+    """
+    Transcribe the channels of one chunk together, each as its own stream
+
+    Args:
+        model: Whisper model
+        audios (list): Each channel's 16 kHz float32 audio (or its padded_mel())
+        batch_size (int): 30-second windows per channel in each encoder/decoder
+            pass; every pass holds batch_size * channels windows
+        language (str or list): Language code for all channels, or one per
+            channel; detected per channel if None
+        time_offset (float): Seconds added to every segment timestamp
+        encoder_cache (EncoderCache): Reuse and store encoder outputs per window (default: None)
+        **decode_options: Other transcribe_batched_many arguments
+
+    Returns:
+        dict: Merged result (see merge_channels)
+    """
+    results = transcribe_batched_many(model, audios, batch_size * len(audios), language,
+                                      time_offsets=[time_offset] * len(audios), encoder_cache=encoder_cache,
+                                      **decode_options)
+    return merge_channels(results)
@@ -0,0 +1,169 @@
+"""
+Parallel chunk transcription across a pool of worker processes
+
+Each worker loads its own warm Whisper model once and pins its intra-op
+thread count so that N workers share the machine's cores instead of
+oversubscribing them. Chunks are read from disk inside the workers, so only
+(start, end) sample ranges cross the process boundary. Results come back in
+chunk order; failed chunks are retried, and a crashed worker pool is rebuilt
+for the chunks that were still outstanding.
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import torch
+from whisper.audio import SAMPLE_RATE
+
+from audio_stream import audio_info, read_audio_range
+from language_id import detect_file_language
+from model_registry import get_model
+from stt_results import offset_segments
+
+# Per-process state set up by _init_worker
+_worker_model = None
+_worker_model_size = None
+
+
+def default_threads_per_worker(workers: int) -> int:
+    """Split the available cores evenly between workers"""
+    return max(1, (os.cpu_count() or 1) // workers)
+
+
+def _init_worker(model_size: str, threads_per_worker: int, device: Optional[str]) -> None:
+    """Pin the worker's thread pools and load its model once"""
+    global _worker_model, _worker_model_size
+    torch.set_num_threads(threads_per_worker)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass  # Already set for this process
+    _worker_model = get_model(model_size, device)
+    _worker_model_size = model_size
+
+
+def _detect_language(file_path: str) -> str:
+    """Detect the file's language once in a worker process"""
+    return detect_file_language(_worker_model, file_path, _worker_model_size)
+
+
+def _transcribe_range(file_path: str, start_sample: int, end_sample: int, language: Optional[str] = None) -> Dict:
+    """Transcribe one sample range in a worker process"""
+    sample_rate = audio_info(file_path).samplerate
+    audio_chunk = read_audio_range(file_path, start_sample, end_sample, sample_rate=SAMPLE_RATE)
+    result = _worker_model.transcribe(audio_chunk, fp16=False, language=language)
+
+    # Shift segment timestamps from chunk time to file time
+    return offset_segments(result, start_sample / sample_rate)
+
+
+def transcribe_chunks_parallel(file_path: str, ranges: Sequence[Tuple[int, int]], model_size: str = "base",
+                               workers: int = 2, threads_per_worker: Optional[int] = None,
+                               max_retries: int = 2, device: Optional[str] = None,
+                               on_result: Optional[Callable[[int, Dict], None]] = None,
+                               language: Optional[str] = None,
+                               chunk_fn: Optional[Callable[..., Dict]] = None) -> List[Optional[Dict]]:
+    """
+    Transcribe sample ranges of one file in parallel worker processes
+
+    Args:
+        file_path (str): Path to the audio file
+        ranges (list): (start_sample, end_sample) pairs in chunk order
+        model_size (str): Size of the Whisper model to use
+        workers (int): Number of worker processes
+        threads_per_worker (int): Intra-op threads per worker (default: cores / workers)
+        max_retries (int): How many times a failing chunk is retried
+        device (str): Torch device for the workers
+        on_result (callable): Called in the parent as on_result(index, result)
+            as soon as each chunk finishes, e.g. to journal it
+        language (str): Language code for every chunk; if None it is
+            detected once, in a worker, before the chunks are submitted
+        chunk_fn (callable): Module-level function run in the workers as
+            chunk_fn(file_path, start_sample, end_sample, language) for each
+            chunk (default: transcribe the range with the worker's model)
+
+    Returns:
+        list: Whisper result dicts in chunk order; None for chunks that failed
+            on every attempt
+    """
+    if threads_per_worker is None:
+        threads_per_worker = default_threads_per_worker(workers)
+    chunk_fn = chunk_fn or _transcribe_range
+
+    total_chunks = len(ranges)
+    results: List[Optional[Dict]] = [None] * total_chunks
+    attempts = [0] * total_chunks
+    remaining = list(range(total_chunks))
+
+    print(f"Transcribing {total_chunks} chunks with {workers} workers "
+          f"({threads_per_worker} threads each)...")
+
+    while remaining:
+        remaining, language = _run_pool(file_path, ranges, remaining, results, attempts, model_size,
+                                        workers, threads_per_worker, max_retries, device, on_result, language,
+                                        chunk_fn)
+        if remaining:
+            print(f"Worker pool crashed; restarting for {len(remaining)} remaining chunks...")
+
+    return results
+
+
+def _run_pool(file_path, ranges, indices, results, attempts, model_size, workers, threads_per_worker,
+              max_retries, device, on_result, language, chunk_fn) -> Tuple[List[int], Optional[str]]:
+    """
+    Run one worker pool over the given chunk indices
+
+    Returns:
+        tuple: (chunk indices that were lost to a crashed pool and should be
+            resubmitted to a fresh one, language used for the chunks)
+    """
+    total_chunks = len(ranges)
+    lost = []
+
+    def record_failure(index, error):
+        attempts[index] += 1
+        if attempts[index] > max_retries:
+            print(f"Error transcribing chunk {index+1}: {error} (giving up after {attempts[index]} attempts)")
+            return False
+        print(f"Error transcribing chunk {index+1}: {error} (retrying, attempt {attempts[index] + 1})")
+        return True
+
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=min(workers, len(indices)), mp_context=context,
+                             initializer=_init_worker,
+                             initargs=(model_size, threads_per_worker, device)) as executor:
+        if language is None:
+            try:
+                language = executor.submit(_detect_language, file_path).result()
+            except BrokenProcessPool as e:
+                # Counts as a failed attempt for every chunk so a pool that keeps crashing gives up
+                return [i for i in indices if record_failure(i, e)], None
+            except Exception as e:
+                print(f"Language detection failed: {e} (each chunk will detect its own)")
+
+        futures = {executor.submit(chunk_fn, file_path, *ranges[i], language): i for i in indices}
+
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = futures.pop(future)
+                try:
+                    results[index] = future.result()
+                    print(f"Finished chunk {index+1}/{total_chunks}")
+                    if on_result is not None:
+                        on_result(index, results[index])
+                except BrokenProcessPool as e:
+                    if record_failure(index, e):
+                        lost.append(index)
+                except Exception as e:
+                    if not record_failure(index, e):
+                        continue
+                    try:
+                        futures[executor.submit(chunk_fn, file_path, *ranges[index], language)] = index
+                    except BrokenProcessPool:
+                        lost.append(index)
+
+    return lost, language
@@ -0,0 +1,146 @@
+"""
+Decode-once 16 kHz PCM intermediate shared by every pass over a file
+
+Chunk planning, speech detection, language detection, noise reduction and
+transcription all read the same input. Instead of decoding it separately for
+each pass, the file is decoded once to 16 kHz float32 mono and stored in the
+cache directory as a WAV file, i.e. the raw float32 samples behind a small
+RIFF header. Because it is a normal WAV file, the existing soundfile-based
+readers work on it unchanged. open_pcm maps the samples with np.memmap for
+zero-copy random access.
+
+Multichannel transcription decodes each channel to its own mono file the
+same way, next to the mix.
+
+Entries are keyed by the SHA-256 of the source file, written to a temporary
+file and moved into place with os.replace, and trimmed to a size budget by
+deleting the least recently used ones.
+"""
+
+import os
+import struct
+import tempfile
+from typing import Optional
+
+import numpy as np
+import soundfile as sf
+from whisper.audio import SAMPLE_RATE
+
+from audio_stream import audio_info, iter_audio_chunks
+from stt_profiler import profile_span
+from transcription_cache import DEFAULT_CACHE_DIR, evict_lru, file_sha256
+
+# Size budget for decoded audio in MB (override with WHISPER_STT_PCM_MB); one hour is about 230 MB
+DEFAULT_MAX_PCM_MB = float(os.environ.get("WHISPER_STT_PCM_MB", 4096))
+
+# Plain WAV sizes are 32-bit; bigger files are written as RF64
+_WAV_MAX_BYTES = 2 ** 31
+
+
+def pcm_dir(cache_dir: Optional[str] = None) -> str:
+    """Directory holding the decoded files"""
+    return os.path.join(cache_dir or DEFAULT_CACHE_DIR, "pcm")
+
+
+def is_decoded(file_path: str) -> bool:
+    """True if a file is already 16 kHz float32 mono WAV and can be used as is"""
+    try:
+        info = sf.info(file_path)
+    except RuntimeError:
+        return False
+    return (info.format in ("WAV", "RF64") and info.subtype == "FLOAT"
+            and info.samplerate == SAMPLE_RATE and info.channels == 1)
+
+
+def decoded_path(file_path: str, cache_dir: Optional[str] = None,
+                 max_size_mb: Optional[float] = None, channel: Optional[int] = None) -> str:
+    """
+    Path of the 16 kHz float32 mono decode of a file, decoding it on first use
+
+    Args:
+        file_path (str): Path to the source audio file
+        cache_dir (str): Base cache directory (default: ~/.cache/whisper_stt)
+        max_size_mb (float): Size budget for decoded files in MB
+        channel (int): Decode only this channel (default: the mix of all channels)
+
+    Returns:
+        str: Path to a 16 kHz float32 mono WAV file
+    """
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"Audio file not found: {file_path}")
+    if channel is not None and audio_info(file_path).channels == 1:
+        if channel != 0:
+            raise ValueError(f"{file_path} has 1 channel; there is no channel {channel}")
+        channel = None  # The only channel is the mix
+    if channel is None and is_decoded(file_path):
+        return file_path
+
+    directory = pcm_dir(cache_dir)
+    suffix = "" if channel is None else f"-ch{channel}"
+    path = os.path.join(directory, f"{file_sha256(file_path)}{suffix}.wav")
+    if os.path.exists(path):
+        os.utime(path)  # Mark as recently used
+        return path
+
+    os.makedirs(directory, exist_ok=True)
+    what = "16 kHz mono" if channel is None else f"16 kHz mono (channel {channel})"
+    print(f"Decoding {file_path} to {what} (once)...")
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    os.close(fd)
+    try:
+        with profile_span("audio_decode", channel=channel):
+            _decode(file_path, tmp_path, channel)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    evict_lru(directory, DEFAULT_MAX_PCM_MB if max_size_mb is None else max_size_mb, ".wav")
+    return path
+
+
+def _decode(file_path: str, output_path: str, channel: Optional[int] = None) -> None:
+    """Decode any supported file (or one of its channels) to a 16 kHz float32 mono WAV, one chunk at a time"""
+    # Formats libsndfile can't read (mp3 on old versions, m4a, video) stream through an ffmpeg pipe
+    duration = audio_info(file_path).duration
+    # Probed durations can be missing or approximate; RF64 costs nothing when in doubt
+    file_format = "RF64" if not duration or duration * SAMPLE_RATE * 4 >= 0.9 * _WAV_MAX_BYTES else "WAV"
+    with sf.SoundFile(output_path, "w", samplerate=SAMPLE_RATE, channels=1, subtype="FLOAT",
+                      format=file_format) as out:
+        for _, _, chunk in iter_audio_chunks(file_path, sample_rate=SAMPLE_RATE, channel=channel,
+                                             reuse_buffer=True):
+            out.write(chunk)
+
+
+def _data_offset(path: str) -> int:
+    """Byte offset of the sample data in a RIFF/RF64 WAV file"""
+    with open(path, "rb") as f:
+        header = f.read(12)
+        if header[:4] not in (b"RIFF", b"RF64") or header[8:12] != b"WAVE":
+            raise ValueError(f"Not a WAV file: {path}")
+        while True:
+            chunk = f.read(8)
+            if len(chunk) < 8:
+                raise ValueError(f"No data chunk in {path}")
+            chunk_id, size = struct.unpack("<4sI", chunk)
+            if chunk_id == b"data":
+                return f.tell()
+            f.seek(size + (size & 1), os.SEEK_CUR)
+
+
+def open_pcm(file_path: str, cache_dir: Optional[str] = None) -> np.memmap:
+    """
+    Map a file's 16 kHz float32 mono samples into memory without reading them
+
+    The file is decoded first if needed. The map is copy-on-write, so callers
+    may modify it without touching the cached file.
+
+    Returns:
+        np.memmap: 1-D float32 samples at 16 kHz
+    """
+    path = decoded_path(file_path, cache_dir)
+    frames = sf.info(path).frames
+    if frames == 0:
+        return np.zeros(0, dtype=np.float32)
+    return np.memmap(path, dtype="<f4", mode="c", offset=_data_offset(path), shape=(frames,))
@@ -0,0 +1,162 @@
+"""
+Dynamic INT8 quantization of Whisper for CPU inference
+
+Every Linear layer (the attention projections and MLPs, which is where
+nearly all of Whisper's compute goes) is replaced with a dynamically
+quantized one: weights are stored as int8 and activations are quantized on
+the fly per batch. Convolutions, layer norms and the token embedding, which
+also produces the output logits, stay in fp32.
+
+Whisper uses its own Linear subclass (whisper.model.Linear). quantize_dynamic
+only swaps exact type matches, so the subclass is mapped explicitly.
+
+Quantizing takes a while for the larger models, so the quantized weights
+are saved under the cache directory after the first load. Later loads build
+the model on the meta device and read the int8 weights directly, without
+ever materializing the fp32 checkpoint.
+"""
+
+import hashlib
+import os
+import tempfile
+import warnings
+from dataclasses import asdict
+from typing import Any, Dict, Optional
+
+import torch
+import whisper
+from whisper.model import AudioEncoder, ModelDimensions, TextDecoder, Whisper
+
+from mmap_weights import checkpoint_id
+from transcription_cache import DEFAULT_CACHE_DIR
+
+with warnings.catch_warnings():
+    # torch.ao.quantization warns about its planned move to torchao on import
+    warnings.simplefilter("ignore", DeprecationWarning)
+    from torch.ao.nn.quantized.dynamic import Linear as DynamicQuantizedLinear
+    from torch.ao.quantization import default_dynamic_qconfig, quantize_dynamic
+
+
+class QuantizedLinear(DynamicQuantizedLinear):
+    """Dynamic int8 Linear that can be converted from whisper.model.Linear"""
+
+    @classmethod
+    def from_float(cls, mod, use_precomputed_fake_quant=False):
+        # The stock from_float only accepts torch.nn.Linear itself, not subclasses
+        linear = torch.nn.Linear(mod.in_features, mod.out_features, bias=mod.bias is not None)
+        linear.weight, linear.bias = mod.weight, mod.bias
+        linear.qconfig = mod.qconfig
+        return super().from_float(linear)
+
+
+def quantized_dir(cache_dir: Optional[str] = None) -> str:
+    """Directory holding the quantized weights"""
+    return os.path.join(cache_dir or DEFAULT_CACHE_DIR, "quantized")
+
+
+def quantize_model(model: Whisper) -> Whisper:
+    """
+    Quantize a CPU Whisper model's Linear layers to int8 in place
+
+    Args:
+        model: fp32 Whisper model on the CPU
+
+    Returns:
+        whisper.model.Whisper: The same model with int8 Linear layers
+    """
+    with warnings.catch_warnings():
+        # Quantized tensors and torch.ao are deprecated upstream but still the CPU int8 path
+        warnings.simplefilter("ignore")
+        return quantize_dynamic(model, {whisper.model.Linear: default_dynamic_qconfig},
+                                dtype=torch.qint8, mapping={whisper.model.Linear: QuantizedLinear},
+                                inplace=True)
+
+
+def quantized_path(model_size: str, cache_dir: Optional[str] = None) -> str:
+    """Cache file for a model's quantized weights; the torch version is part of the key"""
+    key = hashlib.sha256(f"{checkpoint_id(model_size)}|{torch.__version__}".encode("utf-8")).hexdigest()[:16]
+    name = os.path.splitext(os.path.basename(model_size))[0]
+    return os.path.join(quantized_dir(cache_dir), f"{name}-int8-{key}.pt")
+
+
+def _save(model: Whisper, path: str) -> None:
+    """Write the quantized weights atomically"""
+    state_dict = model.state_dict()
+    # Non-persistent buffers (attention mask, alignment heads) aren't in the state dict
+    extra_buffers = {name: buffer for name, buffer in model.named_buffers() if name not in state_dict}
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    os.close(fd)
+    try:
+        torch.save(dict(dims=asdict(model.dims), state_dict=state_dict, extra_buffers=extra_buffers), tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def empty_model(dims: ModelDimensions) -> Whisper:
+    """
+    Whisper model whose parameters live on the meta device (no memory, no init)
+
+    Built without Whisper.__init__, which creates the sparse alignment_heads
+    buffer and sparse tensors can't be created on the meta device. Callers
+    must provide alignment_heads themselves (it's a non-persistent buffer).
+    """
+    model = Whisper.__new__(Whisper)
+    torch.nn.Module.__init__(model)
+    model.dims = dims
+    with torch.device("meta"):
+        model.encoder = AudioEncoder(dims.n_mels, dims.n_audio_ctx, dims.n_audio_state,
+                                     dims.n_audio_head, dims.n_audio_layer)
+        model.decoder = TextDecoder(dims.n_vocab, dims.n_text_ctx, dims.n_text_state,
+                                    dims.n_text_head, dims.n_text_layer)
+    return model
+
+
+def _load(path: str) -> Whisper:
+    """Rebuild a quantized model from cached weights without allocating fp32 Linear weights"""
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        checkpoint: Dict[str, Any] = torch.load(path, map_location="cpu", weights_only=False)
+    model = empty_model(ModelDimensions(**checkpoint["dims"]))
+
+    for name, module in list(model.named_modules()):
+        if isinstance(module, whisper.model.Linear):
+            parent_name, _, child_name = name.rpartition(".")
+            setattr(model.get_submodule(parent_name), child_name,
+                    QuantizedLinear(module.in_features, module.out_features, bias_=module.bias is not None))
+
+    model.to_empty(device="cpu")
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        model.load_state_dict(checkpoint["state_dict"])
+    for name, buffer in checkpoint["extra_buffers"].items():
+        module_name, _, buffer_name = name.rpartition(".")
+        model.get_submodule(module_name).register_buffer(buffer_name, buffer, persistent=False)
+    return model.eval()
+
+
+def load_quantized_model(model_size: str, cache_dir: Optional[str] = None) -> Whisper:
+    """
+    Load an int8 Whisper model, quantizing and caching it on first use
+
+    Args:
+        model_size (str): Whisper model size or checkpoint path
+        cache_dir (str): Base cache directory (default: ~/.cache/whisper_stt)
+
+    Returns:
+        whisper.model.Whisper: Model with int8 Linear layers, on the CPU
+    """
+    path = quantized_path(model_size, cache_dir)
+    if os.path.exists(path):
+        try:
+            return _load(path)
+        except Exception as e:
+            print(f"Ignoring unreadable quantized weights {path}: {e}")
+
+    print(f"Quantizing Whisper {model_size} to int8 (once)...")
+    model = quantize_model(whisper.load_model(model_size, device="cpu"))
+    _save(model, path)
+    return model
@@ -1,4 +1,4 @@
-import whisper
+from model_registry import get_model
 import numpy as np
 import queue
 import threading
@@ -12,9 +12,8 @@ class RealTimeSTT:
         Args:
             model_size (str): Whisper model size ('tiny', 'base', 'small', 'medium', 'large')
         """
-        # Load Whisper model
-        print(f"Loading Whisper {model_size} model...")
-        self.model = whisper.load_model(model_size)
+        # Get Whisper model from the shared registry
+        self.model = get_model(model_size)
         print("Model loaded successfully!")
         
         # Audio parameters
@@ -1,4 +1,4 @@
-import whisper
+from model_registry import get_model
 import numpy as np
 import queue
 import collections
@@ -15,9 +15,8 @@ class EnhancedRealTimeSTT:
             use_vad (bool): Whether to use WebRTC VAD for voice activity detection
             use_noise_reduction (bool): Whether to apply noise reduction (RNNoise-like)
         """
-        # Load Whisper model
-        print(f"Loading Whisper {model_size} model...")
-        self.model = whisper.load_model(model_size)
+        # Get Whisper model from the shared registry
+        self.model = get_model(model_size)
         print("Model loaded successfully!")
         
         # Audio parameters
@@ -0,0 +1,113 @@
+"""
+Streaming polyphase resampler
+
+Converts float32 mono audio between rational sample rates (e.g. 44.1 or
+48 kHz to Whisper's 16 kHz) block by block. The Kaiser-windowed sinc filter is
+stored as a polyphase table with one row per output phase, and the outputs
+of each phase are computed with one matrix-vector product over a strided
+view of the input. The input history the filter needs is carried between
+blocks, so feeding a file in blocks gives the same output (up to float
+rounding) as resampling it in one piece.
+"""
+
+import math
+from typing import Optional
+
+import numpy as np
+
+class StreamingResampler:
+    def __init__(self, orig_sr: int, target_sr: int = 16000, start_sample: int = 0,
+                 zero_crossings: int = 16, rolloff: float = 0.945, beta: float = 8.6):
+        """
+        Resample a stream of audio blocks from orig_sr to target_sr
+
+        Args:
+            orig_sr (int): Input sample rate
+            target_sr (int): Output sample rate
+            start_sample (int): Input position of the first sample that will be
+                fed; outputs are aligned to the whole-file timeline
+            zero_crossings (int): Sinc zero crossings on each side of the
+                filter center; more is sharper but slower
+            rolloff (float): Cutoff as a fraction of the lower Nyquist rate
+            beta (float): Kaiser window shape
+        """
+        g = math.gcd(int(orig_sr), int(target_sr))
+        self.up = int(target_sr) // g
+        self.down = int(orig_sr) // g
+        cutoff = rolloff * min(1.0, self.up / self.down)
+
+        # Input samples used on each side of an output position
+        self.half = int(math.ceil(zero_crossings / cutoff))
+        self._offsets = np.arange(-self.half + 1, self.half + 1)
+
+        # One filter row per output phase; distance from the output position to each tap
+        distance = (np.arange(self.up) / self.up)[:, None] - self._offsets[None, :]
+        window = np.i0(beta * np.sqrt(np.clip(1 - (distance / self.half) ** 2, 0, None))) / np.i0(beta)
+        table = cutoff * np.sinc(cutoff * distance) * window
+        self._table = (table / table.sum(axis=1, keepdims=True)).astype(np.float32)
+
+        # Input before start_sample is treated as silence unless primed with history
+        self._buffer = np.zeros(self.half, dtype=np.float32)
+        self._buffer_start = start_sample - self.half
+        self._next_output = self.output_index(start_sample)
+
+    def output_index(self, input_sample: int) -> int:
+        """Index of the first output at or after an input position"""
+        return -(-input_sample * self.up // self.down)
+
+    def prime(self, history: np.ndarray) -> None:
+        """Provide up to `half` input samples that precede start_sample"""
+        if len(history) > self.half:
+            history = history[-self.half:]
+        if len(history):
+            self._buffer[-len(history):] = history
+
+    def _emit(self, end_output: int) -> np.ndarray:
+        """Compute outputs [next_output, end_output) from the buffered input"""
+        count = max(end_output - self._next_output, 0)
+        out = np.empty(count, dtype=np.float32)
+        windows = np.lib.stride_tricks.sliding_window_view(self._buffer, len(self._offsets))
+        # Outputs `up` apart share a filter phase and sit `down` input samples apart,
+        # so each phase is one matrix-vector product over a strided view of the input
+        for first in range(min(self.up, count)):
+            n = self._next_output + first
+            base = n * self.down // self.up
+            start = base - self.half + 1 - self._buffer_start
+            rows = (count - first + self.up - 1) // self.up
+            out[first::self.up] = windows[start:start + (rows - 1) * self.down + 1:self.down] @ \
+                self._table[n * self.down - base * self.up]
+        self._next_output += count
+
+        # Drop input that no later output needs
+        keep_from = self._next_output * self.down // self.up - self.half + 1 - self._buffer_start
+        if keep_from > 0:
+            self._buffer = self._buffer[keep_from:]
+            self._buffer_start += keep_from
+        return out
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        """Feed the next block of float32 mono input; return every output it completes"""
+        self._buffer = np.concatenate((self._buffer, np.asarray(block, dtype=np.float32)))
+        last_usable = self._buffer_start + len(self._buffer) - 1 - self.half
+        return self._emit(self.output_index(last_usable + 1))
+
+    def flush(self, end_sample: Optional[int] = None) -> np.ndarray:
+        """
+        Finish the stream, treating input after the last block as silence
+
+        Args:
+            end_sample (int): Input position the output should cover
+                (default: the end of the input fed so far)
+        """
+        if end_sample is None:
+            end_sample = self._buffer_start + len(self._buffer)
+        self._buffer = np.concatenate((self._buffer, np.zeros(self.half, dtype=np.float32)))
+        return self._emit(self.output_index(end_sample))
+
+
+def resample(audio: np.ndarray, orig_sr: int, target_sr: int = 16000) -> np.ndarray:
+    """Resample a whole float32 mono array in one call"""
+    if orig_sr == target_sr:
+        return np.asarray(audio, dtype=np.float32)
+    resampler = StreamingResampler(orig_sr, target_sr)
+    return np.concatenate((resampler.process(audio), resampler.flush()))
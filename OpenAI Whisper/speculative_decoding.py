@@ -0,0 +1,252 @@
+"""
+Speculative greedy decoding with a small draft model
+
+On the CPU the text decoder dominates for small/medium models with long
+outputs, because every token costs one full decoder pass. Here a draft model
+(tiny or base) guesses the next few tokens cheaply, and the large model checks
+all of the guesses in a single forward pass. Guesses are accepted up to the first
+token where the large model's greedy choice differs; at that point the
+large model's token is taken instead. Every emitted token is therefore the
+large model's own greedy choice after the same logit filters
+(suppression, timestamp rules), so the output is the same as plain greedy
+decoding. The speedup depends on how often the draft guesses right.
+
+Both models encode the window once with their own encoder, and each keeps
+its own kv cache. After a rejection only the self-attention caches are cut
+back to the accepted length; the cross-attention keys and values depend only
+on the encoded audio and stay as they are.
+
+Only greedy decoding (temperature 0, no beam search) with a known language is
+speculative; anything else, such as the temperature fallbacks, goes through
+whisper's regular decoder.
+"""
+
+from dataclasses import replace
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+import whisper
+from whisper.decoding import DecodingOptions, DecodingResult, DecodingTask, decode
+from whisper.utils import compression_ratio
+
+# Tokens proposed by the draft model per verification pass
+DEFAULT_DRAFT_TOKENS = 4
+
+
+class _CachedDecoder:
+    def __init__(self, model: Any, audio_features: torch.Tensor):
+        """
+        One model's text decoder over one encoded window, with its own kv cache
+
+        Whisper's decoder forward can only add one token at a time to a filled
+        cache (its causal mask assumes the queries start at position 0) and
+        keeps the cache in forward hooks on the shared model. Here the blocks
+        are run with a mask offset by the cache length, and the cache lives in
+        this object, so two decoders on the same model don't interfere.
+        """
+        self.model = model
+        # Cross-attention keys/values depend only on the audio: computed once, never truncated
+        self.cross_kv = [(block.cross_attn.key(audio_features), block.cross_attn.value(audio_features))
+                         for block in model.decoder.blocks]
+        # Self-attention keys/values grow with every token and are cut back after a rejection
+        self.self_kv: List[Optional[Tuple[torch.Tensor, torch.Tensor]]] = [None] * len(model.decoder.blocks)
+        self.dtype = audio_features.dtype
+        self.device = audio_features.device
+
+    def __len__(self) -> int:
+        """Number of token positions in the cache"""
+        return 0 if self.self_kv[0] is None else self.self_kv[0][0].shape[1]
+
+    def forward(self, tokens: List[int]) -> torch.Tensor:
+        """Feed tokens after the cached ones; return (len(tokens), n_vocab) float32 logits"""
+        decoder = self.model.decoder
+        offset, n = len(self), len(tokens)
+        x = torch.tensor([tokens], device=self.device)
+        x = decoder.token_embedding(x) + decoder.positional_embedding[offset:offset + n]
+        x = x.to(self.dtype)
+        # Query i sits at position offset + i and may attend to every key up to there
+        mask = torch.full((n, offset + n), float("-inf"), device=self.device, dtype=x.dtype).triu_(offset + 1)
+
+        for i, block in enumerate(decoder.blocks):
+            h = block.attn_ln(x)
+            k, v = block.attn.key(h), block.attn.value(h)
+            if self.self_kv[i] is not None:
+                k = torch.cat([self.self_kv[i][0], k], dim=1)
+                v = torch.cat([self.self_kv[i][1], v], dim=1)
+            self.self_kv[i] = (k, v)
+            x = x + _attention(block.attn, block.attn.query(h), k, v, mask)
+            x = x + _attention(block.cross_attn, block.cross_attn.query(block.cross_attn_ln(x)), *self.cross_kv[i])
+            x = x + block.mlp(block.mlp_ln(x))
+        x = decoder.ln(x)
+        return (x @ torch.transpose(decoder.token_embedding.weight.to(x.dtype), 0, 1)).float()[0]
+
+    def truncate(self, length: int) -> None:
+        """Drop cached positions from `length` on (self-attention only)"""
+        self.self_kv = [None if kv is None else (kv[0][:, :length], kv[1][:, :length]) for kv in self.self_kv]
+
+
+def _attention(attn: Any, q: torch.Tensor, k: torch.Tensor, v: torch.Tensor,
+               mask: Optional[torch.Tensor] = None) -> torch.Tensor:
+    """Multi-head attention over projected queries, keys and values, then the output projection"""
+    q, k, v = (t.view(*t.shape[:2], attn.n_head, -1).permute(0, 2, 1, 3) for t in (q, k, v))
+    out = F.scaled_dot_product_attention(q, k, v, attn_mask=mask)
+    return attn.out(out.permute(0, 2, 1, 3).flatten(start_dim=2))
+
+
+def _filtered(task: DecodingTask, logits: torch.Tensor, tokens: List[int]) -> torch.Tensor:
+    """Apply the greedy decoder's logit filters for the next token after `tokens`"""
+    logits = logits.clone()[None]
+    token_tensor = torch.tensor([tokens], device=logits.device)
+    for logit_filter in task.logit_filters:
+        logit_filter.apply(logits, token_tensor)
+    return logits[0]
+
+
+def is_speculative(options: DecodingOptions) -> bool:
+    """True if the options describe plain greedy decoding, which speculation reproduces exactly"""
+    return (options.temperature == 0 and options.beam_size is None and options.language is not None
+            and options.task != "lang_id")
+
+
+def _check_compatible(model: Any, draft_model: Any) -> None:
+    if (draft_model.dims.n_vocab != model.dims.n_vocab or draft_model.dims.n_mels != model.dims.n_mels
+            or draft_model.is_multilingual != model.is_multilingual):
+        raise ValueError("The draft model must use the same tokenizer and mel bins as the main model "
+                         "(e.g. tiny.en with small.en, tiny with medium)")
+
+
+@torch.no_grad()
+def _decode_window(model: Any, draft_model: Any, mel: torch.Tensor, task: DecodingTask,
+                   draft_tokens: int, stats: Optional[Dict[str, int]]) -> DecodingResult:
+    """Speculatively decode one (n_mels, n_frames) window"""
+    eot = task.tokenizer.eot
+    audio_features = model.embed_audio(mel[None].to(next(model.parameters()).dtype))
+    large = _CachedDecoder(model, audio_features)
+    draft = _CachedDecoder(draft_model, draft_model.embed_audio(mel[None].to(next(draft_model.parameters()).dtype)))
+
+    tokens = list(task.initial_tokens)
+    # Greedy stops after sample_len tokens or once the sequence outgrows the context
+    limit = min(task.sample_len, task.n_ctx + 1 - len(tokens))
+    sum_logprob, no_speech_prob = 0.0, float("nan")
+    while len(tokens) - task.sample_begin < limit and tokens[-1] != eot:
+        # The draft proposes up to k tokens, leaving room for the large model's own token
+        proposals: List[int] = []
+        k = min(draft_tokens, limit - (len(tokens) - task.sample_begin) - 1)
+        feed = tokens[len(draft):]
+        while len(proposals) < k:
+            logits = _filtered(task, draft.forward(feed)[-1], tokens + proposals)
+            proposals.append(int(logits.argmax()))
+            if proposals[-1] == eot:
+                break
+            feed = proposals[-1:]
+
+        # One large-model pass scores every proposal plus the token after them
+        logits = large.forward(tokens[len(large):] + proposals)
+        if np.isnan(no_speech_prob) and task.tokenizer.no_speech is not None:
+            no_speech_prob = logits[task.sot_index].softmax(dim=-1)[task.tokenizer.no_speech].item()
+
+        accepted = 0
+        for j, row in enumerate(logits[len(logits) - len(proposals) - 1:]):
+            row = _filtered(task, row, tokens)
+            token = int(row.argmax())
+            sum_logprob += F.log_softmax(row, dim=-1)[token].item()
+            tokens.append(token)
+            if token == eot or j == len(proposals) or token != proposals[j]:
+                break
+            accepted += 1
+
+        large.truncate(len(tokens) - 1)
+        draft.truncate(min(len(draft), len(tokens) - 1))
+        if stats is not None:
+            stats["passes"] = stats.get("passes", 0) + 1
+            stats["proposed"] = stats.get("proposed", 0) + len(proposals)
+            stats["accepted"] = stats.get("accepted", 0) + accepted
+
+    sampled = tokens[task.sample_begin:]
+    if eot in sampled:
+        sampled = sampled[:sampled.index(eot)]
+    if stats is not None:
+        stats["tokens"] = stats.get("tokens", 0) + len(sampled)
+    text = task.tokenizer.decode(sampled).strip()
+    return DecodingResult(audio_features=audio_features[0], language=task.options.language, tokens=sampled,
+                          text=text, avg_logprob=sum_logprob / (len(sampled) + 1),
+                          no_speech_prob=no_speech_prob, temperature=0.0,
+                          compression_ratio=compression_ratio(text))
+
+
+def speculative_decode(model: Any, draft_model: Any, mel: torch.Tensor,
+                       options: DecodingOptions = DecodingOptions(), draft_tokens: int = DEFAULT_DRAFT_TOKENS,
+                       stats: Optional[Dict[str, int]] = None) -> Union[DecodingResult, List[DecodingResult]]:
+    """
+    Drop-in replacement for whisper.decode that speculates when decoding greedily
+
+    Args:
+        model: Whisper model whose output is produced
+        draft_model: Smaller Whisper model with the same tokenizer
+        mel (torch.Tensor): (n_mels, 3000) or (batch, n_mels, 3000) log-mel windows
+        options (DecodingOptions): Decoding options
+        draft_tokens (int): Tokens the draft proposes per verification pass
+        stats (dict): Optional counters to update ("passes", "proposed", "accepted", "tokens")
+
+    Returns:
+        DecodingResult, or a list of them for a batch of windows
+    """
+    if not is_speculative(options):
+        return decode(model, mel, options)
+    _check_compatible(model, draft_model)
+
+    single = mel.ndim == 2
+    mels = mel[None] if single else mel
+    task = DecodingTask(model, options)
+    results = []
+    for window in mels:
+        # The logit filters are stateless, so one task serves every window
+        results.append(_decode_window(model, draft_model, window, task, draft_tokens, stats))
+    return results[0] if single else results
+
+
+class SpeculativeModel:
+    def __init__(self, model: Any, draft_model: Any, draft_tokens: int = DEFAULT_DRAFT_TOKENS,
+                 stats: Optional[Dict[str, int]] = None):
+        """
+        A Whisper model whose decode() speculates with a draft model
+
+        Every other attribute is the wrapped model's, so it can be passed to
+        whisper.transcribe. Wrapping instead of patching keeps the shared
+        model in the registry untouched for other threads.
+        """
+        _check_compatible(model, draft_model)
+        self._model = model
+        self._draft_model = draft_model
+        self._draft_tokens = draft_tokens
+        self.stats = stats if stats is not None else {}
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._model, name)
+
+    def decode(self, mel: torch.Tensor, options: DecodingOptions = DecodingOptions(), **kwargs):
+        if kwargs:
+            options = replace(options, **kwargs)
+        return speculative_decode(self._model, self._draft_model, mel, options, self._draft_tokens, self.stats)
+
+    def transcribe(self, audio: Any, **transcribe_options) -> Dict:
+        return whisper.transcribe(self, audio, **transcribe_options)
+
+
+def transcribe_speculative(model: Any, draft_model: Any, audio: Any, draft_tokens: int = DEFAULT_DRAFT_TOKENS,
+                           **transcribe_options) -> Dict:
+    """
+    model.transcribe with speculative greedy decoding
+
+    Returns:
+        dict: Same result as model.transcribe(audio, **transcribe_options)
+    """
+    speculative = SpeculativeModel(model, draft_model, draft_tokens)
+    result = speculative.transcribe(audio, **transcribe_options)
+    stats = speculative.stats
+    if stats.get("proposed"):
+        print(f"Speculative decoding: {stats['accepted']}/{stats['proposed']} draft tokens accepted, "
+              f"{stats['tokens'] / max(stats['passes'], 1):.1f} tokens per large-model pass")
+    return result
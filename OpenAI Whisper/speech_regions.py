@@ -0,0 +1,199 @@
+"""
+Speech-region-only transcription with timestamp remapping
+
+A vectorized energy VAD finds the speech regions of the whole file first.
+Only those regions are read, packed back to back (with a short silence
+between them) into dense buffers and sent to Whisper. Segment timestamps are
+then mapped from the packed timeline back to the original file timeline.
+
+The VAD is energy based, so it removes silence and quiet passages; loud
+music beds are kept as if they were speech.
+"""
+
+import bisect
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+from whisper.audio import SAMPLE_RATE
+
+from audio_stream import audio_info, read_audio_range
+from chunk_planner import WHISPER_WINDOW_SECONDS, compute_frame_rms
+
+
+def _runs(mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Start and end (exclusive) indices of the True runs in a boolean mask"""
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], mask.astype(np.int8), [0]))))
+    return edges[::2], edges[1::2]
+
+
+def _merge_close(starts: np.ndarray, ends: np.ndarray, max_gap: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Merge runs separated by at most max_gap"""
+    if len(starts) == 0:
+        return starts, ends
+    keep_gap = (starts[1:] - ends[:-1]) > max_gap
+    return starts[np.r_[True, keep_gap]], ends[np.r_[keep_gap, True]]
+
+
+def detect_speech_regions(file_path: str, frame_duration: float = 0.03, margin_db: float = 12.0,
+                          min_threshold_db: float = -55.0, min_speech_duration: float = 0.25,
+                          min_silence_duration: float = 0.6, padding_duration: float = 0.2) -> List[Tuple[int, int]]:
+    """
+    Detect speech regions over a whole file with a vectorized energy VAD
+
+    Args:
+        file_path (str): Path to the audio file
+        frame_duration (float): VAD frame length in seconds
+        margin_db (float): How far above the noise floor (10th percentile of
+            frame energy) a frame must be to count as speech
+        min_threshold_db (float): Lowest allowed speech threshold in dBFS
+        min_speech_duration (float): Shorter bursts are dropped
+        min_silence_duration (float): Shorter pauses are bridged
+        padding_duration (float): Context kept before and after each region
+
+    Returns:
+        list: (start_sample, end_sample) speech regions at the file's native
+            sample rate, in order and non-overlapping
+    """
+    file_info = audio_info(file_path)
+    rms, frame_size = compute_frame_rms(file_path, frame_duration)
+    if len(rms) == 0:
+        return []
+
+    level_db = 20 * np.log10(rms + 1e-10)
+    threshold_db = max(np.percentile(level_db, 10) + margin_db, min_threshold_db)
+
+    frames_per_second = file_info.samplerate / frame_size
+    starts, ends = _runs(level_db > threshold_db)
+    starts, ends = _merge_close(starts, ends, int(min_silence_duration * frames_per_second))
+
+    long_enough = (ends - starts) >= int(min_speech_duration * frames_per_second)
+    starts, ends = starts[long_enough], ends[long_enough]
+
+    padding = int(padding_duration * frames_per_second)
+    starts = np.maximum(starts - padding, 0)
+    ends = np.minimum(ends + padding, len(rms))
+    starts, ends = _merge_close(starts, ends, 0)
+
+    return [(int(start) * frame_size, min(int(end) * frame_size, file_info.frames))
+            for start, end in zip(starts, ends)]
+
+
+def pack_regions(regions: Sequence[Tuple[int, int]], sample_rate: int, pack_duration: float = 600,
+                 gap_duration: float = 0.3) -> List[List[Tuple[int, int]]]:
+    """
+    Group speech regions into packs that fill whole 30-second windows
+
+    Regions longer than a pack are split across packs.
+
+    Args:
+        regions (list): (start_sample, end_sample) speech regions
+        sample_rate (int): Sample rate of the regions
+        pack_duration (float): Target pack length in seconds, rounded to
+            whole 30-second windows
+        gap_duration (float): Silence inserted between regions in a pack
+
+    Returns:
+        list: Packs, each a list of (start_sample, end_sample) regions
+    """
+    windows = max(1, round(pack_duration / WHISPER_WINDOW_SECONDS))
+    pack_samples = windows * WHISPER_WINDOW_SECONDS * sample_rate
+    gap_samples = int(gap_duration * sample_rate)
+
+    packs, current, used = [], [], 0
+    for start, end in regions:
+        while start < end:
+            needed = (gap_samples if current else 0)
+            room = pack_samples - used - needed
+            if room <= 0:
+                packs.append(current)
+                current, used = [], 0
+                continue
+            piece_end = min(end, start + room)
+            current.append((start, piece_end))
+            used += needed + (piece_end - start)
+            start = piece_end
+    if current:
+        packs.append(current)
+    return packs
+
+
+def build_packed_audio(file_path: str, pack: Sequence[Tuple[int, int]], sample_rate: int,
+                       gap_duration: float = 0.3) -> Tuple[np.ndarray, List[Tuple[float, float, float]]]:
+    """
+    Read a pack's regions at 16 kHz and join them with short silences
+
+    Args:
+        sample_rate (int): The file's native sample rate, used by the regions
+
+    Returns:
+        tuple: (audio, mapping) where mapping holds (packed_start, packed_end,
+            original_start) in seconds for every region
+    """
+    gap = np.zeros(int(gap_duration * SAMPLE_RATE), dtype=np.float32)
+    pieces, mapping, position = [], [], 0
+    for start, end in pack:
+        if pieces:
+            pieces.append(gap)
+            position += len(gap)
+        audio = read_audio_range(file_path, start, end, sample_rate=SAMPLE_RATE)
+        pieces.append(audio)
+        mapping.append((position / SAMPLE_RATE, (position + len(audio)) / SAMPLE_RATE, start / sample_rate))
+        position += len(audio)
+    return np.concatenate(pieces), mapping
+
+
+def remap_time(t: float, mapping: Sequence[Tuple[float, float, float]], is_end: bool = False) -> float:
+    """
+    Map a time on the packed timeline back to the original file timeline
+
+    Times that fall in an inserted gap snap to the end of the previous region
+    (for segment ends) or the start of the next region (for segment starts).
+    """
+    packed_starts = [packed_start for packed_start, _, _ in mapping]
+    index = max(bisect.bisect_right(packed_starts, t) - 1, 0)
+    packed_start, packed_end, original_start = mapping[index]
+    if t > packed_end and not is_end and index + 1 < len(mapping):
+        return mapping[index + 1][2]
+    return original_start + min(max(t, packed_start), packed_end) - packed_start
+
+
+def transcribe_speech_regions(model: Any, file_path: str, pack_duration: float = 600,
+                              gap_duration: float = 0.3, **transcribe_options) -> Dict:
+    """
+    Transcribe only the speech regions of a file
+
+    Args:
+        model: Whisper model
+        file_path (str): Path to the audio file
+        pack_duration (float): Maximum seconds of speech sent to the model per pack
+        gap_duration (float): Silence inserted between packed regions
+        **transcribe_options: Extra keyword arguments for model.transcribe
+
+    Returns:
+        dict: {"text", "segments", "language"} on the original timeline, plus
+            "speech_seconds" (audio actually sent to the model) and
+            "total_seconds" (file duration)
+    """
+    file_info = audio_info(file_path)
+    regions = detect_speech_regions(file_path)
+    packs = pack_regions(regions, file_info.samplerate, pack_duration, gap_duration)
+    speech_seconds = sum(end - start for start, end in regions) / file_info.samplerate
+
+    print(f"Found {len(regions)} speech regions: {speech_seconds/60:.1f} of "
+          f"{file_info.duration/60:.1f} minutes, in {len(packs)} packs")
+
+    texts, segments, language = [], [], transcribe_options.pop("language", None)
+    for i, pack in enumerate(packs):
+        print(f"Processing speech pack {i+1}/{len(packs)}...")
+        audio, mapping = build_packed_audio(file_path, pack, file_info.samplerate, gap_duration)
+        result = model.transcribe(audio, fp16=False, language=language, **transcribe_options)
+        language = result["language"]
+        texts.append(str(result["text"]))
+        for segment in result["segments"]:
+            segment["start"] = remap_time(segment["start"], mapping)
+            segment["end"] = max(remap_time(segment["end"], mapping, is_end=True), segment["start"])
+            segment["id"] = len(segments)
+            segments.append(segment)
+
+    return dict(text=" ".join(texts), segments=segments, language=language,
+                speech_seconds=speech_seconds, total_seconds=file_info.duration)
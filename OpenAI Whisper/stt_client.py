@@ -0,0 +1,64 @@
+"""
+Client for the warm local transcription daemon (stt_server.py)
+
+Only needs the standard library and numpy, so checking whether the service
+is up, or sending it a request, doesn't pay for importing torch and Whisper.
+
+Usage:
+    from stt_client import server_available, transcribe_remote
+    if server_available():
+        result = transcribe_remote(file_path="meeting.wav")
+"""
+
+import json
+import os
+import urllib.parse
+import urllib.request
+from typing import Dict, Optional
+
+import numpy as np
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_URL = f"http://{DEFAULT_HOST}:{DEFAULT_PORT}"
+
+
+def transcribe_remote(file_path: Optional[str] = None, audio: Optional[np.ndarray] = None,
+                      model_size: Optional[str] = None, language: Optional[str] = None,
+                      url: str = DEFAULT_URL, timeout: float = 3600) -> Dict:
+    """
+    Transcribe through a running service
+
+    Args:
+        file_path (str): Audio file readable by the service
+        audio (np.ndarray): 16 kHz float32 mono audio, sent as PCM instead of a path
+        model_size (str): Model to use (default: the service's model)
+        language (str): Language code, or None to detect
+        url (str): Service base URL
+        timeout (float): Seconds to wait for the result
+
+    Returns:
+        dict: {"text", "segments", "language"}
+    """
+    if audio is not None:
+        query = urllib.parse.urlencode({key: value for key, value in
+                                        (("model", model_size), ("language", language)) if value})
+        request = urllib.request.Request(f"{url}/transcribe?{query}", method="POST",
+                                         data=np.asarray(audio, dtype="<f4").tobytes(),
+                                         headers={"Content-Type": "application/octet-stream"})
+    else:
+        payload = {"path": os.path.abspath(file_path), "model": model_size, "language": language}
+        request = urllib.request.Request(f"{url}/transcribe", method="POST",
+                                         data=json.dumps(payload).encode("utf-8"),
+                                         headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.load(response)
+
+
+def server_available(url: str = DEFAULT_URL, timeout: float = 0.5) -> bool:
+    """Return True if a transcription service answers at url"""
+    try:
+        with urllib.request.urlopen(f"{url}/health", timeout=timeout) as response:
+            return response.status == 200
+    except OSError:
+        return False
@@ -0,0 +1,328 @@
+"""
+Opt-in inference profiler for the transcription hot path
+
+model.transcribe is a black box from the outside: a slow run could be
+spending its time decoding audio, computing log-mel spectrograms, in the
+encoder, in hundreds of small decoder steps, or in temperature fallbacks
+that decode the same window again. While profiling() is active, a Profiler
+records all of them:
+
+- Pipeline stages from StageTimer (chunk "read", "mel", "wait", "inference"),
+  the one-time 16 kHz "audio_decode" and every "log_mel" computation.
+- Every encoder forward pass and every decoder step (one step generates one
+  token per sequence in the batch).
+- Every decode of a window, or of a batch of windows in the batched engine,
+  with its temperature and tokens generated. A decode at a higher
+  temperature than the one before is a fallback of the same window.
+- Language detection.
+
+Encoder passes, decoder steps and language detection are attributed to the
+window being decoded. The batched engine encodes a whole batch before
+decoding it, so those passes count towards the next window. Chunk reads and
+log-mel spectrograms are recorded per chunk.
+
+Nothing is recorded unless a profiler is active. To reach inside whisper,
+the profiler temporarily wraps AudioEncoder.forward, TextDecoder.forward,
+Whisper.detect_language and DecodingTask.run for as long as it is active.
+Worker processes (--workers) are not profiled.
+
+save() writes a JSON report with totals per stage, per-window details and
+the real-time factor, and a Chrome trace (chrome://tracing or
+https://ui.perfetto.dev) with one row per thread, so background chunk
+preparation shows up next to inference.
+"""
+
+import importlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import whisper.decoding
+import whisper.model
+
+_active: Optional["Profiler"] = None
+
+
+class Profiler:
+    def __init__(self):
+        """Collects timed events and per-window statistics for one run"""
+        self.events: List[Dict[str, Any]] = []
+        self.totals: Dict[str, List[float]] = {}
+        self.windows: List[Dict[str, Any]] = []
+        self.started = time.perf_counter()
+        self.stopped: Optional[float] = None
+        self._threads: Dict[int, str] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._originals: List[Tuple[Any, str, Any]] = []
+
+    def record(self, name: str, category: str, start: float, seconds: float, **args: Any) -> None:
+        """
+        Record one finished event
+
+        Args:
+            name (str): Event name, e.g. "encoder"
+            category (str): "pipeline", "model" or "decode"
+            start (float): time.perf_counter() at the start of the event
+            seconds (float): Duration of the event
+            **args: Details shown in the trace
+        """
+        thread = threading.current_thread()
+        with self._lock:
+            self._threads.setdefault(thread.ident, thread.name)
+            total = self.totals.setdefault(name, [0.0, 0])
+            total[0] += seconds
+            total[1] += 1
+            self.events.append(dict(name=name, cat=category, ph="X", ts=(start - self.started) * 1e6,
+                                    dur=seconds * 1e6, pid=os.getpid(), tid=thread.ident, args=args))
+
+    @contextmanager
+    def span(self, name: str, category: str = "pipeline", **args: Any) -> Iterator[None]:
+        """Record the enclosed block as one event"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, category, start, time.perf_counter() - start, **args)
+
+    # Wrappers installed around whisper's internals while the profiler is active
+
+    def _encoder_forward(self, original):
+        profiler = self
+
+        def forward(encoder, x):
+            start = time.perf_counter()
+            output = original(encoder, x)
+            seconds = time.perf_counter() - start
+            profiler.record("encoder", "model", start, seconds, windows=int(x.shape[0]))
+            profiler._attribute("encoder_seconds", seconds)
+            return output
+        return forward
+
+    def _decoder_forward(self, original):
+        profiler = self
+
+        def forward(decoder, x, xa, kv_cache=None):
+            start = time.perf_counter()
+            output = original(decoder, x, xa, kv_cache)
+            seconds = time.perf_counter() - start
+            profiler.record("decoder_step", "model", start, seconds, sequences=int(x.shape[0]),
+                            positions=int(x.shape[-1]))
+            profiler._attribute("decoder_seconds", seconds)
+            profiler._attribute("decoder_steps", 1)
+            return output
+        return forward
+
+    def _detect_language(self, original):
+        profiler = self
+
+        def detect_language(model, mel, tokenizer=None):
+            local = profiler._local
+            start = time.perf_counter()
+            local.detecting = True
+            try:
+                return original(model, mel, tokenizer)
+            finally:
+                local.detecting = False
+                seconds = time.perf_counter() - start
+                profiler.record("language_detection", "model", start, seconds,
+                                windows=int(mel.shape[0]) if mel.ndim == 3 else 1)
+                if getattr(local, "decoding", False):
+                    local.window["language_seconds"] += seconds
+        return detect_language
+
+    def _decoding_run(self, original):
+        profiler = self
+
+        def run(task, mel):
+            local = profiler._local
+            temperature = task.options.temperature
+            windows = int(mel.shape[0])
+            window = getattr(local, "window", None)
+            if window is None or temperature <= window["temperature"]:
+                window = profiler._new_window(windows, temperature)
+            else:
+                window["fallbacks"] += windows
+                window["temperature"] = temperature
+            start = time.perf_counter()
+            local.decoding = True
+            try:
+                results = original(task, mel)
+            finally:
+                local.decoding = False
+                seconds = time.perf_counter() - start
+                window["seconds"] += seconds
+            tokens = sum(len(result.tokens) for result in results)
+            window["tokens"] += tokens
+            profiler.record("decode", "decode", start, seconds, window=window["index"], windows=windows,
+                            temperature=temperature, tokens=tokens)
+            return results
+        return run
+
+    def _new_window(self, windows: int, temperature: float) -> Dict[str, Any]:
+        """Start a window; encoder passes since the last one (the batched engine's) count towards it"""
+        local = self._local
+        pending = getattr(local, "pending", {})
+        local.pending = {}
+        with self._lock:
+            window = dict(index=len(self.windows), start=time.perf_counter() - self.started, windows=windows,
+                          temperature=temperature, fallbacks=0, tokens=0, decoder_steps=0,
+                          encoder_seconds=pending.get("encoder_seconds", 0.0),
+                          decoder_seconds=0.0, language_seconds=0.0,
+                          seconds=pending.get("encoder_seconds", 0.0))
+            self.windows.append(window)
+        local.window = window
+        return window
+
+    def _attribute(self, key: str, value: float) -> None:
+        """Add a model pass to the window being decoded, or hold it for the next one"""
+        local = self._local
+        if getattr(local, "detecting", False):
+            return  # Counted as language detection
+        if getattr(local, "decoding", False):
+            local.window[key] += value
+        elif key == "encoder_seconds":
+            local.pending = getattr(local, "pending", {})
+            local.pending[key] = local.pending.get(key, 0.0) + value
+
+    def install(self) -> None:
+        """Wrap whisper's encoder, decoder, language detection and decoding loop"""
+        targets = [(whisper.model.AudioEncoder, "forward", self._encoder_forward),
+                   (whisper.model.TextDecoder, "forward", self._decoder_forward),
+                   (whisper.model.Whisper, "detect_language", self._detect_language),
+                   (whisper.decoding.DecodingTask, "run", self._decoding_run)]
+        for owner, name, wrap in targets:
+            original = owner.__dict__[name]
+            self._originals.append((owner, name, original))
+            setattr(owner, name, wrap(original))
+
+        # model.transcribe computes the mel of the whole chunk up front
+        transcribe_module = importlib.import_module("whisper.transcribe")
+        original_mel = transcribe_module.log_mel_spectrogram
+        self._originals.append((transcribe_module, "log_mel_spectrogram", original_mel))
+
+        def log_mel_spectrogram(*args, **kwargs):
+            with self.span("log_mel"):
+                return original_mel(*args, **kwargs)
+        transcribe_module.log_mel_spectrogram = log_mel_spectrogram
+        self.started = time.perf_counter()
+
+    def uninstall(self) -> None:
+        """Restore everything install() wrapped"""
+        for owner, name, original in reversed(self._originals):
+            setattr(owner, name, original)
+        self._originals = []
+        self.stopped = time.perf_counter()
+
+    def report(self, audio_seconds: Optional[float] = None, **info: Any) -> Dict[str, Any]:
+        """
+        Summarize the run
+
+        Args:
+            audio_seconds (float): Duration of the transcribed audio, for the real-time factor
+            **info: Extra fields for the report, e.g. file and model
+
+        Returns:
+            dict: Wall time, real-time factor, totals per event name, window
+                statistics and the per-window details
+        """
+        wall_seconds = (self.stopped or time.perf_counter()) - self.started
+        with self._lock:
+            stages = {name: dict(seconds=round(seconds, 4), count=int(count))
+                      for name, (seconds, count) in sorted(self.totals.items(), key=lambda item: -item[1][0])}
+            windows = [{key: round(value, 4) if isinstance(value, float) else value for key, value in window.items()}
+                       for window in self.windows]
+        decode_seconds = sum(window["seconds"] for window in self.windows)
+        tokens = sum(window["tokens"] for window in self.windows)
+        summary = dict(windows=sum(window["windows"] for window in self.windows), batches=len(self.windows),
+                       fallbacks=sum(window["fallbacks"] for window in self.windows),
+                       decoder_steps=sum(window["decoder_steps"] for window in self.windows), tokens=tokens,
+                       tokens_per_second=round(tokens / decode_seconds, 2) if decode_seconds else None)
+        rtf = wall_seconds / audio_seconds if audio_seconds else None
+        return dict(info, audio_seconds=audio_seconds, wall_seconds=round(wall_seconds, 4),
+                    rtf=None if rtf is None else round(rtf, 4), stages=stages, summary=summary, windows=windows)
+
+    def summary(self, audio_seconds: Optional[float] = None) -> str:
+        """One-line report, e.g. for the end of a run"""
+        report = self.report(audio_seconds)
+        stages = report["stages"]
+        parts = [f"{name} {stages[name]['seconds']:.1f} s" for name in ("encoder", "decoder_step", "log_mel")
+                 if name in stages]
+        counts = report["summary"]
+        rtf = "" if report["rtf"] is None else f"RTF {report['rtf']:.3f}, "
+        return (f"Profile: {rtf}{report['wall_seconds']:.1f} s wall; {', '.join(parts) or 'no model passes'}; "
+                f"{counts['decoder_steps']} decoder steps, {counts['tokens']} tokens, "
+                f"{counts['fallbacks']} fallback(s) in {counts['windows']} window(s)")
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        """Events in the Chrome trace event format"""
+        with self._lock:
+            names = [dict(name="thread_name", ph="M", pid=os.getpid(), tid=tid, args=dict(name=name))
+                     for tid, name in self._threads.items()]
+            return dict(traceEvents=names + list(self.events), displayTimeUnit="ms")
+
+    def save(self, original_file_path: str, audio_seconds: Optional[float] = None, output_dir: str = "output",
+             **info: Any) -> Tuple[str, str]:
+        """
+        Write the report and the Chrome trace next to the transcription output
+
+        Returns:
+            tuple: (report path, trace path), output/<name>_profile.json and output/<name>_trace.json
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        base_name = os.path.splitext(os.path.basename(original_file_path))[0]
+        report_path = os.path.join(output_dir, f"{base_name}_profile.json")
+        trace_path = os.path.join(output_dir, f"{base_name}_trace.json")
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump(self.report(audio_seconds, file=original_file_path, **info), f, indent=2)
+        with open(trace_path, "w", encoding="utf-8") as f:
+            json.dump(self.chrome_trace(), f)
+        return report_path, trace_path
+
+
+def active_profiler() -> Optional[Profiler]:
+    """The profiler recording this run, if any"""
+    return _active
+
+
+@contextmanager
+def profiling(profiler: Optional[Profiler]) -> Iterator[Optional[Profiler]]:
+    """
+    Record everything in the enclosed block with `profiler`; None profiles nothing
+
+    Only one profiler can be active at a time.
+    """
+    global _active
+    if profiler is None:
+        yield None
+        return
+    if _active is not None:
+        raise RuntimeError("Another profiler is already active")
+    profiler.install()
+    _active = profiler
+    try:
+        yield profiler
+    finally:
+        _active = None
+        profiler.uninstall()
+
+
+@contextmanager
+def profile_span(name: str, **args: Any) -> Iterator[None]:
+    """Record the enclosed block as a pipeline event if a profiler is active"""
+    profiler = _active
+    if profiler is None:
+        yield
+        return
+    with profiler.span(name, **args):
+        yield
+
+
+def record_stage(stage: str, start: float, seconds: float) -> None:
+    """Record a pipeline stage (see chunk_prefetch.StageTimer) if a profiler is active"""
+    profiler = _active
+    if profiler is not None:
+        profiler.record(stage, "pipeline", start, seconds)
@@ -0,0 +1,43 @@
+"""
+Helpers for Whisper result dicts ({"text", "segments", "language"})
+"""
+
+from typing import Dict, Optional, Sequence
+
+
+def offset_segments(result: Dict, offset: float) -> Dict:
+    """
+    Shift a result's segment timestamps from chunk time to file time
+
+    Args:
+        result (dict): Whisper result, modified in place
+        offset (float): Seconds to add to every segment start and end
+
+    Returns:
+        dict: The same result
+    """
+    for segment in result["segments"]:
+        segment["start"] += offset
+        segment["end"] += offset
+    return result
+
+
+def merge_results(results: Sequence[Optional[Dict]]) -> Dict:
+    """
+    Combine per-chunk results, in order, into one result for the whole file
+
+    Chunks that failed (None) contribute empty text so the order is kept.
+
+    Args:
+        results (list): Whisper result dicts with file-time segment timestamps
+
+    Returns:
+        dict: {"text", "segments", "language"} with renumbered segment ids
+    """
+    segments = []
+    for result in results:
+        for segment in (result["segments"] if result else []):
+            segments.append({**segment, "id": len(segments)})
+    language = next((result["language"] for result in results if result and result.get("language")), None)
+    text = " ".join(str(result["text"]) if result else "" for result in results)
+    return dict(text=text, segments=segments, language=language)
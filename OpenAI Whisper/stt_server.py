@@ -0,0 +1,365 @@
+"""
+Warm local transcription daemon
+
+A localhost HTTP service that keeps Whisper models resident (through the
+model registry) so callers skip process startup and model loading on every
+request. Requests that arrive within a short latency window are combined:
+their 30-second windows are pooled into shared encoder/decoder batches with
+the batched engine. Files longer than the batching limit go through
+transcribe_audio_result as usual, on a thread of their own so they don't hold
+up short requests; that path only transcribes, so long files can't be
+translated.
+
+Endpoints:
+    POST /transcribe  JSON {"path", "model", "language", "task"} for a file on
+                      this machine, or a raw 16 kHz mono PCM body
+                      (Content-Type: application/octet-stream) with
+                      ?model=&language=&task=&format=f32le|s16le
+    GET  /stats       Queue depth, batch sizes and latency percentiles
+    GET  /health      Liveness check
+
+Usage:
+    python stt_server.py --model base --batch-size 8 --latency-ms 50
+
+Clients use stt_client.py (transcribe_remote, server_available), which
+doesn't import torch or Whisper.
+"""
+
+import argparse
+import json
+import queue
+import threading
+import time
+import urllib.parse
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from whisper.audio import SAMPLE_RATE
+
+from audio_stream import audio_info
+from batch_stt import DURATION_BUCKETS, batched_cache_key
+from batched_stt import transcribe_batched_many
+from chunk_planner import WHISPER_WINDOW_SECONDS
+from encoder_cache import get_encoder_cache
+from memory_budget import estimate_job_mb, get_memory_budget
+from model_registry import SUPPORTED_DTYPES, get_model, get_registry, set_default_dtype
+from pcm_cache import open_pcm
+from stt_client import DEFAULT_HOST, DEFAULT_PORT
+from transcription_cache import get_cache
+
+# Requests longer than this (seconds) are transcribed on their own rather than batched
+MAX_BATCHED_DURATION = DURATION_BUCKETS[-1]
+
+# Number of recent requests kept for latency percentiles
+LATENCY_HISTORY = 1000
+
+
+class _Job:
+    """One queued transcription request"""
+
+    def __init__(self, model_size: str, language: Optional[str], task: str,
+                 audio: Optional[np.ndarray] = None, file_path: Optional[str] = None,
+                 cache_key: Optional[str] = None):
+        self.model_size = model_size
+        self.language = language
+        self.task = task
+        self.audio = audio  # 16 kHz float32 mono, for batched requests
+        self.file_path = file_path  # Long files transcribed through transcribe_audio_result
+        self.cache_key = cache_key
+        self.future: Future = Future()
+        self.arrival = time.perf_counter()
+        self.started: Optional[float] = None
+
+    @property
+    def windows(self) -> int:
+        if self.audio is None:
+            return 0
+        return max(1, -(-len(self.audio) // (WHISPER_WINDOW_SECONDS * SAMPLE_RATE)))
+
+
+class TranscriptionService:
+    def __init__(self, model_size: str = "base", batch_size: int = 8, latency_window: float = 0.05,
+                 use_cache: bool = True):
+        """
+        Request queue with an inference thread that batches concurrent requests,
+        and a second thread for files too long to batch
+
+        Args:
+            model_size (str): Default model, loaded at startup
+            batch_size (int): 30-second windows per encoder/decoder pass
+            latency_window (float): Seconds to wait after the first queued
+                request for others to join its batch
+            use_cache (bool): Reuse and store results in the transcription cache
+        """
+        self.model_size = model_size
+        self.batch_size = batch_size
+        self.latency_window = latency_window
+        self.use_cache = use_cache
+        self._queue: "queue.Queue[_Job]" = queue.Queue()
+        self._long_queue: "queue.Queue[_Job]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._completed = 0
+        self._failed = 0
+        self._batches = 0
+        self._batched_requests = 0
+        self._waits = deque(maxlen=LATENCY_HISTORY)
+        self._totals = deque(maxlen=LATENCY_HISTORY)
+        self._started = time.time()
+
+        get_model(model_size)
+        self._thread = threading.Thread(target=self._run, name="stt-inference", daemon=True)
+        self._thread.start()
+        self._long_thread = threading.Thread(target=self._run_long, name="stt-long-files", daemon=True)
+        self._long_thread.start()
+
+    def submit_file(self, file_path: str, model_size: Optional[str] = None, language: Optional[str] = None,
+                    task: str = "transcribe") -> Future:
+        """Queue a file on this machine; short files are decoded here and batched"""
+        model_size = model_size or self.model_size
+        cache_key = None
+        if self.use_cache:
+            cache_key = batched_cache_key(file_path, model_size, language, self.batch_size, task)
+            cached = get_cache().get(cache_key)
+            if cached is not None:
+                future = Future()
+                future.set_result(cached)
+                return future
+
+        if audio_info(file_path).duration > MAX_BATCHED_DURATION:
+            if task != "transcribe":
+                raise ValueError(f"task={task} is only supported for files up to {MAX_BATCHED_DURATION} seconds")
+            return self._enqueue(_Job(model_size, language, task, file_path=file_path), self._long_queue)
+        # Decode in the caller's thread so audio loading overlaps with inference
+        audio = open_pcm(file_path)
+        return self._enqueue(_Job(model_size, language, task, audio=audio, cache_key=cache_key))
+
+    def submit_audio(self, audio: np.ndarray, model_size: Optional[str] = None, language: Optional[str] = None,
+                     task: str = "transcribe") -> Future:
+        """Queue 16 kHz float32 mono audio"""
+        if len(audio) > MAX_BATCHED_DURATION * SAMPLE_RATE:
+            raise ValueError(f"PCM payloads are limited to {MAX_BATCHED_DURATION} seconds; send a file path instead")
+        return self._enqueue(_Job(model_size or self.model_size, language, task,
+                                  audio=np.asarray(audio, dtype=np.float32)))
+
+    def _enqueue(self, job: _Job, target: Optional[queue.Queue] = None) -> Future:
+        with self._lock:
+            self._in_flight += 1
+        (target or self._queue).put(job)
+        return job.future
+
+    def _collect(self) -> List[_Job]:
+        """Block for one request, then gather others until the window closes or a batch is full"""
+        jobs = [self._queue.get()]
+        deadline = jobs[0].arrival + self.latency_window
+        windows = jobs[0].windows
+        while windows < self.batch_size:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                job = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            jobs.append(job)
+            windows += job.windows
+        return jobs
+
+    def _run(self) -> None:
+        while True:
+            jobs = self._collect()
+            try:
+                self._dispatch(jobs)
+            except Exception as e:
+                # Keep the inference thread alive; fail whatever this round left unanswered
+                unanswered = [job for job in jobs if not job.future.done()]
+                if unanswered:
+                    self._finish(unanswered, error=e)
+
+    def _run_long(self) -> None:
+        # One long file at a time, so short requests keep the inference thread to themselves
+        while True:
+            job = self._long_queue.get()
+            job.started = time.perf_counter()
+            try:
+                self._process([job])
+            except Exception as e:
+                if not job.future.done():
+                    self._finish([job], error=e)
+
+    def _dispatch(self, jobs: List[_Job]) -> None:
+        now = time.perf_counter()
+        for job in jobs:
+            job.started = now
+
+        groups: Dict[tuple, List[_Job]] = {}
+        for job in jobs:
+            groups.setdefault((job.model_size, job.language, job.task), []).append(job)
+        for group in groups.values():
+            self._process(group)
+
+    def _process(self, jobs: List[_Job]) -> None:
+        try:
+            first = jobs[0]
+            if first.audio is None:
+                # Imported here to avoid a circular import with whisper_stt
+                from whisper_stt import transcribe_audio_result
+                results = [transcribe_audio_result(first.file_path, first.model_size, batch_size=self.batch_size,
+                                                   use_cache=self.use_cache, language=first.language)]
+            else:
+                model = get_model(first.model_size)
+                windows = sum(job.windows for job in jobs)
+                peak_mb = estimate_job_mb(first.model_size, windows * WHISPER_WINDOW_SECONDS, self.batch_size,
+                                          prefetch_depth=0, batched=True, encoder_cache=True)
+                with get_memory_budget().reserve(peak_mb, f"{len(jobs)} requests"):
+                    # The same audio sent again with another task or language skips the encoder
+                    results = transcribe_batched_many(model, [job.audio for job in jobs], self.batch_size,
+                                                      language=first.language, task=first.task,
+                                                      encoder_cache=get_encoder_cache(first.model_size))
+                with self._lock:
+                    self._batches += 1
+                    self._batched_requests += len(jobs)
+        except Exception as e:
+            self._finish(jobs, error=e)
+            return
+
+        self._finish(jobs, results=results)
+        for job, result in zip(jobs, results):
+            if job.cache_key is not None:
+                try:
+                    get_cache().put(job.cache_key, result)
+                except Exception as e:
+                    # The caller already has the result; only the cache entry is lost
+                    print(f"Could not cache a result: {e}")
+
+    def _finish(self, jobs: List[_Job], results: Optional[List[Dict]] = None,
+                error: Optional[Exception] = None) -> None:
+        done = time.perf_counter()
+        with self._lock:
+            self._in_flight -= len(jobs)
+            for job in jobs:
+                self._waits.append(job.started - job.arrival)
+                self._totals.append(done - job.arrival)
+            if error is None:
+                self._completed += len(jobs)
+            else:
+                self._failed += len(jobs)
+        for i, job in enumerate(jobs):
+            if error is None:
+                job.future.set_result(results[i])
+            else:
+                job.future.set_exception(error)
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, throughput counters and latency percentiles in milliseconds"""
+        def percentiles(values):
+            if not values:
+                return {"p50": None, "p95": None, "max": None}
+            p50, p95 = np.percentile(values, [50, 95])
+            return {"p50": round(1000 * p50, 1), "p95": round(1000 * p95, 1), "max": round(1000 * max(values), 1)}
+
+        with self._lock:
+            waits, totals = list(self._waits), list(self._totals)
+            queue_depth = self._queue.qsize() + self._long_queue.qsize()
+            stats = dict(queue_depth=queue_depth, in_flight=self._in_flight,
+                         completed=self._completed, failed=self._failed, batches=self._batches,
+                         mean_batch_requests=round(self._batched_requests / self._batches, 2) if self._batches else None)
+        stats.update(queue_wait_ms=percentiles(waits), latency_ms=percentiles(totals),
+                     uptime_seconds=round(time.time() - self._started, 1),
+                     resident_models=[list(key) for key in get_registry().keys()])
+        return stats
+
+
+def _make_handler(service: TranscriptionService):
+    class Handler(BaseHTTPRequestHandler):
+        def _send_json(self, status: int, payload: Dict) -> None:
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            path = urllib.parse.urlparse(self.path).path
+            if path == "/stats":
+                self._send_json(200, service.stats())
+            elif path == "/health":
+                self._send_json(200, {"status": "ok"})
+            else:
+                self._send_json(404, {"error": f"Unknown endpoint: {path}"})
+
+        def do_POST(self):
+            url = urllib.parse.urlparse(self.path)
+            if url.path != "/transcribe":
+                self._send_json(404, {"error": f"Unknown endpoint: {url.path}"})
+                return
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            try:
+                if self.headers.get("Content-Type", "").startswith("application/octet-stream"):
+                    params = {key: values[-1] for key, values in urllib.parse.parse_qs(url.query).items()}
+                    if params.get("format", "f32le") == "s16le":
+                        audio = np.frombuffer(body, dtype="<i2").astype(np.float32) / 32768.0
+                    else:
+                        audio = np.frombuffer(body, dtype="<f4")
+                    future = service.submit_audio(audio, params.get("model"), params.get("language"),
+                                                  params.get("task", "transcribe"))
+                else:
+                    request = json.loads(body or b"{}")
+                    future = service.submit_file(request["path"], request.get("model"), request.get("language"),
+                                                 request.get("task", "transcribe"))
+                self._send_json(200, future.result())
+            except (KeyError, ValueError, FileNotFoundError, RuntimeError) as e:
+                self._send_json(400, {"error": str(e)})
+            except Exception as e:
+                self._send_json(500, {"error": str(e)})
+
+        def log_message(self, format, *args):
+            pass  # Keep the console for service output
+
+    return Handler
+
+
+def serve(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, **service_options) -> None:
+    """Run the transcription service until interrupted"""
+    service = TranscriptionService(**service_options)
+    server = ThreadingHTTPServer((host, port), _make_handler(service))
+    print(f"Transcription service listening on http://{host}:{port} "
+          f"(model: {service.model_size}, batch size: {service.batch_size}, "
+          f"latency window: {1000 * service.latency_window:.0f} ms)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopping transcription service")
+    finally:
+        server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Warm local Whisper transcription service")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"Address to bind (default: {DEFAULT_HOST})")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Port (default: {DEFAULT_PORT})")
+    parser.add_argument("--model", default="base",
+                        help="Model loaded at startup: tiny, base, small, medium, large (default: base)")
+    parser.add_argument("--batch-size", type=int, default=8,
+                        help="30-second windows per batched encoder/decoder pass (default: 8)")
+    parser.add_argument("--latency-ms", type=float, default=50,
+                        help="How long a request waits for others to join its batch (default: 50)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Don't reuse or store results in the transcription cache")
+    parser.add_argument("--dtype", choices=SUPPORTED_DTYPES, default=None,
+                        help="Weight precision; int8 quantizes Linear layers for faster CPU inference "
+                             "(default: fp32, or $WHISPER_STT_DTYPE)")
+    args = parser.parse_args()
+    if args.dtype:
+        set_default_dtype(args.dtype)
+
+    serve(args.host, args.port, model_size=args.model, batch_size=args.batch_size,
+          latency_window=args.latency_ms / 1000, use_cache=not args.no_cache)
+
+
+if __name__ == "__main__":
+    main()
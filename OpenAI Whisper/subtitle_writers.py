@@ -0,0 +1,103 @@
+"""
+Incremental transcript writers
+
+Each writer appends one segment at a time and flushes it, so the file on
+disk grows while a long transcription is still running and a downstream
+reader can start on it immediately. Nothing but the open file is kept in
+memory.
+
+Formats: SRT (.srt), WebVTT (.vtt), JSON lines (.jsonl) and plain text (.txt).
+"""
+
+import json
+import os
+from typing import Dict, List, Sequence
+
+WRITER_EXTENSIONS = ("srt", "vtt", "jsonl", "txt")
+
+
+def format_timestamp(seconds: float, decimal_marker: str = ".") -> str:
+    """Format seconds as HH:MM:SS.mmm (SRT uses ',' as the decimal marker)"""
+    milliseconds = max(0, round(seconds * 1000))
+    hours, milliseconds = divmod(milliseconds, 3_600_000)
+    minutes, milliseconds = divmod(milliseconds, 60_000)
+    seconds, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}{decimal_marker}{milliseconds:03d}"
+
+
+class SegmentWriter:
+    """Base class: opens the file, writes a header, appends and flushes segments"""
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.count = 0
+        self._file = open(path, "w", encoding="utf-8")
+        self._file.write(self.header())
+        self._file.flush()
+
+    def header(self) -> str:
+        return ""
+
+    def format(self, segment: Dict) -> str:
+        raise NotImplementedError
+
+    def write(self, segment: Dict) -> None:
+        """Append one segment and flush it to disk"""
+        self.count += 1
+        self._file.write(self.format(segment))
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class SRTWriter(SegmentWriter):
+    def format(self, segment: Dict) -> str:
+        return (f"{self.count}\n"
+                f"{format_timestamp(segment['start'], ',')} --> {format_timestamp(segment['end'], ',')}\n"
+                f"{segment['text'].strip().replace('-->', '->')}\n\n")
+
+
+class WebVTTWriter(SegmentWriter):
+    def header(self) -> str:
+        return "WEBVTT\n\n"
+
+    def format(self, segment: Dict) -> str:
+        return (f"{format_timestamp(segment['start'])} --> {format_timestamp(segment['end'])}\n"
+                f"{segment['text'].strip().replace('-->', '->')}\n\n")
+
+
+class JSONLWriter(SegmentWriter):
+    def format(self, segment: Dict) -> str:
+        return json.dumps(segment, ensure_ascii=False) + "\n"
+
+
+class TextWriter(SegmentWriter):
+    def format(self, segment: Dict) -> str:
+        return segment["text"].strip() + "\n"
+
+
+_WRITERS = {"srt": SRTWriter, "vtt": WebVTTWriter, "jsonl": JSONLWriter, "txt": TextWriter}
+
+
+def open_writers(original_file_path: str, formats: Sequence[str] = WRITER_EXTENSIONS,
+                 output_dir: str = "output") -> List[SegmentWriter]:
+    """
+    Open one writer per format next to the other outputs for a file
+
+    Files are named <base>_transcription.<format>, e.g. output/talk_transcription.srt.
+    """
+    base_name = os.path.splitext(os.path.basename(original_file_path))[0]
+    unknown = [name for name in formats if name not in _WRITERS]
+    if unknown:
+        raise ValueError(f"Unknown output format(s): {', '.join(unknown)} (choose from {', '.join(_WRITERS)})")
+    return [_WRITERS[name](os.path.join(output_dir, f"{base_name}_transcription.{name}")) for name in formats]
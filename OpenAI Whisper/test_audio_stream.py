@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Test script for the streaming audio chunk reader
+"""
+
+import os
+import tempfile
+
+import numpy as np
+import soundfile as sf
+
+from audio_stream import iter_audio_chunks, read_audio_range
+from resampler import StreamingResampler, resample
+
+
+def create_stereo_audio(filename, duration_seconds=7.5, sample_rate=8000):
+    """Create a short stereo file with different content in each channel"""
+    rng = np.random.default_rng(1)
+    audio_data = rng.uniform(-0.5, 0.5, (int(duration_seconds * sample_rate), 2))
+    sf.write(filename, audio_data, sample_rate, subtype="FLOAT")
+    return audio_data
+
+
+def test_chunks_match_full_read():
+    """Streamed chunks should reassemble to the same mono mix as a full read"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        filename = os.path.join(tmp_dir, "stereo.wav")
+        audio_data = create_stereo_audio(filename)
+        expected = audio_data.mean(axis=1)
+
+        chunks = list(iter_audio_chunks(filename, chunk_duration=2, block_frames=1000))
+
+        assert len(chunks) == 4  # 2 + 2 + 2 + 1.5 seconds
+        assert all(chunk.dtype == np.float32 for _, _, chunk in chunks)
+        assert chunks[0][:2] == (0, 16000)
+        assert chunks[-1][:2] == (48000, 60000)
+        streamed = np.concatenate([chunk for _, _, chunk in chunks])
+        assert np.allclose(streamed, expected, atol=1e-6)
+
+
+def test_read_audio_range():
+    """A seeked range read should match the same slice of the full file"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        filename = os.path.join(tmp_dir, "stereo.wav")
+        audio_data = create_stereo_audio(filename)
+
+        chunk = read_audio_range(filename, 12345, 23456, block_frames=777)
+        assert np.allclose(chunk, audio_data[12345:23456].mean(axis=1), atol=1e-6)
+
+        # Ranges past the end of the file are clipped
+        tail = read_audio_range(filename, 59000, 70000)
+        assert len(tail) == 1000
+
+
+def test_resampler_accuracy():
+    """Resampled tones should match the same tones generated at 16 kHz, block by block or whole"""
+    for sample_rate in (44100, 48000, 8000):
+        t = np.arange(3 * sample_rate) / sample_rate
+        audio = (0.5 * np.sin(2 * np.pi * 440 * t) + 0.2 * np.sin(2 * np.pi * 3000 * t)).astype(np.float32)
+
+        whole = resample(audio, sample_rate)
+        resampler = StreamingResampler(sample_rate)
+        streamed = np.concatenate([resampler.process(audio[i:i + 777]) for i in range(0, len(audio), 777)]
+                                  + [resampler.flush()])
+
+        t16 = np.arange(len(whole)) / 16000
+        expected = 0.5 * np.sin(2 * np.pi * 440 * t16) + 0.2 * np.sin(2 * np.pi * 3000 * t16)
+        assert len(whole) == len(streamed) == 48000
+        assert np.allclose(streamed, whole, atol=1e-6)
+        assert np.abs(whole - expected)[1000:-1000].max() < 1e-3
+
+
+def test_resampled_chunks_are_seamless():
+    """Resampled chunks, contiguous or not, should equal slices of the whole file resampled at once"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        filename = os.path.join(tmp_dir, "stereo.wav")
+        sample_rate = 44100
+        audio_data = create_stereo_audio(filename, sample_rate=sample_rate)
+        whole = resample(audio_data.mean(axis=1).astype(np.float32), sample_rate)
+
+        chunks = list(iter_audio_chunks(filename, chunk_duration=2, block_frames=1000, sample_rate=16000))
+        assert chunks[1][:2] == (88200, 176400)
+        assert np.allclose(np.concatenate([chunk for _, _, chunk in chunks]), whole, atol=1e-5)
+
+        ranges = [(0, 44100), (132300, 176400), (176400, 220500)]
+        for start, end, chunk in iter_audio_chunks(filename, ranges=ranges, sample_rate=16000):
+            out_start, out_end = -(-start * 16000 // sample_rate), -(-end * 16000 // sample_rate)
+            assert np.allclose(chunk, whole[out_start:out_end], atol=1e-5)
+
+        chunk = read_audio_range(filename, 100000, 200000, sample_rate=16000)
+        assert np.allclose(chunk, whole[-(-100000 * 16000 // sample_rate):-(-200000 * 16000 // sample_rate)],
+                           atol=1e-5)
+
+
+def test_reused_buffer():
+    """With reuse_buffer every chunk should land in one buffer, with the same samples as fresh ones"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        filename = os.path.join(tmp_dir, "stereo.wav")
+        create_stereo_audio(filename)
+        for sample_rate in (None, 16000):
+            fresh = [chunk for _, _, chunk in iter_audio_chunks(filename, chunk_duration=2, sample_rate=sample_rate)]
+            reused = []
+            for i, (_, _, chunk) in enumerate(iter_audio_chunks(filename, chunk_duration=2, sample_rate=sample_rate,
+                                                                reuse_buffer=True)):
+                assert np.array_equal(chunk, fresh[i])
+                reused.append(chunk)
+            assert len(reused) == 4 and all(np.shares_memory(chunk, reused[0]) for chunk in reused)
+
+
+def main():
+    print("Streaming Audio Reader Test")
+    print("=" * 30)
+
+    test_chunks_match_full_read()
+    print("✓ Streamed chunks match full read")
+    test_read_audio_range()
+    print("✓ Range reads match full read")
+    test_resampler_accuracy()
+    print("✓ Resampler matches reference tones")
+    test_resampled_chunks_are_seamless()
+    print("✓ Resampled chunks are seamless")
+    test_reused_buffer()
+    print("✓ Chunks read into one reused buffer")
+
+    print("\nTest completed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Test script for batch input expansion and duration bucketing
+"""
+
+import os
+import tempfile
+
+import numpy as np
+import soundfile as sf
+import torch
+from whisper.model import ModelDimensions, Whisper
+
+import batch_stt
+from batch_stt import bucket_by_duration, expand_inputs, output_names, transcribe_files
+from transcription_cache import TranscriptionCache
+
+# Multilingual vocabulary so the real tokenizer applies; everything else tiny
+DIMS = ModelDimensions(n_mels=80, n_audio_ctx=1500, n_audio_state=32, n_audio_head=2, n_audio_layer=1,
+                       n_vocab=51865, n_text_ctx=32, n_text_state=32, n_text_head=2, n_text_layer=1)
+
+
+def test_expand_inputs():
+    """Directories, globs and plain files should expand to unique audio files"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.makedirs(os.path.join(tmp_dir, "sub"))
+        for name in ("a.wav", "b.MP3", "notes.txt", os.path.join("sub", "c.flac")):
+            open(os.path.join(tmp_dir, name), "w").close()
+
+        from_dir = expand_inputs([tmp_dir])
+        from_glob = expand_inputs([os.path.join(tmp_dir, "**", "*")])
+        mixed = expand_inputs([os.path.join(tmp_dir, "a.wav"), tmp_dir])
+
+        expected = sorted(os.path.join(tmp_dir, name) for name in ("a.wav", "b.MP3", os.path.join("sub", "c.flac")))
+        assert from_dir == expected
+        assert from_glob == expected
+        assert mixed == expected
+
+
+def test_output_names():
+    """Same-named files in different folders get different outputs; true collisions are refused"""
+    names = output_names([os.path.join("rec", "a", "talk.wav"), os.path.join("rec", "b", "talk.wav")])
+    assert sorted(names.values()) == [os.path.join("a", "talk"), os.path.join("b", "talk")]
+    assert list(output_names([os.path.join("rec", "talk.wav")]).values()) == ["talk"]
+    try:
+        output_names([os.path.join("rec", "talk.mp3"), os.path.join("rec", "talk.wav")])
+        raise AssertionError("expected a ValueError for two files saved under one name")
+    except ValueError as e:
+        assert "talk" in str(e)
+
+
+def test_bucket_by_duration():
+    """Files should land in the smallest bucket that fits, sorted by duration"""
+    durations = {"long.wav": 3600.0, "medium.wav": 90.0, "short2.wav": 20.0, "short1.wav": 4.0, "ten.wav": 600.0}
+
+    buckets, long_files = bucket_by_duration(durations)
+
+    assert buckets[30] == ["short1.wav", "short2.wav"]
+    assert buckets[120] == ["medium.wav"]
+    assert buckets[600] == ["ten.wav"]
+    assert long_files == ["long.wav"]
+
+
+def test_failed_group():
+    """A batch that fails should be retried file by file so only the bad file is lost"""
+    calls = []
+
+    def transcribe_batched_many(model, audios, batch_size, language=None, **kwargs):
+        calls.append(len(audios))
+        if any(len(audio) == 40000 for audio in audios):
+            raise RuntimeError("bad window")
+        return [dict(text=str(len(audio)), segments=[], language=language) for audio in audios]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        torch.manual_seed(0)
+        model = Whisper(DIMS)
+        checkpoint = os.path.join(tmp_dir, "toy.pt")
+        torch.save(dict(dims=DIMS.__dict__, model_state_dict=model.state_dict()), checkpoint)
+        files = []
+        for name, samples in (("a.wav", 16000), ("bad.wav", 40000), ("c.wav", 24000)):
+            files.append(os.path.join(tmp_dir, name))
+            sf.write(files[-1], np.zeros(samples, dtype=np.float32), 16000, subtype="FLOAT")
+
+        original = batch_stt.transcribe_batched_many, batch_stt.get_cache
+        cache = TranscriptionCache(cache_dir=os.path.join(tmp_dir, "cache"))
+        batch_stt.transcribe_batched_many, batch_stt.get_cache = transcribe_batched_many, lambda: cache
+        try:
+            results = transcribe_files(files, checkpoint, language="en")
+            # The second run is served from the cache, except the file that failed
+            reported = []
+            transcribe_files(files, checkpoint, language="en",
+                             on_result=lambda path, result, cached: reported.append((path, cached)))
+        finally:
+            batch_stt.transcribe_batched_many, batch_stt.get_cache = original
+
+    assert calls == [3, 1, 1, 1, 1]
+    assert sorted(reported) == [(files[0], True), (files[1], False), (files[2], True)]
+    assert results[files[1]] is None
+    assert results[files[0]]["text"] == "16000" and results[files[2]]["text"] == "24000"
+
+
+def main():
+    print("Batch Transcription Test")
+    print("=" * 24)
+
+    test_expand_inputs()
+    print("✓ Inputs expand to unique audio files")
+    test_output_names()
+    print("✓ Output names follow the path and refuse collisions")
+    test_bucket_by_duration()
+    print("✓ Files are bucketed by duration")
+    test_failed_group()
+    print("✓ Failed batch retried file by file")
+
+    print("\nTest completed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Test script comparing the batched engine with model.transcribe
+"""
+
+import os
+
+import numpy as np
+import torch
+from whisper.audio import SAMPLE_RATE
+from whisper.model import ModelDimensions, Whisper
+
+from audio_stream import iter_audio_chunks
+from batched_stt import transcribe_batched
+
+SAMPLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sample_test.wav")
+
+# Multilingual vocabulary so the real tokenizer applies; everything else tiny
+DIMS = ModelDimensions(n_mels=80, n_audio_ctx=1500, n_audio_state=32, n_audio_head=2, n_audio_layer=1,
+                       n_vocab=51865, n_text_ctx=32, n_text_state=32, n_text_head=2, n_text_layer=1)
+
+
+def toy_model():
+    torch.manual_seed(0)
+    model = Whisper(DIMS).eval()
+    # Whisper leaves the decoder's positional embedding uninitialized
+    torch.nn.init.normal_(model.decoder.positional_embedding, std=0.02)
+    return model
+
+
+def sample_audio():
+    """The committed sample, then 25 s of silence and the sample twice more (two windows)"""
+    speech = np.concatenate([chunk for _, _, chunk in iter_audio_chunks(SAMPLE, sample_rate=SAMPLE_RATE)])
+    return np.concatenate([speech, np.zeros(25 * SAMPLE_RATE, dtype=np.float32), speech, speech])
+
+
+def reference(model, audio, temperature):
+    # The batched engine decodes windows independently, so compare without conditioning
+    torch.manual_seed(1)
+    return model.transcribe(audio, language="en", temperature=temperature, fp16=False,
+                            condition_on_previous_text=False)
+
+
+def assert_same_segments(expected, actual, offset=0.0):
+    assert len(expected) == len(actual) > 0
+    for a, b in zip(expected, actual):
+        assert set(a) == set(b)
+        assert (a["id"], a["seek"], a["tokens"], a["text"], a["temperature"]) == \
+            (b["id"], b["seek"], b["tokens"], b["text"], b["temperature"])
+        assert np.isclose(a["start"] + offset, b["start"]) and np.isclose(a["end"] + offset, b["end"])
+        for key in ("avg_logprob", "compression_ratio", "no_speech_prob"):
+            assert np.isclose(a[key], b[key], atol=1e-4)
+
+
+def test_same_as_transcribe():
+    """At temperature 0 the batched engine should produce model.transcribe's segments"""
+    model = toy_model()
+    audio = sample_audio()
+    expected = reference(model, audio, 0.0)
+    actual = transcribe_batched(model, audio, batch_size=4, language="en", temperature=0.0)
+    assert set(actual) == set(expected)
+    assert actual["text"] == expected["text"] and actual["language"] == expected["language"]
+    assert_same_segments(expected["segments"], actual["segments"])
+    assert [segment["seek"] for segment in actual["segments"]] == [0, 3000]
+
+
+def test_file_time():
+    """Timestamps should be shifted onto the file's timeline by the chunk's offset"""
+    model = toy_model()
+    audio = sample_audio()
+    expected = reference(model, audio, 0.0)
+    actual = transcribe_batched(model, audio, batch_size=4, language="en", temperature=0.0, time_offset=600.0)
+    assert_same_segments(expected["segments"], actual["segments"], offset=600.0)
+
+
+def test_same_fallback():
+    """Windows that fail should fall back through the same temperatures as model.transcribe"""
+    model = toy_model()
+    audio = sample_audio()
+    temperatures = (0.0, 0.2, 0.4)
+    expected = reference(model, audio, temperatures)
+    # One window per pass so the sampling draws come in the same order
+    torch.manual_seed(1)
+    actual = transcribe_batched(model, audio, batch_size=1, language="en", temperature=temperatures)
+    assert_same_segments(expected["segments"], actual["segments"])
+    assert all(segment["temperature"] > 0 for segment in actual["segments"])
+
+
+def main():
+    print("Batched Engine Test")
+    print("=" * 19)
+
+    test_same_as_transcribe()
+    print("✓ Same segments as model.transcribe at temperature 0")
+    test_file_time()
+    print("✓ Timestamps in file time")
+    test_same_fallback()
+    print("✓ Same temperature fallback")
+
+    print("\nTest completed!")
+
+
+if __name__ == "__main__":
+    main()
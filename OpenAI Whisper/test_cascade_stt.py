@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Test script for the confidence-driven model cascade
+"""
+
+import numpy as np
+
+from cascade_stt import escalation_spans, merge_by_timestamp, transcribe_cascade, weak_reasons
+
+
+def segment(start, end, text, avg_logprob=-0.2, compression_ratio=1.5, no_speech_prob=0.1):
+    return dict(start=start, end=end, text=text, avg_logprob=avg_logprob,
+                compression_ratio=compression_ratio, no_speech_prob=no_speech_prob)
+
+
+class FakeModel:
+    """Returns fixed segments (in the time of the audio it is given) and records its calls"""
+
+    def __init__(self, segments):
+        self.segments = segments
+        self.calls = []
+
+    def transcribe(self, audio, **options):
+        self.calls.append((len(audio) / 16000, options))
+        return dict(text="".join(s["text"] for s in self.segments),
+                    segments=[dict(s) for s in self.segments], language="en")
+
+
+def test_weak_segments():
+    """Segments failing any threshold should be grouped into escalation spans"""
+    segments = [segment(0, 4, " fine"), segment(4, 8, " mumble", avg_logprob=-1.5),
+                segment(8.5, 10, " la la la la", compression_ratio=3.0), segment(12, 16, " fine"),
+                segment(20, 22, " ghost", no_speech_prob=0.9)]
+    reasons = [weak_reasons(s) for s in segments]
+    assert reasons == [[], ["avg_logprob"], ["compression_ratio"], [], ["no_speech_prob"]]
+    assert escalation_spans(segments, [bool(r) for r in reasons]) == [(4, 10), (20, 22)]
+
+
+def test_merge_by_timestamp():
+    """Weak segments should be replaced by the large model's, without duplicating context"""
+    small = [segment(0, 4, " a"), segment(4, 8, " b?"), segment(8, 12, " c")]
+    large = [segment(3, 4, " a"), segment(4, 6, " b1"), segment(6, 8, " b2"), segment(8, 9, " c")]
+    merged = merge_by_timestamp(small, large, [(4, 8)])
+    assert [s["text"] for s in merged] == [" a", " b1", " b2", " c"]
+
+    # Nothing from the large model inside a span: keep the small model's text unless it was likely silence
+    small = [segment(0, 4, " a"), segment(4, 6, " b?"), segment(6, 8, " ghost"), segment(12, 14, " d?")]
+    reasons = [[], ["avg_logprob"], ["avg_logprob", "no_speech_prob"], ["compression_ratio"]]
+    large = [segment(3, 4, " a"), segment(12, 14, " d")]
+    merged = merge_by_timestamp(small, large, [(4, 8), (12, 14)], reasons)
+    assert [s["text"] for s in merged] == [" a", " b?", " d"]
+
+
+def test_cascade_escalates_only_weak_spans():
+    """Only the weak span (plus context) should reach the large model"""
+    small = FakeModel([segment(0, 10, " good"), segment(10, 14, " bad", avg_logprob=-2.0),
+                       segment(14, 30, " good")])
+    # The large model sees 9..15 s; its segments are relative to that span
+    large = FakeModel([segment(0.0, 1.0, " context"), segment(1.0, 5.0, " fixed"), segment(5.0, 6.0, " context")])
+    audio = np.zeros(30 * 16000, dtype=np.float32)
+
+    result = transcribe_cascade(small, large, audio, language="en", time_offset=60.0)
+    assert len(large.calls) == 1 and abs(large.calls[0][0] - 6.0) < 1e-6
+    assert large.calls[0][1]["initial_prompt"] == " good"
+    assert [s["text"] for s in result["segments"]] == [" good", " fixed", " good"]
+    assert [(s["start"], s["end"]) for s in result["segments"]] == [(60, 70), (70, 74), (74, 90)]
+    assert result["cascade"]["escalated_seconds"] == 4 and result["cascade"]["reasons"] == {"avg_logprob": 1}
+
+
+def main():
+    print("Model Cascade Test")
+    print("=" * 18)
+
+    test_weak_segments()
+    print("✓ Weak segments grouped into spans")
+    test_merge_by_timestamp()
+    print("✓ Results merged by timestamp")
+    test_cascade_escalates_only_weak_spans()
+    print("✓ Only weak spans escalated")
+
+    print("\nTest completed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Test script for the resumable chunk journal
+"""
+
+import os
+import tempfile
+
+from chunk_journal import ChunkJournal, journal_path, open_journal
+
+PLAN = [(0, 100), (100, 200), (200, 300)]
+FINGERPRINT = {"model": "tiny", "audio": "abc"}
+
+
+def test_resume_skips_finished_chunks():
+    """A reopened journal with the same plan should report finished chunks"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "output", "audio_journal.jsonl")
+
+        journal = ChunkJournal(path, PLAN, FINGERPRINT)
+        assert journal.pending() == [0, 1, 2]
+        journal.append(0, {"text": "first", "segments": [], "language": "en"})
+        journal.append(2, {"text": "third", "segments": [], "language": "en"})
+
+        resumed = ChunkJournal(path, PLAN, FINGERPRINT)
+        assert resumed.pending() == [1]
+        assert resumed.completed[2]["text"] == "third"
+
+        resumed.remove()
+        assert not os.path.exists(path)
+
+
+def test_torn_write_is_dropped():
+    """A half-written last line from a crash should be ignored and cleaned up"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "audio_journal.jsonl")
+
+        journal = ChunkJournal(path, PLAN, FINGERPRINT)
+        journal.append(0, {"text": "first", "segments": [], "language": "en"})
+        with open(path, "a", encoding="utf-8") as f:
+            f.write('{"type": "chunk", "index": 1, "sta')
+
+        resumed = ChunkJournal(path, PLAN, FINGERPRINT)
+        assert resumed.pending() == [1, 2]
+        resumed.append(1, {"text": "second", "segments": [], "language": "en"})
+        assert ChunkJournal(path, PLAN, FINGERPRINT).pending() == [2]
+
+
+def test_mismatched_run_starts_over():
+    """A journal from a different model or plan must not be reused"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "audio_journal.jsonl")
+
+        ChunkJournal(path, PLAN, FINGERPRINT).append(0, {"text": "first", "segments": [], "language": "en"})
+
+        assert ChunkJournal(path, PLAN, {**FINGERPRINT, "model": "base"}).pending() == [0, 1, 2]
+        assert ChunkJournal(path, PLAN[:2], FINGERPRINT).pending() == [0, 1]
+
+
+def test_same_name_different_directories():
+    """Files with the same name in different directories must not share a journal"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        first = os.path.join(tmp_dir, "a", "talk.wav")
+        second = os.path.join(tmp_dir, "b", "talk.wav")
+        output_dir = os.path.join(tmp_dir, "output")
+        assert journal_path(first, output_dir) != journal_path(second, output_dir)
+        # The same file named relative to the working directory keeps its journal
+        assert journal_path(os.path.relpath(first), output_dir) == journal_path(first, output_dir)
+
+        open_journal(first, PLAN, FINGERPRINT, output_dir).append(0, {"text": "a", "segments": [], "language": "en"})
+        assert open_journal(second, PLAN, FINGERPRINT, output_dir).pending() == [0, 1, 2]
+        assert open_journal(first, PLAN, FINGERPRINT, output_dir).pending() == [1, 2]
+
+
+def main():
+    print("Chunk Journal Test")
+    print("=" * 20)
+
+    test_resume_skips_finished_chunks()
+    print("✓ Finished chunks are skipped on resume")
+    test_torn_write_is_dropped()
+    print("✓ Torn writes are dropped")
+    test_mismatched_run_starts_over()
+    print("✓ Mismatched journals are discarded")
+    test_same_name_different_directories()
+    print("✓ Same-named files keep separate journals")
+
+    print("\nTest completed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Test script for the silence-aligned chunk planner
+"""
+
+import os
+import tempfile
+
+import numpy as np
+import soundfile as sf
+
+from chunk_planner import compute_frame_rms, plan_chunks
+
+
+def create_speech_like_audio(filename, duration_seconds=200, sample_rate=8000, gaps=(55.0, 112.0, 170.0)):
+    """Create noise 'speech' with short silent gaps at known times"""
+    rng = np.random.default_rng(2)
+    audio_data = rng.normal(0, 0.2, int(duration_seconds * sample_rate))
+    for gap in gaps:
+        audio_data[int(gap * sample_rate):int((gap + 0.5) * sample_rate)] = 0.0
+    sf.write(filename, audio_data, sample_rate)
+    return sample_rate
+
+
+def test_frame_rms():
+    """Frame RMS from the streaming pass should match a direct computation"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        filename = os.path.join(tmp_dir, "speech.wav")
+        create_speech_like_audio(filename, duration_seconds=10)
+        audio_data, _ = sf.read(filename, dtype="float32")
+
+        rms, frame_size = compute_frame_rms(filename, frame_duration=0.02, frames_per_block=7)
+        expected = np.sqrt((audio_data[:len(rms) * frame_size].reshape(-1, frame_size) ** 2).mean(axis=1))
+
+        assert frame_size == 160
+        assert np.allclose(rms, expected, atol=1e-5)
+
+
+def test_boundaries_land_in_gaps():
+    """Boundaries should fall in the silent gaps and never exceed the whole-window target"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        filename = os.path.join(tmp_dir, "speech.wav")
+        sample_rate = create_speech_like_audio(filename)
+
+        plan = plan_chunks(filename, chunk_duration=60, search_duration=10)
+
+        assert plan[0][0] == 0
+        assert plan[-1][1] == 200 * sample_rate
+        assert all(end == next_start for (_, end), (next_start, _) in zip(plan, plan[1:]))
+        assert all(end - start <= 60 * sample_rate for start, end in plan)
+
+        boundaries = [end / sample_rate for _, end in plan[:-1]]
+        assert len(boundaries) == 3
+        for boundary, gap in zip(boundaries, (55.0, 112.0, 170.0)):
+            assert gap <= boundary <= gap + 0.5
+
+
+def main():
+    print("Chunk Planner Test")
+    print("=" * 20)
+
+    test_frame_rms()
+    print("✓ Frame RMS matches direct computation")
+    test_boundaries_land_in_gaps()
+    print("✓ Boundaries land in silent gaps")
+
+    print("\nTest completed!")
+
+
+if __name__ == "__main__":
+    main()
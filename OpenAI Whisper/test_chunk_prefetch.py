@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Test script for the background chunk prefetch pipeline
+"""
+
+import threading
+import time
+
+import numpy as np
+import torch
+from whisper.model import ModelDimensions, Whisper
+
+from batched_stt import padded_mel, transcribe_batched
+from chunk_prefetch import StageTimer, prefetch
+
+
+def test_order_and_bound():
+    """Items should arrive in order, with the reader at most depth + 1 items ahead"""
+    produced = []
+
+    def source():
+        for i in range(10):
+            produced.append(i)
+            yield i
+
+    for depth in (0, 1, 3):
+        produced.clear()
+        received = []
+        for item in prefetch(source(), prepare=lambda i: i * 2, depth=depth):
+            # Give the reader time to run ahead as far as it can
+            time.sleep(0.02)
+            assert len(produced) - len(received) <= depth + 2
+            received.append(item)
+        assert received == [i * 2 for i in range(10)]
+
+
+def test_errors_and_early_stop():
+    """Reader errors should reach the consumer, and stopping early should end the thread"""
+    def failing():
+        yield 1
+        raise IOError("unreadable chunk")
+
+    received = []
+    try:
+        for item in prefetch(failing()):
+            received.append(item)
+        assert False, "error not raised"
+    except IOError as e:
+        assert "unreadable chunk" in str(e)
+    assert received == [1]
+
+    closed = threading.Event()
+
+    def endless():
+        try:
+            while True:
+                yield 0
+        finally:
+            closed.set()
+
+    items = prefetch(endless(), depth=2)
+    next(items)
+    items.close()
+    assert closed.is_set()
+    assert not any(thread.name == "chunk-prefetch" for thread in threading.enumerate())
+
+
+def test_timings():
+    """Preparation overlapping slow inference should be reported as hidden"""
+    def slow_read():
+        for i in range(4):
+            time.sleep(0.05)
+            yield i
+
+    timer = StageTimer()
+    for _ in prefetch(slow_read(), prepare=lambda i: i, timer=timer):
+        with timer.stage("inference"):
+            time.sleep(0.1)
+    assert timer.seconds["read"] >= 0.2
+    # Only the first read is waited for; the rest happen during inference
+    assert timer.hidden_seconds() >= 0.1
+    assert "hidden behind inference" in timer.summary()
+
+    inline = StageTimer()
+    for _ in prefetch(slow_read(), depth=0, timer=inline):
+        pass
+    assert inline.hidden_seconds() < 0.05
+
+
+def test_prepared_mel():
+    """A precomputed mel should transcribe like the audio it came from"""
+    dims = ModelDimensions(n_mels=80, n_audio_ctx=1500, n_audio_state=32, n_audio_head=2, n_audio_layer=1,
+                           n_vocab=51865, n_text_ctx=32, n_text_state=32, n_text_head=2, n_text_layer=1)
+    torch.manual_seed(0)
+    model = Whisper(dims).eval()
+    # Whisper leaves the decoder's positional embedding uninitialized
+    torch.nn.init.normal_(model.decoder.positional_embedding, std=0.02)
+    audio = np.random.default_rng(0).normal(0, 0.1, 45 * 16000).astype(np.float32)
+
+    expected = transcribe_batched(model, audio, language="en", temperature=0.0)
+    result = transcribe_batched(model, padded_mel(audio, dims.n_mels), language="en", temperature=0.0)
+    assert result["text"] == expected["text"]
+    assert [s["end"] for s in result["segments"]] == [s["end"] for s in expected["segments"]]
+
+
+def main():
+    print("Chunk Prefetch Test")
+    print("=" * 19)
+
+    test_order_and_bound()
+    print("✓ Chunks in order with bounded read-ahead")
+    test_errors_and_early_stop()
+    print("✓ Read errors raised and reader stopped early")
+    test_timings()
+    print("✓ Hidden preparation time reported")
+    test_prepared_mel()
+    print("✓ Precomputed mel transcribes like raw audio")
+
+    print("\nTest completed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Test script for the per-window encoder output cache
+"""
+
+import tempfile
+
+import numpy as np
+import torch
+from whisper.decoding import DecodingOptions, decode
+from whisper.model import ModelDimensions, Whisper
+
+from batched_stt import transcribe_batched
+from encoder_cache import CachedEncoderModel, EncoderCache
+
+# Multilingual vocabulary so the real tokenizer applies; everything else tiny
+DIMS = ModelDimensions(n_mels=80, n_audio_ctx=1500, n_audio_state=32, n_audio_head=2, n_audio_layer=1,
+                       n_vocab=51865, n_text_ctx=32, n_text_state=32, n_text_head=2, n_text_layer=1)
+
+
+def counting_model():
+    """Random model that counts the windows its encoder sees"""
+    torch.manual_seed(0)
+    model = Whisper(DIMS).eval()
+    # Whisper leaves the decoder's positional embedding uninitialized
+    torch.nn.init.normal_(model.decoder.positional_embedding, std=0.02)
+    model.encoded_windows = 0
+
+    def count(module, inputs, output):
+        model.encoded_windows += inputs[0].shape[0]
+    model.encoder.register_forward_hook(count)
+    return model
+
+
+def mels(count):
+    torch.manual_seed(5)
+    return torch.randn(count, DIMS.n_mels, 3000)
+
+
+def test_embed_only_uncached():
+    """Cached windows should skip the encoder and give the same output"""
+    model = counting_model()
+    cache = EncoderCache("test", persist=False)
+    windows = mels(3)
+    first = cache.embed(model, windows[:2])
+    assert model.encoded_windows == 2
+    both = cache.embed(model, windows)
+    assert model.encoded_windows == 3  # Only the third window was new
+    assert torch.equal(both[:2], first)
+    with torch.no_grad():
+        assert torch.equal(both[2], model.embed_audio(windows[2:])[0])
+    assert (cache.hits, cache.misses) == (2, 3)
+
+
+def test_disk_entries():
+    """A new cache on the same directory should find the windows on disk"""
+    model = counting_model()
+    window = mels(1)[0]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        expected = EncoderCache("test", persist=True, cache_dir=tmp_dir).embed(model, window)
+        reloaded = EncoderCache("test", persist=True, cache_dir=tmp_dir).embed(model, window)
+        assert model.encoded_windows == 1
+        assert torch.equal(reloaded, expected)
+        # Another model name has its own entries
+        EncoderCache("other", persist=True, cache_dir=tmp_dir).embed(model, window)
+        assert model.encoded_windows == 2
+
+
+def test_transcribe_and_translate():
+    """Decoding the same audio twice should encode each window once, with unchanged results"""
+    model = counting_model()
+    audio = np.random.default_rng(0).normal(0, 0.1, 45 * 16000).astype(np.float32)
+    options = dict(language="en", temperature=0.0)
+    expected = [transcribe_batched(model, audio, task=task, **options) for task in ("transcribe", "translate")]
+    model.encoded_windows = 0
+
+    cache = EncoderCache("test", persist=False)
+    results = [transcribe_batched(model, audio, task=task, encoder_cache=cache, **options)
+               for task in ("transcribe", "translate")]
+    assert model.encoded_windows == 2 and cache.hits == 2
+    assert [r["text"] for r in results] == [r["text"] for r in expected]
+
+    # The wrapper hands cached features straight to whisper's decoder
+    cached_model = CachedEncoderModel(model, cache)
+    window = mels(1)[0]
+    for task in ("transcribe", "translate"):
+        options = DecodingOptions(language="en", fp16=False, task=task)
+        assert cached_model.decode(window, options).tokens == decode(model, window, options).tokens
+    assert cache.misses == 3 and cache.hits == 3
+
+
+def main():
+    print("Encoder Cache Test")
+    print("=" * 18)
+
+    test_embed_only_uncached()
+    print("✓ Only uncached windows encoded")
+    test_disk_entries()
+    print("✓ Encoder outputs reloaded from disk")
+    test_transcribe_and_translate()
+    print("✓ Transcribe and translate share encoder outputs")
+
+    print("\nTest completed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Test script for the streaming ffmpeg pipe decoder
+
+Stand-in ffmpeg/ffprobe scripts are put first on PATH, so the test runs
+without ffmpeg installed. They read a tiny raw format that libsndfile can't
+open ("RAWF" + 16 kHz float32 samples) and write it to stdout in small,
+uneven pieces like a real pipe.
+"""
+
+import os
+import stat
+import sys
+import tempfile
+from contextlib import contextmanager
+
+import numpy as np
+
+from audio_stream import audio_info, iter_audio_chunks, read_audio_range
+from chunk_planner import plan_chunks
+from pcm_cache import decoded_path, open_pcm
+
+FAKE_FFMPEG = """
+import sys
+args = sys.argv[1:]
+start = float(args[args.index("-ss") + 1]) if "-ss" in args else 0.0
+data = open(args[args.index("-i") + 1], "rb").read()
+if data[:4] != b"RAWF":
+    sys.stderr.write("Invalid data found when processing input")
+    sys.exit(1)
+data = data[4 + 4 * round(start * 16000):]
+for i in range(0, len(data), 12345):
+    sys.stdout.buffer.write(data[i:i + 12345])
+"""
+
+FAKE_FFPROBE = """
+import json, os, sys
+frames = (os.path.getsize(sys.argv[-1]) - 4) // 4
+print(json.dumps({"streams": [{"channels": 2}], "format": {"duration": str(frames / 16000), "format_name": "rawf"}}))
+"""
+
+
+@contextmanager
+def fake_ffmpeg(tmp_dir):
+    """Put stand-in ffmpeg and ffprobe executables first on PATH"""
+    bin_dir = os.path.join(tmp_dir, "bin")
+    os.makedirs(bin_dir)
+    for name, source in (("ffmpeg", FAKE_FFMPEG), ("ffprobe", FAKE_FFPROBE)):
+        path = os.path.join(bin_dir, name)
+        with open(path, "w") as f:
+            f.write(f"#!{sys.executable}\n{source}")
+        os.chmod(path, os.stat(path).st_mode | stat.S_IEXEC)
+    old_path = os.environ["PATH"]
+    os.environ["PATH"] = bin_dir + os.pathsep + old_path
+    try:
+        yield
+    finally:
+        os.environ["PATH"] = old_path
+
+
+def write_raw(filename, audio_data):
+    with open(filename, "wb") as f:
+        f.write(b"RAWF" + audio_data.astype("<f4").tobytes())
+
+
+def test_pipe_chunks():
+    """Chunks and ranges from the pipe should match the source samples exactly"""
+    with tempfile.TemporaryDirectory() as tmp_dir, fake_ffmpeg(tmp_dir):
+        filename = os.path.join(tmp_dir, "talk.m4a")
+        rng = np.random.default_rng(5)
+        audio_data = rng.uniform(-0.5, 0.5, 16000 * 75).astype(np.float32)
+        write_raw(filename, audio_data)
+
+        info = audio_info(filename)
+        assert (info.samplerate, info.frames) == (16000, len(audio_data))
+
+        chunks = list(iter_audio_chunks(filename, chunk_duration=30, block_frames=4000))
+        assert [(start, end) for start, end, _ in chunks] == [(0, 480000), (480000, 960000), (960000, 1200000)]
+        assert np.array_equal(np.concatenate([chunk for _, _, chunk in chunks]), audio_data)
+
+        # A gap is read through, a backward range restarts ffmpeg, a range past the end is clipped
+        ranges = [(16000, 32000), (48000, 50000), (1000, 2000), (1190000, 1300000)]
+        for (start, end, chunk), (range_start, range_end) in zip(
+                iter_audio_chunks(filename, ranges=ranges, sample_rate=16000), ranges):
+            assert start == range_start and end == min(range_end, len(audio_data))
+            assert np.array_equal(chunk, audio_data[range_start:range_end])
+        assert np.array_equal(read_audio_range(filename, 5000, 6000), audio_data[5000:6000])
+
+        plan = plan_chunks(filename, chunk_duration=30)
+        assert plan[0][0] == 0 and plan[-1][1] >= len(audio_data)
+
+
+def test_pipe_decode_once():
+    """Compressed input should be decoded through the pipe into the PCM cache"""
+    with tempfile.TemporaryDirectory() as tmp_dir, fake_ffmpeg(tmp_dir):
+        filename = os.path.join(tmp_dir, "clip.mov")
+        audio_data = np.sin(np.arange(16000 * 3) / 10).astype(np.float32)
+        write_raw(filename, audio_data)
+
+        path = decoded_path(filename, os.path.join(tmp_dir, "cache"))
+        assert path != filename
+        assert np.array_equal(open_pcm(filename, os.path.join(tmp_dir, "cache")), audio_data)
+
+
+def test_pipe_error():
+    """A decode failure should raise with ffmpeg's message"""
+    with tempfile.TemporaryDirectory() as tmp_dir, fake_ffmpeg(tmp_dir):
+        filename = os.path.join(tmp_dir, "broken.mp3")
+        with open(filename, "wb") as f:
+            f.write(b"not audio at all")
+        try:
+            list(iter_audio_chunks(filename))
+        except RuntimeError as e:
+            assert "Invalid data" in str(e)
+        else:
+            raise AssertionError("Expected a RuntimeError")
+
+
+def main():
+    print("FFmpeg Pipe Decoder Test")
+    print("=" * 24)
+
+    test_pipe_chunks()
+    print("✓ Pipe chunks and ranges match the source")
+    test_pipe_decode_once()
+    print("✓ Compressed input decoded through the pipe")
+    test_pipe_error()
+    print("✓ Decoder errors reported")
+
+    print("\nTest completed!")
+
+
+if __name__ == "__main__":
+    main()
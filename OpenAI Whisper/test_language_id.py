@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Test script for picking the speech windows used for file-level language detection
+"""
+
+import os
+import tempfile
+
+import numpy as np
+import soundfile as sf
+
+from language_id import speech_windows
+
+
+def test_speech_windows():
+    """The densest speech windows should be chosen, without overlapping"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        filename = os.path.join(tmp_dir, "speech.wav")
+        sample_rate = 8000
+        rng = np.random.default_rng(3)
+        audio_data = np.zeros(200 * sample_rate, dtype=np.float32)
+        for start, end in ((10, 14), (60, 100), (150, 160)):
+            audio_data[start * sample_rate:end * sample_rate] = rng.normal(0, 0.2, (end - start) * sample_rate)
+        sf.write(filename, audio_data, sample_rate)
+
+        starts = [start / sample_rate for start in speech_windows(filename, count=2)]
+
+        assert len(starts) == 2
+        assert 59 <= starts[0] <= 60  # 30 s of continuous speech
+        assert 149 <= starts[1] <= 150  # 10 s, more than the 4 s burst
+
+
+def test_silent_file():
+    """A file with no speech should fall back to the first window"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        filename = os.path.join(tmp_dir, "silence.wav")
+        sf.write(filename, np.zeros(8000 * 40, dtype=np.float32), 8000)
+
+        assert speech_windows(filename) == [0]
+
+
+def main():
+    print("Language Detection Sample Test")
+    print("=" * 30)
+
+    test_speech_windows()
+    print("✓ Densest speech windows chosen")
+    test_silent_file()
+    print("✓ Silent file falls back to the first window")
+
+    print("\nTest completed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,8 @@ Test script for long audio file handling with Whisper
 """
 
 import os
+import tempfile
+
 import numpy as np
 import soundfile as sf
 
@@ -46,13 +48,14 @@ def test_long_audio_processing():
     """
     Test the long audio processing functionality
     """
-    test_file = "test_long_audio.wav"
-    
-    # Create test file if it doesn't exist
-    if not os.path.exists(test_file):
-        # Create a 5-minute test file (long enough to demonstrate the concept)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # A 5-minute test file, long enough to demonstrate the concept
+        test_file = os.path.join(tmp_dir, "test_long_audio.wav")
         create_test_audio(duration_seconds=300, filename=test_file)
-    
+        _check_long_audio(test_file)
+
+
+def _check_long_audio(test_file):
     print("\nTesting audio file info detection...")
     print("=" * 50)
     
@@ -68,13 +71,12 @@ def test_long_audio_processing():
         print(f"Duration: {duration/60:.1f} minutes")
         print(f"Size: {file_size_mb:.1f} MB")
         
-        # Check our criteria
-        is_long = duration > 1800  # 30 minutes
-        is_large = file_size_mb > 100  # 100 MB
+        # Check our criteria: chunked if long, or if the whole file won't fit the memory budget
+        from memory_budget import plan_job
+        plan = plan_job(duration, "base", channels=file_info.channels)
         
-        print(f"Long file (>30 min): {is_long}")
-        print(f"Large file (>100 MB): {is_large}")
-        print(f"Needs chunked processing: {is_long or is_large}")
+        print(plan.describe())
+        print(f"Needs chunked processing: {plan.chunked}")
         
     except Exception as e:
         print(f"Error during testing: {e}")
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Test script for memory-budget planning and admission control
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import torch
+from whisper.model import ModelDimensions, Whisper
+
+import memory_budget
+import whisper_stt
+from memory_budget import MemoryBudget, estimate_job_mb, plan_job, weights_mb
+
+SAMPLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sample_test.wav")
+
+# The streaming test loads a model, so give it a tiny one
+DIMS = ModelDimensions(n_mels=80, n_audio_ctx=1500, n_audio_state=32, n_audio_head=2, n_audio_layer=1,
+                       n_vocab=51865, n_text_ctx=32, n_text_state=32, n_text_head=2, n_text_layer=1)
+
+
+def test_estimates():
+    """Estimates should grow with everything held in memory at once"""
+    assert 250 < weights_mb("base", "fp32") < 300  # 74M parameters
+    # int8 only quantizes Linear layers; the token embedding stays fp32
+    assert weights_mb("base", "fp16") < weights_mb("base", "int8") < weights_mb("base", "fp32")
+    assert weights_mb("tiny.en") < weights_mb("base") < weights_mb("large-v3")
+
+    assert estimate_job_mb("base", 300) < estimate_job_mb("base", 600)
+    assert estimate_job_mb("base", 600, prefetch_depth=0) < estimate_job_mb("base", 600, prefetch_depth=2)
+    assert estimate_job_mb("base", 600, batch_size=4) < estimate_job_mb("base", 600, batch_size=16)
+    # Pooled short files use the batched engine even one window at a time
+    pooled = estimate_job_mb("base", 600, prefetch_depth=0, batched=True)
+    assert pooled != estimate_job_mb("base", 600, prefetch_depth=0)
+    assert pooled < estimate_job_mb("base", 600, batch_size=2, prefetch_depth=0)
+    # The in-memory encoder cache only counts for jobs that use one
+    cached = estimate_job_mb("base", 600, batch_size=8, encoder_cache=True)
+    assert abs(cached - estimate_job_mb("base", 600, batch_size=8) - memory_budget.ENCODER_CACHE_MB) < 1e-6
+    # Memory-mapped weights are shared by the workers and skip the load-time copy
+    mapped = estimate_job_mb("small", 600, workers=4, mapped_weights=True)
+    assert mapped + 3 * weights_mb("small") <= estimate_job_mb("small", 600, workers=4, mapped_weights=False)
+    assert estimate_job_mb("medium", 30, mapped_weights=True) < estimate_job_mb("medium", 30, mapped_weights=False)
+
+
+def test_plans_fit_budget():
+    """Plans should use the longest chunks and most workers that fit"""
+    short = plan_job(600, "base", budget_mb=8000)
+    assert not short.chunked and short.fits
+
+    # Long files are chunked even with memory to spare, so they can be resumed
+    long = plan_job(3 * 3600, "base", budget_mb=8000)
+    assert long.chunked and long.chunk_duration == 600
+
+    # A smaller budget gives shorter chunks, and a short file that doesn't fit is chunked too
+    tight_budget = estimate_job_mb("base", 240) + 1
+    tight = plan_job(3600, "base", budget_mb=tight_budget)
+    assert tight.chunked and tight.chunk_duration == 240 and tight.fits
+    assert plan_job(1200, "base", budget_mb=tight_budget).chunked
+
+    # Fewer workers rather than going over the budget
+    parallel = plan_job(3600, "small", budget_mb=estimate_job_mb("small", 600, workers=2) + 1, workers=8)
+    assert parallel.workers == 2 and parallel.fits
+
+    hopeless = plan_job(3600, "large-v3", budget_mb=500)
+    assert not hopeless.fits and hopeless.chunk_duration == 30 and hopeless.workers == 1
+    assert "over budget" in hopeless.describe()
+
+
+def test_admission_queue():
+    """Jobs that don't fit should wait their turn; jobs of dead processes don't count"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        budget = MemoryBudget(budget_mb=100, cache_dir=tmp_dir, poll_seconds=0.01)
+        started = []
+
+        def job(name, mb, hold):
+            with budget.reserve(mb, name):
+                started.append(name)
+                time.sleep(hold)
+
+        first = budget.acquire(60, "first")
+        threads = [threading.Thread(target=job, args=("second", 60, 0.1))]
+        threads[0].start()
+        time.sleep(0.1)
+        # Would fit next to the first job, but the second is ahead in the queue
+        threads.append(threading.Thread(target=job, args=("third", 30, 0)))
+        threads[1].start()
+        time.sleep(0.1)
+        assert started == []
+        assert [job["label"] for job in budget.jobs()] == ["first", "second", "third"]
+
+        budget.release(first)
+        for thread in threads:
+            thread.join(timeout=5)
+        assert started == ["second", "third"]
+        assert budget.jobs() == []
+
+        # Larger than the whole budget: runs, but only on its own
+        with budget.reserve(500, "huge"):
+            assert budget.jobs()[0]["running"]
+
+        # A reservation left behind by a process that has exited is ignored
+        dead = subprocess.Popen([sys.executable, "-c", "pass"])
+        dead.wait()
+        with open(budget.ledger_path, "w", encoding="utf-8") as f:
+            json.dump([dict(ticket="stale", pid=dead.pid, mb=100, label="stale", running=True,
+                            since=time.time())], f)
+        with budget.reserve(60, "after crash"):
+            assert [job["label"] for job in budget.jobs()] == ["after crash"]
+
+
+def test_abandoned_stream_releases():
+    """A streaming consumer that stops part-way must give its reservation back at once"""
+    def iter_batched_segments(model, mel, batch_size=8, language=None, time_offset=0.0, **kwargs):
+        for i in range(3):
+            yield dict(start=time_offset + i, end=time_offset + i + 1, text=f" segment {i}")
+
+    class BrokenPipeWriter:
+        path, count = "stdout", 0
+
+        def write(self, segment):
+            raise BrokenPipeError("client went away")
+
+        def close(self):
+            pass
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        torch.manual_seed(0)
+        checkpoint = os.path.join(tmp_dir, "toy.pt")
+        torch.save(dict(dims=DIMS.__dict__, model_state_dict=Whisper(DIMS).state_dict()), checkpoint)
+        budget = MemoryBudget(budget_mb=100000, cache_dir=tmp_dir, poll_seconds=0.01)
+        originals = whisper_stt.get_memory_budget, whisper_stt.iter_batched_segments, whisper_stt.open_writers
+        whisper_stt.get_memory_budget = lambda: budget
+        whisper_stt.iter_batched_segments = iter_batched_segments
+        whisper_stt.open_writers = lambda file_path, formats: [BrokenPipeWriter()]
+        try:
+            segments = whisper_stt.iter_transcription_segments(SAMPLE, checkpoint, language="en")
+            assert next(segments)["text"] == " segment 0"
+            assert [job["label"] for job in budget.jobs()] == ["sample_test.wav"]
+            segments.close()
+            assert budget.jobs() == []
+
+            try:
+                whisper_stt.stream_transcription(SAMPLE, checkpoint, language="en")
+                raise AssertionError("expected the writer's error")
+            except BrokenPipeError:
+                # The traceback still references the generator; the reservation must already be gone
+                assert budget.jobs() == []
+        finally:
+            whisper_stt.get_memory_budget, whisper_stt.iter_batched_segments, whisper_stt.open_writers = originals
+
+
+def test_budget_from_environment():
+    """WHISPER_STT_MEMORY_MB should override the default budget"""
+    previous = os.environ.get(memory_budget.MEMORY_ENV)
+    try:
+        memory_budget.set_memory_budget(1234)
+        assert memory_budget.memory_budget_mb() == 1234
+        assert plan_job(3600, "base").budget_mb == 1234
+    finally:
+        if previous is None:
+            os.environ.pop(memory_budget.MEMORY_ENV, None)
+        else:
+            os.environ[memory_budget.MEMORY_ENV] = previous
+
+
+def main():
+    print("Memory Budget Test")
+    print("=" * 18)
+
+    test_estimates()
+    print("✓ Peak memory estimates")
+    test_plans_fit_budget()
+    print("✓ Chunk size and workers fit the budget")
+    test_admission_queue()
+    print("✓ Jobs queued until memory is free")
+    test_abandoned_stream_releases()
+    print("✓ Abandoned streams release their reservation")
+    test_budget_from_environment()
+    print("✓ Budget read from the environment")
+
+    print("\nTest completed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Test script for pre-converted, memory-mapped Whisper weights
+"""
+
+import os
+import tempfile
+
+import torch
+import whisper
+from whisper.model import ModelDimensions, Whisper
+
+import mmap_weights
+
+DIMS = ModelDimensions(n_mels=80, n_audio_ctx=50, n_audio_state=64, n_audio_head=2, n_audio_layer=2,
+                       n_vocab=100, n_text_ctx=16, n_text_state=64, n_text_head=2, n_text_layer=2)
+
+
+def save_checkpoint(path):
+    torch.manual_seed(0)
+    model = Whisper(DIMS)
+    # Whisper leaves the decoder's positional embedding uninitialized
+    torch.nn.init.normal_(model.decoder.positional_embedding, std=0.02)
+    torch.save(dict(dims=DIMS.__dict__, model_state_dict=model.state_dict()), path)
+    return model
+
+
+def logits(model):
+    torch.manual_seed(1)
+    mel = torch.randn(1, DIMS.n_mels, 2 * DIMS.n_audio_ctx)
+    with torch.no_grad():
+        return model(mel, torch.tensor([[1, 2, 3, 4]]))
+
+
+def test_convert_and_load():
+    """Mapped weights should give the same model as whisper.load_model"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        checkpoint = os.path.join(tmp_dir, "small.pt")
+        save_checkpoint(checkpoint)
+        reference = whisper.load_model(checkpoint, device="cpu")
+
+        assert not mmap_weights.has_mmap_weights(checkpoint, tmp_dir)
+        model = mmap_weights.load_mmap_model(checkpoint, cache_dir=tmp_dir)
+        assert mmap_weights.has_mmap_weights(checkpoint, tmp_dir)
+        reloaded = mmap_weights.load_mmap_model(checkpoint, cache_dir=tmp_dir)
+
+        for mapped in (model, reloaded):
+            assert torch.equal(logits(mapped), logits(reference))
+            assert mapped.state_dict().keys() == reference.state_dict().keys()
+            assert torch.equal(mapped.alignment_heads.to_dense(), reference.alignment_heads.to_dense())
+            assert torch.equal(mapped.decoder.mask, reference.decoder.mask)
+
+        # Alignment heads aren't in checkpoints; whisper.load_model sets them per official model
+        heads = torch.zeros(DIMS.n_text_layer, DIMS.n_text_head, dtype=torch.bool)
+        heads[0, 1] = True
+        reference.register_buffer("alignment_heads", heads.to_sparse(), persistent=False)
+        path = os.path.join(tmp_dir, "heads.bin")
+        mmap_weights.write_weights(reference, path)
+        mapped = mmap_weights.load_weights(path)
+        assert mapped.alignment_heads.is_sparse and torch.equal(mapped.alignment_heads.to_dense(), heads)
+
+
+def test_copy_on_write():
+    """Changing a loaded weight must not change the file"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        checkpoint = os.path.join(tmp_dir, "small.pt")
+        save_checkpoint(checkpoint)
+        path = mmap_weights.convert_model(checkpoint, tmp_dir)
+
+        model = mmap_weights.load_weights(path)
+        original = model.decoder.token_embedding.weight[0, 0].item()
+        with torch.no_grad():
+            model.decoder.token_embedding.weight.fill_(0.0)
+        assert mmap_weights.load_weights(path).decoder.token_embedding.weight[0, 0].item() == original
+
+
+def test_unreadable_file_reconverted():
+    """A damaged weights file should be replaced, not crash the load"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        checkpoint = os.path.join(tmp_dir, "small.pt")
+        save_checkpoint(checkpoint)
+        path = mmap_weights.mmap_path(checkpoint, tmp_dir)
+        os.makedirs(os.path.dirname(path))
+        with open(path, "wb") as f:
+            f.write(b"not a weights file")
+        model = mmap_weights.load_mmap_model(checkpoint, cache_dir=tmp_dir)
+        assert torch.equal(logits(model), logits(whisper.load_model(checkpoint, device="cpu")))
+
+
+def main():
+    print("Memory-Mapped Weights Test")
+    print("=" * 26)
+
+    test_convert_and_load()
+    print("✓ Converted weights load to the same model")
+    test_copy_on_write()
+    print("✓ Weights file unchanged by in-place edits")
+    test_unreadable_file_reconverted()
+    print("✓ Unreadable weights file reconverted")
+
+    print("\nTest completed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Test script for the resident model registry
+"""
+
+import torch
+
+from model_registry import ModelRegistry
+
+# Fake model sizes in MB, by model name
+SIZES_MB = {"tiny": 1.0, "base": 1.0, "small": 1.0, "large": 3.0}
+
+
+class StubRegistry(ModelRegistry):
+    """Registry whose loader builds a parameter of the model's size instead of reading a checkpoint"""
+
+    def __init__(self, memory_budget_mb):
+        super().__init__(memory_budget_mb)
+        self.loads = []
+
+    def _load(self, model_size, device, dtype):
+        self.loads.append((model_size, dtype))
+        model = torch.nn.Module()
+        model.weights = torch.nn.Parameter(torch.zeros(int(SIZES_MB[model_size] * 1024 * 1024 / 4)))
+        return model.half() if dtype == "fp16" else model
+
+
+def test_reuse():
+    """A loaded model should be handed out again without reloading"""
+    registry = StubRegistry(memory_budget_mb=10)
+    base = registry.get("base", device="cpu")
+    assert registry.get("base", device="cpu") is base
+    assert registry.get("base:fp32", device="cpu") is base
+    # Another dtype is another resident model
+    half = registry.get("base", device="cpu", dtype="fp16")
+    assert half is not base and registry.get("base:fp16", device="cpu") is half
+    assert registry.loads == [("base", "fp32"), ("base", "fp16")]
+    assert registry.resident_mb() == 1.5
+    try:
+        registry.get("base", device="cpu", dtype="bf16")
+        raise AssertionError("expected a ValueError for an unsupported dtype")
+    except ValueError:
+        pass
+
+
+def test_lru_eviction():
+    """Least recently used models should go once the resident size passes the budget"""
+    registry = StubRegistry(memory_budget_mb=2.5)
+    tiny = registry.get("tiny", device="cpu")
+    registry.get("base", device="cpu")
+    # Using tiny again makes base the least recently used
+    assert registry.get("tiny", device="cpu") is tiny
+    registry.get("small", device="cpu")
+    assert [key[0] for key in registry.keys()] == ["tiny", "small"]
+    assert registry.resident_mb() == 2.0
+
+    # Loading base again is a fresh load that pushes out tiny
+    registry.get("base", device="cpu")
+    assert [key[0] for key in registry.keys()] == ["small", "base"]
+    assert registry.loads == [("tiny", "fp32"), ("base", "fp32"), ("small", "fp32"), ("base", "fp32")]
+
+    # A model larger than the whole budget is kept, but only on its own
+    large = registry.get("large", device="cpu")
+    assert [key[0] for key in registry.keys()] == ["large"]
+    assert registry.get("large", device="cpu") is large
+
+    assert registry.evict("large", device="cpu") and not registry.evict("large", device="cpu")
+    assert registry.keys() == [] and registry.resident_mb() == 0
+
+
+def main():
+    print("Model Registry Test")
+    print("=" * 19)
+
+    test_reuse()
+    print("✓ Loaded models reused per size and dtype")
+    test_lru_eviction()
+    print("✓ Least recently used models evicted over the budget")
+
+    print("\nTest completed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Test script for the per-file model router
+"""
+
+import json
+import os
+import tempfile
+
+import torch
+from whisper.model import ModelDimensions, Whisper
+
+import model_router
+from model_registry import model_identity, split_model_name
+from model_router import choose_model
+
+CALIBRATION = {name: {"rtf": rtf} for name, rtf in
+               dict(tiny=0.05, base=0.1, small=0.3, medium=0.9, **{"small:int8": 0.2}).items()}
+
+
+def test_model_names():
+    """A dtype can be part of the model name"""
+    assert split_model_name("base.en:int8") == ("base.en", "int8")
+    assert split_model_name("small") == ("small", None)
+    assert split_model_name("C:\\models\\small.pt") == ("C:\\models\\small.pt", None)
+    assert model_identity("small:int8") == "small:int8"
+
+
+def test_choose_model():
+    """The most accurate model that meets the tighter of the RTF target and the deadline"""
+    decision = choose_model(600, "ko", CALIBRATION, target_rtf=0.25)
+    assert decision.model == "small:int8"
+    assert "small too slow" in decision.reason and decision.expected_seconds == 120
+
+    # English audio gets the English-only variant of the same model
+    assert choose_model(600, "en", CALIBRATION, target_rtf=0.25).model == "small.en:int8"
+    # The deadline is tighter than the RTF target here
+    assert choose_model(600, "ko", CALIBRATION, target_rtf=1.0, deadline=30).model == "tiny"
+    assert choose_model(60, "ko", CALIBRATION, target_rtf=1.0).model == "medium"
+
+    # Nothing fast enough: the fastest model, saying so
+    decision = choose_model(600, "ko", CALIBRATION, deadline=1)
+    assert decision.model == "tiny" and "no model meets" in decision.reason
+
+    # A measurement of the English-only variant is used over the multilingual one
+    calibration = {"base": {"rtf": 0.1}, "base.en": {"rtf": 0.05}}
+    assert choose_model(100, "en", calibration, deadline=6).model == "base.en"
+    assert choose_model(100, "de", calibration, deadline=6).model == "base"
+
+    decision = choose_model(600, "en", {})
+    assert decision.model == "base" and "calibrate" in decision.reason
+
+
+def test_calibrate_and_route():
+    """Calibration should store a real-time factor that routing then uses and logs"""
+    dims = ModelDimensions(n_mels=80, n_audio_ctx=1500, n_audio_state=32, n_audio_head=2, n_audio_layer=1,
+                           n_vocab=51865, n_text_ctx=32, n_text_state=32, n_text_head=2, n_text_layer=1)
+    sample = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sample_test.wav")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        torch.manual_seed(0)
+        model = Whisper(dims)
+        # Whisper leaves the decoder's positional embedding uninitialized
+        torch.nn.init.normal_(model.decoder.positional_embedding, std=0.02)
+        checkpoint = os.path.join(tmp_dir, "toy.pt")
+        torch.save(dict(dims=dims.__dict__, model_state_dict=model.state_dict()), checkpoint)
+
+        measured = model_router.calibrate([checkpoint], sample, seconds=5, cache_dir=tmp_dir)
+        assert measured[checkpoint]["rtf"] > 0
+        assert model_router.load_calibration(tmp_dir) == measured
+
+        log_path = os.path.join(tmp_dir, "routing.jsonl")
+        decision = model_router.route_file(sample, "en", target_rtf=1e6, cache_dir=tmp_dir, log_path=log_path)
+        assert decision.model == checkpoint
+        with open(log_path, "r", encoding="utf-8") as f:
+            logged = [json.loads(line) for line in f]
+        assert logged[0]["model"] == checkpoint and logged[0]["reason"] == decision.reason
+
+
+def main():
+    print("Model Router Test")
+    print("=" * 17)
+
+    test_model_names()
+    print("✓ Model names with a dtype")
+    test_choose_model()
+    print("✓ Models chosen by language and time budget")
+    test_calibrate_and_route()
+    print("✓ Calibrated throughput drives routing")
+
+    print("\nTest completed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Test script for parallel chunk transcription in worker processes
+"""
+
+import os
+import tempfile
+import time
+
+import torch
+from whisper.model import ModelDimensions, Whisper
+
+from parallel_stt import transcribe_chunks_parallel
+
+RANGES = [(0, 100), (100, 200), (200, 300), (300, 400)]
+
+# The workers still load a model, so give them a tiny one
+DIMS = ModelDimensions(n_mels=80, n_audio_ctx=1500, n_audio_state=32, n_audio_head=2, n_audio_layer=1,
+                       n_vocab=51865, n_text_ctx=32, n_text_state=32, n_text_head=2, n_text_layer=1)
+
+
+def toy_checkpoint(directory):
+    torch.manual_seed(0)
+    path = os.path.join(directory, "toy.pt")
+    torch.save(dict(dims=DIMS.__dict__, model_state_dict=Whisper(DIMS).state_dict()), path)
+    return path
+
+
+def _attempt(file_path, start_sample):
+    """Count this chunk's attempts in a file next to the (fake) audio file, across processes"""
+    path = os.path.join(os.path.dirname(file_path), f"attempts_{start_sample}")
+    with open(path, "a") as f:
+        f.write("x")
+    with open(path) as f:
+        return len(f.read())
+
+
+def _result(start_sample, end_sample, language):
+    return {"text": f"{start_sample}-{end_sample}", "segments": [], "language": language}
+
+
+def slow_first_chunk(file_path, start_sample, end_sample, language):
+    """Earlier chunks take longer, so they finish out of order"""
+    time.sleep((400 - start_sample) / 1000)
+    return _result(start_sample, end_sample, language)
+
+
+def flaky_chunk(file_path, start_sample, end_sample, language):
+    """Fails the first attempt of every chunk and every attempt of the last one"""
+    if _attempt(file_path, start_sample) == 1 or start_sample == 300:
+        raise RuntimeError(f"decoder failed at {start_sample}")
+    return _result(start_sample, end_sample, language)
+
+
+def crashing_chunk(file_path, start_sample, end_sample, language):
+    """Takes down its worker process on the first attempt of the second chunk"""
+    if start_sample == 100 and _attempt(file_path, start_sample) == 1:
+        os._exit(1)
+    time.sleep(0.2)
+    return _result(start_sample, end_sample, language)
+
+
+def test_result_order():
+    """Results should come back in chunk order however the workers finish"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        finished = []
+        results = transcribe_chunks_parallel(os.path.join(tmp_dir, "audio.wav"), RANGES, toy_checkpoint(tmp_dir),
+                                             workers=2, threads_per_worker=1, language="en",
+                                             on_result=lambda index, result: finished.append((index, result)),
+                                             chunk_fn=slow_first_chunk)
+    assert [result["text"] for result in results] == ["0-100", "100-200", "200-300", "300-400"]
+    assert sorted(finished, key=lambda item: item[0]) == list(enumerate(results))
+
+
+def test_retries():
+    """A failing chunk is retried, and given up on after max_retries"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_path = os.path.join(tmp_dir, "audio.wav")
+        results = transcribe_chunks_parallel(file_path, RANGES, toy_checkpoint(tmp_dir), workers=2,
+                                             threads_per_worker=1, max_retries=2, language="en",
+                                             chunk_fn=flaky_chunk)
+        attempts = [_attempt(file_path, start) - 1 for start, _ in RANGES]
+    assert [result and result["text"] for result in results] == ["0-100", "100-200", "200-300", None]
+    assert attempts == [2, 2, 2, 3]
+
+
+def test_crashed_worker():
+    """A worker crash breaks the pool; a fresh pool finishes the outstanding chunks"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_path = os.path.join(tmp_dir, "audio.wav")
+        results = transcribe_chunks_parallel(file_path, RANGES, toy_checkpoint(tmp_dir), workers=2,
+                                             threads_per_worker=1, language="en", chunk_fn=crashing_chunk)
+        assert _attempt(file_path, 100) - 1 == 2
+    assert [result["text"] for result in results] == ["0-100", "100-200", "200-300", "300-400"]
+
+
+def main():
+    print("Parallel Transcription Test")
+    print("=" * 27)
+
+    test_result_order()
+    print("✓ Results in chunk order")
+    test_retries()
+    print("✓ Failed chunks retried up to max_retries")
+    test_crashed_worker()
+    print("✓ Pool rebuilt after a worker crash")
+
+    print("\nTest completed!")
+
+
+if __name__ == "__main__":
+    main()
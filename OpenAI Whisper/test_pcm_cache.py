@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Test script for the decode-once 16 kHz PCM cache
+"""
+
+import os
+import tempfile
+
+import numpy as np
+import soundfile as sf
+
+from pcm_cache import decoded_path, open_pcm
+from resampler import resample
+
+
+def test_decode_once():
+    """A file should be decoded once to 16 kHz mono and then memory-mapped"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        filename = os.path.join(tmp_dir, "stereo.wav")
+        rng = np.random.default_rng(4)
+        audio_data = rng.uniform(-0.5, 0.5, (44100 * 3, 2)).astype(np.float32)
+        sf.write(filename, audio_data, 44100, subtype="FLOAT")
+        cache_dir = os.path.join(tmp_dir, "cache")
+
+        path = decoded_path(filename, cache_dir)
+        mtime = os.stat(path).st_mtime_ns
+        assert decoded_path(filename, cache_dir) == path
+        assert os.stat(path).st_mtime_ns >= mtime
+        info = sf.info(path)
+        assert (info.samplerate, info.channels, info.subtype) == (16000, 1, "FLOAT")
+
+        pcm = open_pcm(filename, cache_dir)
+        assert isinstance(pcm, np.memmap)
+        expected = resample(audio_data.mean(axis=1, dtype=np.float32), 44100)
+        assert np.allclose(pcm, expected, atol=1e-5)
+
+        # The map is copy-on-write; the cached file is never modified
+        pcm[:100] = 0
+        assert np.allclose(open_pcm(filename, cache_dir)[:100], expected[:100], atol=1e-5)
+
+
+def test_decoded_input_used_as_is():
+    """16 kHz float32 mono WAV input needs no decode"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        filename = os.path.join(tmp_dir, "mono16k.wav")
+        sf.write(filename, np.linspace(-1, 1, 16000, dtype=np.float32), 16000, subtype="FLOAT")
+
+        assert decoded_path(filename, os.path.join(tmp_dir, "cache")) == filename
+        assert not os.path.exists(os.path.join(tmp_dir, "cache"))
+
+
+def main():
+    print("Decode-once PCM Cache Test")
+    print("=" * 26)
+
+    test_decode_once()
+    print("✓ File decoded once and memory-mapped")
+    test_decoded_input_used_as_is()
+    print("✓ Already-decoded input used as is")
+
+    print("\nTest completed!")
+
+
+if __name__ == "__main__":
+    main()
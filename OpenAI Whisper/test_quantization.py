@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Test script for dynamic int8 quantization of Whisper's Linear layers
+"""
+
+import os
+import tempfile
+
+import torch
+import whisper
+from whisper.model import ModelDimensions, Whisper
+
+import quantization
+from model_registry import model_memory_mb
+
+DIMS = ModelDimensions(n_mels=80, n_audio_ctx=50, n_audio_state=64, n_audio_head=2, n_audio_layer=2,
+                       n_vocab=100, n_text_ctx=16, n_text_state=64, n_text_head=2, n_text_layer=2)
+
+
+def small_model():
+    torch.manual_seed(0)
+    model = Whisper(DIMS).eval()
+    # Whisper leaves the decoder's positional embedding uninitialized
+    torch.nn.init.normal_(model.decoder.positional_embedding, std=0.02)
+    return model
+
+
+def logits(model):
+    torch.manual_seed(1)
+    mel = torch.randn(1, DIMS.n_mels, 2 * DIMS.n_audio_ctx)
+    tokens = torch.tensor([[1, 2, 3, 4]])
+    with torch.no_grad():
+        return model(mel, tokens)
+
+
+def test_quantize_linear_layers():
+    """Every whisper Linear should become int8, with outputs close to fp32"""
+    reference = logits(small_model())
+    fp32_mb = model_memory_mb(small_model())
+    model = quantization.quantize_model(small_model())
+
+    assert not any(isinstance(module, whisper.model.Linear) for module in model.modules())
+    assert isinstance(model.decoder.blocks[0].attn.query, quantization.QuantizedLinear)
+    assert model_memory_mb(model) < fp32_mb
+    quantized = logits(model)
+    assert torch.corrcoef(torch.stack([reference.flatten(), quantized.flatten()]))[0, 1] > 0.99
+
+
+def test_cached_weights():
+    """Quantized weights should be saved once and load back to the same model"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        checkpoint = os.path.join(tmp_dir, "small.pt")
+        torch.save(dict(dims=DIMS.__dict__, model_state_dict=small_model().state_dict()), checkpoint)
+
+        first = quantization.load_quantized_model(checkpoint, tmp_dir)
+        path = quantization.quantized_path(checkpoint, tmp_dir)
+        assert os.path.exists(path)
+        second = quantization.load_quantized_model(checkpoint, tmp_dir)
+
+        assert torch.equal(logits(first), logits(second))
+        assert torch.equal(first.alignment_heads.to_dense(), second.alignment_heads.to_dense())
+        assert not any(t.is_meta for t in list(second.parameters()) + list(second.buffers()))
+
+
+def main():
+    print("INT8 Quantization Test")
+    print("=" * 22)
+
+    test_quantize_linear_layers()
+    print("✓ Linear layers quantized to int8")
+    test_cached_weights()
+    print("✓ Quantized weights cached and reloaded")
+
+    print("\nTest completed!")
+
+
+if __name__ == "__main__":
+    main()
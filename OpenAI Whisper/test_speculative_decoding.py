@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Test script for speculative greedy decoding with a draft model
+"""
+
+import copy
+import os
+
+import torch
+from whisper.decoding import DecodingOptions, decode
+from whisper.model import ModelDimensions, Whisper
+
+from speculative_decoding import SpeculativeModel, speculative_decode
+from whisper_stt import transcribe_audio_result, transcribe_long_audio_result
+
+SAMPLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sample_test.wav")
+
+# Multilingual vocabulary so the real tokenizer applies; everything else tiny
+DIMS = ModelDimensions(n_mels=80, n_audio_ctx=1500, n_audio_state=32, n_audio_head=2, n_audio_layer=1,
+                       n_vocab=51865, n_text_ctx=64, n_text_state=32, n_text_head=2, n_text_layer=2)
+
+
+def random_model(seed, **dims):
+    torch.manual_seed(seed)
+    model = Whisper(ModelDimensions(**{**DIMS.__dict__, **dims})).eval()
+    # Whisper leaves the decoder's positional embedding uninitialized
+    torch.nn.init.normal_(model.decoder.positional_embedding, std=0.02)
+    return model
+
+
+def mels(count=2):
+    torch.manual_seed(5)
+    return torch.randn(count, DIMS.n_mels, 3000)
+
+
+def test_same_tokens_as_greedy():
+    """Any draft, good or bad, should give exactly whisper's greedy output"""
+    model = random_model(0)
+    drafts = {"copy": copy.deepcopy(model), "small": random_model(3, n_audio_state=16, n_text_state=16, n_text_layer=1)}
+    for options in (DecodingOptions(language="en", fp16=False, sample_len=24),
+                    DecodingOptions(language="en", fp16=False, sample_len=24, without_timestamps=True),
+                    DecodingOptions(language="en", fp16=False, prompt="hello there")):
+        expected = decode(model, mels(), options)
+        for name, draft_model in drafts.items():
+            stats = {}
+            results = speculative_decode(model, draft_model, mels(), options, draft_tokens=3, stats=stats)
+            for result, reference in zip(results, expected):
+                assert result.tokens == reference.tokens, name
+                assert abs(result.avg_logprob - reference.avg_logprob) < 1e-4
+                assert abs(result.no_speech_prob - reference.no_speech_prob) < 1e-5
+            if name == "copy":
+                # A perfect draft has every proposal accepted
+                assert stats["accepted"] == stats["proposed"] > 0
+
+
+def test_same_model_as_draft():
+    """The draft may be the main model itself; caches must not interfere"""
+    model = random_model(0)
+    options = DecodingOptions(language="en", fp16=False, sample_len=16)
+    assert speculative_decode(model, model, mels(1)[0], options).tokens == decode(model, mels(1)[0], options).tokens
+
+
+def test_wrapper_falls_back():
+    """Non-greedy decoding should go through whisper's regular decoder"""
+    model = random_model(0)
+    speculative = SpeculativeModel(model, random_model(3, n_audio_state=16, n_text_state=16))
+    options = DecodingOptions(language="en", fp16=False, sample_len=8, beam_size=2)
+    assert speculative.decode(mels(1)[0], options).tokens == decode(model, mels(1)[0], options).tokens
+    assert speculative.stats == {} and speculative.dims is model.dims
+
+
+def test_unsupported_paths_refuse_a_draft():
+    """Paths that don't speculate must refuse a draft model instead of ignoring it"""
+    for options in (dict(workers=2), dict(batch_size=4), dict(cascade_model="small"), dict(speech_only=True)):
+        try:
+            transcribe_audio_result(SAMPLE, "base", draft_model="tiny", use_cache=False, **options)
+            raise AssertionError(f"expected a ValueError for a draft with {options}")
+        except ValueError as e:
+            assert "Draft decoding" in str(e)
+    try:
+        transcribe_long_audio_result(SAMPLE, "base", workers=2, draft_model="tiny", resume=False)
+        raise AssertionError("expected a ValueError for a draft with parallel chunks")
+    except ValueError as e:
+        assert "workers" in str(e)
+
+
+def main():
+    print("Speculative Decoding Test")
+    print("=" * 25)
+
+    test_same_tokens_as_greedy()
+    print("✓ Same tokens as greedy decoding")
+    test_same_model_as_draft()
+    print("✓ Main model usable as its own draft")
+    test_wrapper_falls_back()
+    print("✓ Non-greedy decoding falls back")
+    test_unsupported_paths_refuse_a_draft()
+    print("✓ Draft refused where it would be ignored")
+
+    print("\nTest completed!")
+
+
+if __name__ == "__main__":
+    main()
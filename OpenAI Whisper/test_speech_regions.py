@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Test script for speech region detection, packing and timestamp remapping
+"""
+
+import os
+import tempfile
+
+import numpy as np
+import soundfile as sf
+
+from speech_regions import build_packed_audio, detect_speech_regions, pack_regions, remap_time
+
+RATE = 16000
+
+
+def synthetic_speech():
+    """Tone bursts over faint noise: a region with a short pause, a click, and a region running to the end"""
+    rng = np.random.default_rng(0)
+    audio = rng.normal(0, 0.001, int(10.9 * RATE)).astype(np.float32)
+    t = np.arange(len(audio)) / RATE
+    tone = (0.3 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+    for start, end in ((2.0, 3.5), (3.8, 4.8), (7.8, 7.9), (9.9, 10.9)):
+        audio[int(start * RATE):int(end * RATE)] += tone[int(start * RATE):int(end * RATE)]
+    return audio
+
+
+def test_detect_speech_regions():
+    """Pauses are bridged, clicks dropped, and regions padded within the file"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "speech.wav")
+        sf.write(path, synthetic_speech(), RATE, subtype="FLOAT")
+        regions = detect_speech_regions(path)
+        frame = 0.03 * RATE
+        assert len(regions) == 2
+        (first_start, first_end), (second_start, second_end) = regions
+        # 0.2 s of padding on each side, to within a VAD frame
+        assert abs(first_start - 1.8 * RATE) <= frame and abs(first_end - 5.0 * RATE) <= frame
+        assert abs(second_start - 9.7 * RATE) <= frame
+        assert second_end == int(10.9 * RATE)
+
+        audio, mapping = build_packed_audio(path, regions, RATE, gap_duration=0.5)
+        assert len(audio) == (first_end - first_start) + (second_end - second_start) + RATE // 2
+        assert mapping[0] == (0.0, (first_end - first_start) / RATE, first_start / RATE)
+        assert np.isclose(mapping[1][0], mapping[0][1] + 0.5) and mapping[1][2] == second_start / RATE
+
+        silent = os.path.join(tmp_dir, "silent.wav")
+        sf.write(silent, np.zeros(3 * RATE, dtype=np.float32), RATE, subtype="FLOAT")
+        assert detect_speech_regions(silent) == []
+
+
+def test_pack_regions():
+    """Packs should fill whole windows, splitting regions that don't fit"""
+    # 100 Hz keeps the numbers small: a 30-second pack holds 3000 samples, a gap 30
+    regions = [(0, 1000), (2000, 3000), (5000, 6500)]
+    packs = pack_regions(regions, 100, pack_duration=30, gap_duration=0.3)
+    assert packs == [[(0, 1000), (2000, 3000), (5000, 5940)], [(5940, 6500)]]
+    for pack in packs:
+        assert sum(end - start for start, end in pack) + 30 * (len(pack) - 1) <= 3000
+
+    # A region exactly one pack long, a region longer than two, and pack lengths rounded to windows
+    assert pack_regions([(0, 3000), (3000, 3100)], 100, pack_duration=30) == [[(0, 3000)], [(3000, 3100)]]
+    assert pack_regions([(0, 7000)], 100, pack_duration=30) == [[(0, 3000)], [(3000, 6000)], [(6000, 7000)]]
+    assert pack_regions([(0, 7000)], 100, pack_duration=10) == pack_regions([(0, 7000)], 100, pack_duration=30)
+    assert pack_regions([(0, 7000)], 100, pack_duration=45) == [[(0, 6000)], [(6000, 7000)]]
+    assert pack_regions([], 100) == []
+
+
+def test_remap_time():
+    """Packed times map back into their region; gap times snap to a region edge"""
+    # Two regions: 2 s from 10 s in the file, then (after a 0.3 s gap) 1 s from 50 s
+    mapping = [(0.0, 2.0, 10.0), (2.3, 3.3, 50.0)]
+    assert remap_time(0.0, mapping) == 10.0
+    assert remap_time(1.0, mapping) == 11.0
+    assert np.isclose(remap_time(2.8, mapping), 50.5)
+    assert remap_time(2.3, mapping) == 50.0
+    # Inside the gap: starts move to the next region, ends stay at the end of the previous one
+    assert remap_time(2.1, mapping) == 50.0
+    assert remap_time(2.1, mapping, is_end=True) == 12.0
+    # Outside the packed audio: clamped to the first and last region
+    assert remap_time(-0.5, mapping) == 10.0
+    assert remap_time(5.0, mapping) == 51.0 and remap_time(5.0, mapping, is_end=True) == 51.0
+
+
+def main():
+    print("Speech Regions Test")
+    print("=" * 19)
+
+    test_detect_speech_regions()
+    print("✓ Speech regions detected with pauses bridged and clicks dropped")
+    test_pack_regions()
+    print("✓ Regions packed into whole windows")
+    test_remap_time()
+    print("✓ Packed times mapped back to the file")
+
+    print("\nTest completed!")
+
+
+if __name__ == "__main__":
+    main()
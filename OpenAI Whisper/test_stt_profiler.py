@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Test script for the inference profiler
+"""
+
+import json
+import os
+import tempfile
+
+import numpy as np
+import torch
+import whisper.model
+from whisper.model import ModelDimensions, Whisper
+
+from batched_stt import transcribe_batched
+from chunk_prefetch import StageTimer
+from stt_profiler import Profiler, profile_span, profiling
+
+# Multilingual vocabulary so the real tokenizer applies; everything else tiny
+DIMS = ModelDimensions(n_mels=80, n_audio_ctx=1500, n_audio_state=32, n_audio_head=2, n_audio_layer=1,
+                       n_vocab=51865, n_text_ctx=32, n_text_state=32, n_text_head=2, n_text_layer=1)
+
+
+def toy_model():
+    torch.manual_seed(0)
+    model = Whisper(DIMS).eval()
+    # Whisper leaves the decoder's positional embedding uninitialized
+    torch.nn.init.normal_(model.decoder.positional_embedding, std=0.02)
+    return model
+
+
+def noise(seconds):
+    return np.random.default_rng(0).normal(0, 0.1, int(seconds * 16000)).astype(np.float32)
+
+
+def test_profile_transcribe():
+    """model.transcribe should be broken down per window, with fallbacks and language detection"""
+    model = toy_model()
+    original_forward = whisper.model.AudioEncoder.forward
+    with profiling(Profiler()) as profiler:
+        model.transcribe(noise(45), temperature=(0.0, 0.5), fp16=False)
+    assert whisper.model.AudioEncoder.forward is original_forward
+
+    report = profiler.report(audio_seconds=45)
+    stages, summary = report["stages"], report["summary"]
+    assert stages["log_mel"]["count"] == 1 and stages["language_detection"]["count"] == 1
+    # One encoder pass per decode (model.transcribe re-encodes on fallback) plus language detection
+    assert stages["encoder"]["count"] == stages["decode"]["count"] + 1
+    assert summary["windows"] == len(report["windows"]) >= 2
+    assert summary["fallbacks"] == stages["decode"]["count"] - summary["windows"]
+    # Language detection's decoder step counts as language detection
+    assert summary["decoder_steps"] == stages["decoder_step"]["count"] - 1 > 0
+    assert all(window["encoder_seconds"] > 0 and window["decoder_steps"] > 0 for window in report["windows"])
+    assert report["rtf"] == round(report["wall_seconds"] / 45, 4)
+
+
+def test_profile_batched():
+    """The batched engine's encoder pass should count towards the batch of windows it feeds"""
+    model = toy_model()
+    timer = StageTimer()
+    with profiling(Profiler()) as profiler:
+        with timer.stage("inference"):
+            transcribe_batched(model, noise(45), batch_size=2, language="en", temperature=0.0)
+    report = profiler.report(audio_seconds=45)
+    assert report["summary"]["windows"] == 2 and report["summary"]["batches"] == 1
+    assert report["summary"]["fallbacks"] == 0
+    window = report["windows"][0]
+    assert window["windows"] == 2 and window["encoder_seconds"] > 0 and window["tokens"] > 0
+    assert report["stages"]["inference"]["count"] == 1
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        report_path, trace_path = profiler.save("meeting.wav", 45, output_dir=tmp_dir, model="toy")
+        assert os.path.basename(report_path) == "meeting_profile.json"
+        with open(report_path, "r", encoding="utf-8") as f:
+            assert json.load(f)["model"] == "toy"
+        with open(trace_path, "r", encoding="utf-8") as f:
+            events = json.load(f)["traceEvents"]
+        assert {"thread_name", "encoder", "decoder_step", "decode", "log_mel"} <= {event["name"] for event in events}
+        assert all(event["dur"] >= 0 for event in events if event["ph"] == "X")
+
+
+def test_inactive():
+    """Nothing is recorded without an active profiler, and only one can be active"""
+    profiler = Profiler()
+    with profile_span("audio_decode"):
+        pass
+    with profiling(None):
+        StageTimer().add("read", 1.0)
+    assert profiler.events == []
+    with profiling(profiler):
+        try:
+            with profiling(Profiler()):
+                pass
+            raise AssertionError("expected a RuntimeError for a second profiler")
+        except RuntimeError:
+            pass
+        with profile_span("audio_decode"):
+            pass
+    assert [event["name"] for event in profiler.events] == ["audio_decode"]
+
+
+def main():
+    print("Inference Profiler Test")
+    print("=" * 23)
+
+    test_profile_transcribe()
+    print("✓ model.transcribe profiled per window")
+    test_profile_batched()
+    print("✓ Batched windows, report and Chrome trace")
+    test_inactive()
+    print("✓ Nothing recorded unless active")
+
+    print("\nTest completed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Test script for the warm transcription service
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+
+import numpy as np
+import torch
+from whisper.model import ModelDimensions, Whisper
+
+import stt_server
+import whisper_stt
+from stt_server import TranscriptionService
+
+SAMPLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sample_test.wav")
+
+# Multilingual vocabulary so the real tokenizer applies; everything else tiny
+DIMS = ModelDimensions(n_mels=80, n_audio_ctx=1500, n_audio_state=32, n_audio_head=2, n_audio_layer=1,
+                       n_vocab=51865, n_text_ctx=32, n_text_state=32, n_text_head=2, n_text_layer=1)
+
+
+def toy_checkpoint(directory):
+    torch.manual_seed(0)
+    model = Whisper(DIMS)
+    # Whisper leaves the decoder's positional embedding uninitialized
+    torch.nn.init.normal_(model.decoder.positional_embedding, std=0.02)
+    path = os.path.join(directory, "toy.pt")
+    torch.save(dict(dims=DIMS.__dict__, model_state_dict=model.state_dict()), path)
+    return path
+
+
+def clip(seed, seconds=2):
+    return np.random.default_rng(seed).normal(0, 0.1, seconds * 16000).astype(np.float32)
+
+
+class _Patched:
+    """Replace a module attribute for the duration of a with block"""
+
+    def __init__(self, module, name, value):
+        self.module, self.name, self.value = module, name, value
+
+    def __enter__(self):
+        self.original = getattr(self.module, self.name)
+        setattr(self.module, self.name, self.value)
+
+    def __exit__(self, *exc_info):
+        setattr(self.module, self.name, self.original)
+
+
+def recording_batched_many(calls, fail_languages=()):
+    """Stand-in for transcribe_batched_many that records each call's group"""
+    def transcribe_batched_many(model, audios, batch_size, language=None, task="transcribe", **kwargs):
+        calls.append((len(audios), language, task))
+        if language in fail_languages:
+            raise RuntimeError(f"decoder failed for {language}")
+        return [dict(text=f"{task}:{language}:{len(audio)}", segments=[], language=language) for audio in audios]
+    return transcribe_batched_many
+
+
+def test_micro_batching_and_groups():
+    """Requests in one latency window should share a batch per (model, language, task)"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        calls = []
+        with _Patched(stt_server, "transcribe_batched_many", recording_batched_many(calls)):
+            service = TranscriptionService(toy_checkpoint(tmp_dir), batch_size=16, latency_window=0.5,
+                                           use_cache=False)
+            futures = [service.submit_audio(clip(0), language="en"),
+                       service.submit_audio(clip(1), language="en"),
+                       service.submit_audio(clip(2), language="de"),
+                       service.submit_audio(clip(3), language="en", task="translate")]
+            results = [future.result(timeout=30) for future in futures]
+        assert sorted(calls) == [(1, "de", "transcribe"), (1, "en", "translate"), (2, "en", "transcribe")]
+        assert [result["text"] for result in results] == ["transcribe:en:32000", "transcribe:en:32000",
+                                                          "transcribe:de:32000", "translate:en:32000"]
+        stats = service.stats()
+        assert stats["batches"] == 3 and stats["completed"] == 4 and stats["in_flight"] == 0
+
+
+def test_errors_reach_every_future():
+    """A failed group fails all of its requests, and the service keeps running"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        calls = []
+        with _Patched(stt_server, "transcribe_batched_many", recording_batched_many(calls, fail_languages=("ko",))):
+            service = TranscriptionService(toy_checkpoint(tmp_dir), batch_size=16, latency_window=0.5,
+                                           use_cache=False)
+            failing = [service.submit_audio(clip(i), language="ko") for i in range(3)]
+            passing = service.submit_audio(clip(9), language="en")
+            for future in failing:
+                try:
+                    future.result(timeout=30)
+                    raise AssertionError("expected the group's error")
+                except RuntimeError as e:
+                    assert "decoder failed for ko" in str(e)
+            assert passing.result(timeout=30)["language"] == "en"
+            assert service.submit_audio(clip(10), language="en").result(timeout=30)["text"]
+        stats = service.stats()
+        assert stats["failed"] == 3 and stats["completed"] == 2 and stats["in_flight"] == 0
+
+
+def test_failed_cache_write():
+    """A cache that can't be written must not take down the inference thread"""
+    class BrokenCache:
+        def get(self, key):
+            return None
+
+        def put(self, key, result):
+            raise OSError("No space left on device")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        calls = []
+        with _Patched(stt_server, "transcribe_batched_many", recording_batched_many(calls)), \
+                _Patched(stt_server, "get_cache", lambda: BrokenCache()):
+            service = TranscriptionService(toy_checkpoint(tmp_dir), latency_window=0.01, use_cache=True)
+            assert service.submit_file(SAMPLE, language="en").result(timeout=60)["language"] == "en"
+            assert service.submit_file(SAMPLE, language="de").result(timeout=60)["language"] == "de"
+        assert service.stats()["in_flight"] == 0
+
+
+def test_long_file_route():
+    """Long files keep their language, and tasks other than transcribe are refused"""
+    seen = []
+
+    def transcribe_audio_result(file_path, model_size, **options):
+        seen.append(options)
+        return dict(text="long", segments=[], language=options.get("language"))
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        with _Patched(stt_server, "MAX_BATCHED_DURATION", 1), \
+                _Patched(whisper_stt, "transcribe_audio_result", transcribe_audio_result):
+            service = TranscriptionService(toy_checkpoint(tmp_dir), latency_window=0.01, use_cache=False)
+            assert service.submit_file(SAMPLE, language="ko").result(timeout=30)["language"] == "ko"
+            assert seen[0]["language"] == "ko"
+            try:
+                service.submit_file(SAMPLE, language="ko", task="translate")
+                raise AssertionError("expected a ValueError for translating a long file")
+            except ValueError as e:
+                assert "translate" in str(e)
+        assert len(seen) == 1
+
+
+def test_long_file_does_not_block():
+    """Short requests submitted with a long file should finish while the long file is still running"""
+    release = threading.Event()
+
+    def transcribe_audio_result(file_path, model_size, **options):
+        release.wait(timeout=30)
+        return dict(text="long", segments=[], language=options.get("language"))
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        calls = []
+        with _Patched(stt_server, "MAX_BATCHED_DURATION", 5), \
+                _Patched(stt_server, "transcribe_batched_many", recording_batched_many(calls)), \
+                _Patched(whisper_stt, "transcribe_audio_result", transcribe_audio_result):
+            service = TranscriptionService(toy_checkpoint(tmp_dir), latency_window=0.01, use_cache=False)
+            long_job = service.submit_file(SAMPLE, language="en")
+            short_jobs = [service.submit_audio(clip(i), language="en") for i in range(3)]
+            try:
+                assert all(future.result(timeout=10)["language"] == "en" for future in short_jobs)
+                assert not long_job.done()
+            finally:
+                release.set()
+            assert long_job.result(timeout=10)["text"] == "long"
+        assert service.stats()["in_flight"] == 0
+
+
+def test_light_client():
+    """The client must not pull in torch or Whisper, and reports a missing service"""
+    code = ("import sys, stt_client; "
+            "print(sorted(m for m in ('torch', 'whisper', 'stt_server') if m in sys.modules)); "
+            "print(stt_client.server_available('http://127.0.0.1:9', timeout=0.5))")
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__))).stdout.split()
+    assert output == ["[]", "False"]
+
+
+def main():
+    print("Transcription Service Test")
+    print("=" * 26)
+
+    test_micro_batching_and_groups()
+    print("✓ Requests batched per model, language and task")
+    test_errors_reach_every_future()
+    print("✓ Errors reach every request in a failed group")
+    test_failed_cache_write()
+    print("✓ Service survives a failed cache write")
+    test_long_file_route()
+    print("✓ Long files keep their language; translation refused")
+    test_long_file_does_not_block()
+    print("✓ Short requests don't wait behind long files")
+    test_light_client()
+    print("✓ Client imports without torch")
+
+    print("\nTest completed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Test script for the incremental SRT/WebVTT/JSONL writers
+"""
+
+import json
+import os
+import tempfile
+
+from subtitle_writers import format_timestamp, open_writers
+
+SEGMENTS = [
+    {"id": 0, "start": 0.0, "end": 2.5, "text": " Hello there."},
+    {"id": 1, "start": 3661.25, "end": 3662.0, "text": " An hour later."},
+]
+
+
+def test_format_timestamp():
+    """Timestamps should be zero-padded with millisecond precision"""
+    assert format_timestamp(0) == "00:00:00.000"
+    assert format_timestamp(3661.25, ",") == "01:01:01,250"
+
+
+def test_writers_append_incrementally():
+    """Each segment should be on disk as soon as it is written"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        writers = open_writers("talk.wav", ["srt", "vtt", "jsonl"], output_dir=tmp_dir)
+        srt, vtt, jsonl = writers
+
+        srt.write(SEGMENTS[0])
+        with open(srt.path, encoding="utf-8") as f:
+            assert f.read() == "1\n00:00:00,000 --> 00:00:02,500\nHello there.\n\n"
+
+        for segment in SEGMENTS:
+            vtt.write(segment)
+            jsonl.write(segment)
+        srt.write(SEGMENTS[1])
+        for writer in writers:
+            writer.close()
+
+        assert os.path.basename(srt.path) == "talk_transcription.srt"
+        with open(srt.path, encoding="utf-8") as f:
+            assert f.read().endswith("2\n01:01:01,250 --> 01:01:02,000\nAn hour later.\n\n")
+        with open(vtt.path, encoding="utf-8") as f:
+            assert f.read().startswith("WEBVTT\n\n00:00:00.000 --> 00:00:02.500\nHello there.\n\n")
+        with open(jsonl.path, encoding="utf-8") as f:
+            assert [json.loads(line) for line in f] == SEGMENTS
+
+
+def main():
+    print("Subtitle Writer Test")
+    print("=" * 20)
+
+    test_format_timestamp()
+    print("✓ Timestamps formatted")
+    test_writers_append_incrementally()
+    print("✓ Writers append segments incrementally")
+
+    print("\nTest completed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Test script for the on-disk transcription cache
+"""
+
+import os
+import tempfile
+import time
+
+from transcription_cache import TranscriptionCache, file_sha256
+
+
+def result(text):
+    return {"text": text, "segments": [{"id": 0, "start": 0.0, "end": 1.0, "text": text}], "language": "ko"}
+
+
+def test_make_key():
+    """Keys should depend on everything that changes the output, and nothing else"""
+    key = TranscriptionCache.make_key("abc", "base", "ko", options={"batch_size": 8, "chunk_duration": 600})
+    assert key == TranscriptionCache.make_key("abc", "base", "ko", options={"chunk_duration": 600, "batch_size": 8})
+    assert TranscriptionCache.make_key("abc", "base") == TranscriptionCache.make_key("abc", "base", None, options={})
+    others = [TranscriptionCache.make_key("abd", "base", "ko", options={"batch_size": 8, "chunk_duration": 600}),
+              TranscriptionCache.make_key("abc", "small", "ko", options={"batch_size": 8, "chunk_duration": 600}),
+              TranscriptionCache.make_key("abc", "base", None, options={"batch_size": 8, "chunk_duration": 600}),
+              TranscriptionCache.make_key("abc", "base", "ko", "translate",
+                                          options={"batch_size": 8, "chunk_duration": 600}),
+              TranscriptionCache.make_key("abc", "base", "ko", options={"batch_size": 8, "chunk_duration": 300})]
+    assert len({key, *others}) == 6
+
+    # Copies of a file share its hash
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name in ("a.wav", "b.wav"):
+            with open(os.path.join(tmp_dir, name), "wb") as f:
+                f.write(b"RIFF" + bytes(range(256)))
+        assert file_sha256(os.path.join(tmp_dir, "a.wav")) == file_sha256(os.path.join(tmp_dir, "b.wav"))
+
+
+def test_round_trip():
+    """A stored result should come back unchanged, and only for its own key"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache = TranscriptionCache(tmp_dir)
+        assert cache.get("missing") is None
+        cache.put("k1", result("안녕하세요"))
+        assert cache.get("k1") == result("안녕하세요")
+        cache.put("k1", result("replaced"))
+        assert cache.get("k1")["text"] == "replaced"
+        # A corrupt entry is a miss
+        with open(os.path.join(cache.results_dir, "k2.json"), "w") as f:
+            f.write('{"text": ')
+        assert cache.get("k2") is None
+
+
+def test_atomic_put():
+    """A failed write should leave the previous entry and no temporary files behind"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache = TranscriptionCache(tmp_dir)
+        cache.put("k1", result("first"))
+        try:
+            cache.put("k1", {"text": object()})
+            raise AssertionError("expected a TypeError for an unserializable result")
+        except TypeError:
+            pass
+        assert cache.get("k1")["text"] == "first"
+        assert sorted(name for name in os.listdir(cache.results_dir) if not name.startswith(".")) == ["k1.json"]
+
+
+def test_lru_eviction():
+    """Past the size budget the least recently used entries should go first"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        entry_size = len(b'{"text": "' + b"x" * 1000 + b'"}')
+        cache = TranscriptionCache(tmp_dir, max_size_mb=3.5 * entry_size / (1024 * 1024))
+        now = time.time()
+        for age, key in enumerate(("k3", "k2", "k1")):
+            cache.put(key, {"text": "x" * 1000})
+            os.utime(cache._path(key), (now - 100 * (age + 1), now - 100 * (age + 1)))
+        # Reading k1 makes it the most recent, so k2 is now the oldest
+        assert cache.get("k1") is not None
+        cache.put("k4", {"text": "x" * 1000})
+        assert cache.get("k2") is None
+        assert all(cache.get(key) is not None for key in ("k1", "k3", "k4"))
+        assert cache.evict() == 0
+
+
+def main():
+    print("Transcription Cache Test")
+    print("=" * 24)
+
+    test_make_key()
+    print("✓ Keys depend on audio, model, language, task and options")
+    test_round_trip()
+    print("✓ Results round-trip through the cache")
+    test_atomic_put()
+    print("✓ Failed writes leave the old entry intact")
+    test_lru_eviction()
+    print("✓ Least recently used entries evicted first")
+
+    print("\nTest completed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,12 +8,14 @@ import os
 import numpy as np
 import soundfile as sf
 
+from model_registry import get_model
+
 def test_whisper_installation():
     """Test if Whisper is installed and working correctly"""
     try:
-        # Try to load the tiny model (fastest for testing)
+        # Try to load the tiny model (fastest for testing); memory-mapped if converted
         print("Loading tiny Whisper model...")
-        model = whisper.load_model("tiny")
+        model = get_model("tiny")
         print("✓ Model loaded successfully")
         
         # Testing transcription capability with our example file
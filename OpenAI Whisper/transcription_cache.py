@@ -0,0 +1,203 @@
+"""
+Content-addressed on-disk cache of transcription results
+
+Results are keyed by the SHA-256 of the audio file's bytes plus everything
+that changes the output (model size, language, task and decoding options),
+so renamed or copied files still hit. Each entry is one JSON file holding the
+full {"text", "segments", "language"} result.
+
+Entries are written to a temporary file and moved into place with
+os.replace, so readers in other processes only ever see complete entries.
+Hits refresh the entry's mtime, and once the cache grows past its size
+budget the least recently used entries are deleted under an exclusive lock
+file.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from typing import Any, Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Cache location and size budget (override with environment variables)
+DEFAULT_CACHE_DIR = os.environ.get(
+    "WHISPER_STT_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "whisper_stt"))
+DEFAULT_MAX_SIZE_MB = float(os.environ.get("WHISPER_STT_CACHE_MB", 512))
+
+# In-process memo of file hashes keyed by (path, size, mtime)
+_hash_memo: Dict[tuple, str] = {}
+
+
+def file_sha256(file_path: str, block_size: int = 1024 * 1024) -> str:
+    """
+    SHA-256 of a file's contents, read in blocks
+
+    The result is memoized for the process as long as the file's size and
+    modification time don't change.
+    """
+    stat = os.stat(file_path)
+    memo_key = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+    if memo_key not in _hash_memo:
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(block_size), b""):
+                digest.update(block)
+        _hash_memo[memo_key] = digest.hexdigest()
+    return _hash_memo[memo_key]
+
+
+class _FileLock:
+    """Exclusive inter-process lock held on a lock file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+
+    def __enter__(self):
+        self._file = open(self.path, "a+")
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        else:
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+        return self
+
+    def __exit__(self, *exc_info):
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        else:
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        self._file.close()
+
+
+class TranscriptionCache:
+    def __init__(self, cache_dir: Optional[str] = None, max_size_mb: Optional[float] = None):
+        """
+        On-disk cache of transcription results with LRU eviction
+
+        Args:
+            cache_dir (str): Base cache directory (default: ~/.cache/whisper_stt)
+            max_size_mb (float): Size budget for stored results in MB
+        """
+        self.results_dir = os.path.join(cache_dir or DEFAULT_CACHE_DIR, "results")
+        self.max_size_mb = DEFAULT_MAX_SIZE_MB if max_size_mb is None else max_size_mb
+        self.hits = 0  # Results served by get() so far
+        os.makedirs(self.results_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(audio_hash: str, model_size: str, language: Optional[str] = None,
+                 task: str = "transcribe", options: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Build the cache key for one transcription
+
+        Args:
+            audio_hash (str): SHA-256 of the audio file (see file_sha256)
+            model_size (str): Whisper model size; the registry's default dtype
+                is added unless it is fp32
+            language (str): Requested language, or None for auto-detection
+            task (str): 'transcribe' or 'translate'
+            options (dict): Any other options that change the output
+
+        Returns:
+            str: Hex digest identifying the result
+        """
+        from model_registry import model_identity  # Imported here to keep this module free of torch
+        fields = dict(audio=audio_hash, model=model_identity(model_size), language=language, task=task,
+                      options=options or {})
+        return hashlib.sha256(json.dumps(fields, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.results_dir, f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        Return a cached result, or None on a miss
+
+        A hit marks the entry as recently used.
+        """
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                result = json.load(f)
+            os.utime(path)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        self.hits += 1
+        return result
+
+    def put(self, key: str, result: Dict) -> None:
+        """Store a result atomically, then evict old entries if over budget"""
+        fd, tmp_path = tempfile.mkstemp(dir=self.results_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(result, f, ensure_ascii=False)
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self.evict()
+
+    def evict(self) -> int:
+        """
+        Delete least recently used entries until the cache fits its budget
+
+        Returns:
+            int: Number of entries deleted
+        """
+        return evict_lru(self.results_dir, self.max_size_mb, ".json")
+
+
+def evict_lru(directory: str, max_size_mb: float, suffix: str) -> int:
+    """
+    Delete the least recently used files ending in `suffix` until the directory fits its budget
+
+    Holds an exclusive lock file in the directory while it runs.
+
+    Returns:
+        int: Number of files deleted
+    """
+    with _FileLock(os.path.join(directory, ".lock")):
+        entries = []
+        for name in os.listdir(directory):
+            if not name.endswith(suffix):
+                continue
+            try:
+                stat = os.stat(os.path.join(directory, name))
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+
+        total = sum(size for _, size, _ in entries)
+        budget = max_size_mb * 1024 * 1024
+        deleted = 0
+        for _, size, name in sorted(entries):
+            if total <= budget:
+                break
+            try:
+                os.remove(os.path.join(directory, name))
+                deleted += 1
+            except FileNotFoundError:
+                pass
+            except OSError:
+                continue  # Still open elsewhere (Windows); try again next time
+            total -= size
+        return deleted
+
+
+_cache: Optional[TranscriptionCache] = None
+
+
+def get_cache() -> TranscriptionCache:
+    """Return the default transcription cache"""
+    global _cache
+    if _cache is None:
+        _cache = TranscriptionCache()
+    return _cache
@@ -1,29 +1,109 @@
 import whisper
+import argparse
 import sys
+import math
 import os
 import torch
 import numpy as np
-import soundfile as sf
-from typing import Union, Any
+from typing import Dict, Iterator, Optional, Union, Any
 
+from audio_stream import audio_info, iter_audio_chunks
+from batched_stt import iter_batched_segments, padded_mel, transcribe_batched
+from cascade_stt import transcribe_cascade_file
+from encoder_cache import EncoderCache
+from chunk_journal import model_fingerprint, open_journal
+from chunk_prefetch import DEFAULT_PREFETCH_DEPTH, StageTimer, prefetch
+from chunk_planner import plan_chunks
+from language_id import resolve_language
+from memory_budget import get_memory_budget, plan_job, set_memory_budget, weights_mb
+from model_router import AUTO_MODEL, route_file
+from model_registry import SUPPORTED_DTYPES, get_model, model_identity, set_default_dtype
+from multichannel_stt import channel_paths, iter_channel_chunks, merge_channel_chunks, transcribe_channels
+from parallel_stt import transcribe_chunks_parallel
+from pcm_cache import decoded_path, open_pcm
+from speculative_decoding import SpeculativeModel, transcribe_speculative
+from speech_regions import transcribe_speech_regions
+from stt_profiler import Profiler, profiling
+from stt_results import merge_results, offset_segments
+from subtitle_writers import WRITER_EXTENSIONS, open_writers
+from transcription_cache import file_sha256, get_cache
 
-def transcribe_audio(file_path: str, model_size: str = "base") -> str:
+
+def transcribe_audio(file_path: str, model_size: str = "base", workers: int = 1, batch_size: int = 1,
+                     speech_only: bool = False, use_cache: bool = True, language: Optional[str] = None,
+                     cascade_model: Optional[str] = None, draft_model: Optional[str] = None,
+                     target_rtf: Optional[float] = None, deadline: Optional[float] = None,
+                     multichannel: bool = False) -> str:
     """
     Transcribe audio file using OpenAI Whisper
     
     Args:
         file_path (str): Path to the audio file
-        model_size (str): Size of the Whisper model to use
+        model_size (str): Size of the Whisper model to use, optionally with a
+            dtype ("base:int8"), or "auto" to choose one for this file from
+            calibrated throughput (see model_router.py)
+        workers (int): Number of worker processes for chunked files (default: 1)
+        batch_size (int): 30-second windows per batched encoder/decoder pass for
+            chunked files; 1 uses model.transcribe (default: 1)
+        speech_only (bool): Detect speech regions first and only send those to
+            the model (default: False)
+        use_cache (bool): Reuse and store results in the transcription cache (default: True)
+        language (str): Language code for this file; detected once per file if None
+        cascade_model (str): Larger model that re-transcribes only the segments
+            model_size is unsure about (low avg_logprob, high compression
+            ratio or no_speech_prob); None disables the cascade
+        draft_model (str): Smaller model with the same tokenizer that proposes
+            tokens for model_size to verify (speculative decoding); the output
+            is unchanged, only faster. None decodes normally. Only for direct and
+            sequential chunked transcription, not with workers, batch_size > 1,
+            cascade or speech-only
+        target_rtf (float): With "auto", the largest acceptable processing
+            time / audio duration (default: 1.0)
+        deadline (float): With "auto", the seconds this file may take
+        multichannel (bool): Transcribe each channel as its own stream instead
+            of the mono mix, batched together (see multichannel_stt.py);
+            batch_size is then per channel (default: False)
     
     Returns:
         str: Transcribed text
     """
+    result = transcribe_audio_result(file_path, model_size, workers=workers, batch_size=batch_size,
+                                     speech_only=speech_only, use_cache=use_cache, language=language,
+                                     cascade_model=cascade_model, draft_model=draft_model,
+                                     target_rtf=target_rtf, deadline=deadline, multichannel=multichannel)
+    return str(result["text"])
+
+
+def transcribe_audio_result(file_path: str, model_size: str = "base", workers: int = 1, batch_size: int = 1,
+                            speech_only: bool = False, use_cache: bool = True,
+                            language: Optional[str] = None, cascade_model: Optional[str] = None,
+                            draft_model: Optional[str] = None, target_rtf: Optional[float] = None,
+                            deadline: Optional[float] = None, multichannel: bool = False) -> Dict:
+    """
+    Transcribe audio file using OpenAI Whisper, returning the full result
+    
+    Takes the same arguments as transcribe_audio.
+    
+    Returns:
+        dict: {"text", "segments", "language"} with segment timestamps in file time,
+            plus per-channel results under "channels" in multichannel mode
+    """
     # Check if file exists
     if not os.path.exists(file_path):
         raise FileNotFoundError(f"Audio file not found: {file_path}")
+    if multichannel and (cascade_model or speech_only or draft_model):
+        raise ValueError("Multichannel mode can't be combined with cascade, speech-only or draft decoding")
+    if draft_model and (workers > 1 or batch_size > 1 or cascade_model or speech_only):
+        raise ValueError("Draft decoding only applies to direct and sequential chunked transcription; "
+                         "it can't be combined with workers, batch_size > 1, cascade or speech-only")
+    
+    # Choose the model for this file from its language, duration and the time budget
+    if model_size == AUTO_MODEL:
+        decision = route_file(file_path, language, target_rtf, deadline, use_cache)
+        model_size, language = decision.model, decision.language
     
     # Get file info
-    file_info = sf.info(file_path)
+    file_info = audio_info(file_path)
     duration = file_info.duration
     
     # Get file size
@@ -34,85 +114,488 @@ def transcribe_audio(file_path: str, model_size: str = "base") -> str:
     
     print(f"Audio file info - Duration: {duration/60:.1f} minutes, Size: {file_size_mb:.1f} MB")
     
-    # For long files (>30 minutes) OR large files (>100 MB), process in chunks
-    if duration > 1800 or file_size_mb > 100:  # 30 minutes OR 100 MB
+    # Chunking, chunk length and workers follow from the memory budget. The
+    # cascade and speech-only paths always go chunk by chunk, in one process.
+    if cascade_model or speech_only:
+        plan = plan_job(duration, model_size, prefetch_depth=0, channels=file_info.channels, chunked=True)
+    elif multichannel:
+        plan = plan_job(duration, model_size, batch_size=batch_size, channels=file_info.channels, chunked=True,
+                        streams=file_info.channels)
+    else:
+        plan = plan_job(duration, model_size, workers=workers, batch_size=batch_size, channels=file_info.channels)
+    print(plan.describe())
+    peak_mb = plan.peak_mb + (weights_mb(cascade_model) if cascade_model else 0)
+    
+    # Return a cached result if this exact audio was transcribed with the same settings. Chunk
+    # boundaries change the text, so the key follows the plan rather than the arguments.
+    cache_key = None
+    if use_cache:
+        cache = get_cache()
+        options = {"workers": plan.workers > 1, "batch_size": batch_size, "speech_only": speech_only,
+                   "chunk_duration": plan.chunk_duration if plan.chunked else None}
+        if cascade_model:
+            options["cascade"] = model_identity(cascade_model)
+        if draft_model:
+            options["draft"] = model_identity(draft_model)
+        if multichannel:
+            options["multichannel"] = True
+        cache_key = cache.make_key(file_sha256(file_path), model_size, language, options=options)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            print(f"Using cached transcription for {file_path}")
+            return cached
+    
+    # Wait for memory if other jobs on this machine hold too much of the budget
+    with get_memory_budget().reserve(peak_mb, os.path.basename(file_path)):
+        result = _transcribe_planned(file_path, model_size, plan, batch_size, speech_only, use_cache,
+                                     language, cascade_model, draft_model, multichannel)
+    
+    if cache_key is not None:
+        get_cache().put(cache_key, result)
+    return result
+
+
+def _transcribe_planned(file_path: str, model_size: str, plan, batch_size: int, speech_only: bool,
+                        use_cache: bool, language: Optional[str], cascade_model: Optional[str],
+                        draft_model: Optional[str], multichannel: bool = False) -> Dict:
+    """Run transcribe_audio_result's job according to its memory plan"""
+    # Decode once to 16 kHz mono; every later pass reads this copy
+    audio_path = decoded_path(file_path)
+    
+    if multichannel:
+        # Each channel on its own, all channels in the same batches
+        result = transcribe_multichannel_result(file_path, model_size, plan.chunk_duration,
+                                                batch_size=batch_size, language=language)
+    elif cascade_model:
+        # Small model everywhere, the larger model only on weak segments
+        result = transcribe_cascade_file(audio_path, model_size, cascade_model, language, use_cache,
+                                         chunk_duration=plan.chunk_duration)
+    elif speech_only:
+        model = get_model(model_size)
+        language = resolve_language(model, audio_path, model_size, language, use_cache)
+        result = transcribe_speech_regions(model, audio_path, pack_duration=plan.chunk_duration, language=language)
+        print(f"Sent {result['speech_seconds']:.0f} of {result['total_seconds']:.0f} audio-seconds "
+              f"to the model ({100 * result['speech_seconds'] / max(result['total_seconds'], 1e-9):.0f}%)")
+    # Long files, or files whose mel would not fit the memory budget at once, are processed in chunks
+    elif plan.chunked:
         print(f"Large audio file detected. Processing in chunks...")
-        return transcribe_long_audio(file_path, model_size)
+        if batch_size > 1 and plan.workers <= 1:
+            result = transcribe_long_audio_batched_result(file_path, model_size, plan.chunk_duration,
+                                                          batch_size=batch_size, language=language)
+        else:
+            result = transcribe_long_audio_result(file_path, model_size, plan.chunk_duration, workers=plan.workers,
+                                                  language=language, draft_model=draft_model)
     else:
-        # Load the Whisper model
-        print(f"Loading Whisper {model_size} model...")
-        model = whisper.load_model(model_size)
+        # Get the Whisper model (loaded once per process)
+        model = get_model(model_size)
+        language = resolve_language(model, audio_path, model_size, language, use_cache)
         
-        # Transcribe the audio directly
+        # Transcribe the audio directly from the memory-mapped decode
         print(f"Transcribing {file_path}...")
-        result = model.transcribe(file_path)
-        return str(result["text"])
+        if draft_model:
+            result = transcribe_speculative(model, get_model(draft_model), open_pcm(audio_path), language=language)
+        else:
+            result = model.transcribe(open_pcm(audio_path), language=language)
+    return result
 
 
-def transcribe_long_audio(file_path: str, model_size: str = "base", chunk_duration: int = 600) -> str:
+def transcribe_long_audio(file_path: str, model_size: str = "base", chunk_duration: Optional[float] = None,
+                          workers: int = 1, resume: bool = True, language: Optional[str] = None,
+                          draft_model: Optional[str] = None, prefetch_depth: int = DEFAULT_PREFETCH_DEPTH) -> str:
     """
     Transcribe long audio files by processing in chunks
     
     Args:
         file_path (str): Path to the audio file
         model_size (str): Size of the Whisper model to use
-        chunk_duration (int): Duration of each chunk in seconds (default: 10 minutes)
+        chunk_duration (float): Duration of each chunk in seconds; None picks the
+            longest (up to 10 minutes) and as many workers as fit the memory budget
+        workers (int): Number of worker processes; more than 1 transcribes chunks in parallel
+        resume (bool): Journal finished chunks and skip them on a rerun (default: True)
+        language (str): Language code for every chunk; detected once per file if None
+        draft_model (str): Draft model for speculative decoding of sequential chunks; not
+            available with workers > 1 (default: None)
+        prefetch_depth (int): Chunks read ahead in the background while one is
+            transcribed; 0 reads inline (default: 1)
     
     Returns:
         str: Transcribed text
     """
-    print(f"Processing long audio file in {chunk_duration/60:.1f}-minute chunks...")
+    return str(transcribe_long_audio_result(file_path, model_size, chunk_duration, workers, resume,
+                                            language, draft_model, prefetch_depth)["text"])
+
+
+def transcribe_long_audio_result(file_path: str, model_size: str = "base", chunk_duration: Optional[float] = None,
+                                 workers: int = 1, resume: bool = True, language: Optional[str] = None,
+                                 draft_model: Optional[str] = None,
+                                 prefetch_depth: int = DEFAULT_PREFETCH_DEPTH) -> Dict:
+    """
+    Transcribe long audio files in chunks, returning the full result
     
-    # Load the Whisper model
-    print(f"Loading Whisper {model_size} model...")
-    model = whisper.load_model(model_size)
+    Takes the same arguments as transcribe_long_audio.
     
-    # Load audio file
-    audio_data, sample_rate = sf.read(file_path)
+    Returns:
+        dict: {"text", "segments", "language"} with segment timestamps in file time
+    """
+    if draft_model and workers > 1:
+        raise ValueError("Draft decoding only applies to sequential chunks; it can't be combined with workers")
     
-    # If stereo, convert to mono
-    if len(audio_data.shape) > 1:
-        audio_data = audio_data.mean(axis=1)
+    # Planning, language detection and chunk reads all share one 16 kHz decode
+    audio_path = decoded_path(file_path)
+    file_info = audio_info(audio_path)
     
-    # Calculate chunk size in samples
-    chunk_size = int(chunk_duration * sample_rate)
-    total_samples = len(audio_data)
-    total_chunks = (total_samples + chunk_size - 1) // chunk_size  # Ceiling division
+    if chunk_duration is None:
+        plan = plan_job(file_info.duration, model_size, workers=workers, prefetch_depth=prefetch_depth,
+                        chunked=True)
+        chunk_duration, workers = plan.chunk_duration, plan.workers
     
-    transcriptions = []
+    if workers > 1:
+        # Make sure there are at least as many chunks as workers, in whole 30-second windows
+        per_worker = math.ceil(file_info.duration / workers / 30) * 30
+        chunk_duration = max(30, min(chunk_duration, per_worker))
     
-    for i in range(total_chunks):
-        start_sample = i * chunk_size
-        end_sample = min((i + 1) * chunk_size, total_samples)
+    print(f"Processing long audio file in {chunk_duration/60:.1f}-minute chunks...")
+    
+    # Cut chunks at quiet gaps, packed into whole 30-second windows
+    plan = plan_chunks(audio_path, chunk_duration)
+    total_chunks = len(plan)
+    
+    journal = None
+    if resume:
+        fingerprint = model_fingerprint(model_size, file_sha256(file_path), mode="chunked", language=language)
+        journal = open_journal(file_path, plan, fingerprint)
+    
+    if workers > 1:
+        results = [journal.completed.get(i) if journal else None for i in range(total_chunks)]
+        pending = [i for i, result in enumerate(results) if result is None]
         
-        # Extract chunk
-        audio_chunk = audio_data[start_sample:end_sample]
+        def record(pending_index, result):
+            results[pending[pending_index]] = result
+            if journal is not None:
+                journal.append(pending[pending_index], result)
         
+        # The language is detected once, in a worker, if it wasn't given
+        transcribe_chunks_parallel(audio_path, [plan[i] for i in pending], model_size,
+                                   workers=workers, on_result=record, language=language)
+        return _finish_plan(results, journal)
+    
+    # Get the Whisper model (loaded once per process)
+    model = get_model(model_size)
+    
+    # Detect the language once for the whole file instead of once per chunk
+    language = resolve_language(model, audio_path, model_size, language)
+    if draft_model:
+        model = SpeculativeModel(model, get_model(draft_model))
+    
+    def transcribe_chunk(audio_chunk, offset):
+        return offset_segments(model.transcribe(audio_chunk, fp16=False, language=language), offset)
+    
+    # model.transcribe computes its own mel, so only reading is prefetched
+    return _transcribe_plan(audio_path, plan, transcribe_chunk, journal, prefetch_depth=prefetch_depth)
+
+
+def _transcribe_plan(file_path: str, plan, transcribe_chunk, journal=None, prepare=None,
+                     prefetch_depth: int = DEFAULT_PREFETCH_DEPTH, channel_files=None,
+                     merge=merge_results) -> Dict:
+    """
+    Transcribe planned chunks in order, skipping chunks already in the journal
+    
+    The next chunks are read (and prepared) in a background thread while the
+    current one is transcribed; the stage timings are printed at the end.
+    
+    Args:
+        file_path (str): Path to the audio file
+        plan (list): (start_sample, end_sample) chunk ranges
+        transcribe_chunk (callable): transcribe_chunk(audio_chunk, offset_seconds)
+            returning a result with file-time timestamps
+        journal (ChunkJournal): Optional journal of finished chunks
+        prepare (callable): Optional prepare(audio_chunk) run in the background,
+            e.g. the log-mel spectrogram; transcribe_chunk receives its result
+        prefetch_depth (int): Prepared chunks kept ready ahead; 0 reads inline
+        channel_files (list): Read each chunk from these per-channel files
+            instead; prepare and transcribe_chunk then get a list of chunks
+        merge (callable): Combines the chunk results (default: merge_results)
+    
+    Returns:
+        dict: Merged {"text", "segments", "language"} result
+    """
+    sample_rate = audio_info(file_path).samplerate
+    total_chunks = len(plan)
+    results = [journal.completed.get(i) if journal else None for i in range(total_chunks)]
+    pending = [i for i, result in enumerate(results) if result is None]
+    
+    # Stream only the unfinished chunks instead of loading the file into memory,
+    # resampled to the 16 kHz that Whisper expects
+    ranges = [plan[i] for i in pending]
+    if channel_files is not None:
+        chunks = iter_channel_chunks(channel_files, ranges, sample_rate=whisper.audio.SAMPLE_RATE)
+    else:
+        chunks = iter_audio_chunks(file_path, ranges=ranges, sample_rate=whisper.audio.SAMPLE_RATE)
+    timer = StageTimer()
+    if prepare is not None:
+        prepare_chunk = lambda chunk: (chunk[0], chunk[1], prepare(chunk[2]))
+    else:
+        prepare_chunk = None
+    prefetched = prefetch(chunks, prepare_chunk, prefetch_depth, timer)
+    for i, (start_sample, end_sample, audio_chunk) in zip(pending, prefetched):
         print(f"Processing chunk {i+1}/{total_chunks}...")
         
         try:
-            # Transcribe chunk
-            result = model.transcribe(audio_chunk, fp16=False)
-            transcriptions.append(str(result["text"]))
+            with timer.stage("inference"):
+                results[i] = transcribe_chunk(audio_chunk, start_sample / sample_rate)
+            if journal is not None:
+                journal.append(i, results[i])
             
             # Optional: Add a small delay to prevent overwhelming the system
             # time.sleep(0.1)
         except Exception as e:
             print(f"Error transcribing chunk {i+1}: {e}")
-            transcriptions.append("")  # Add empty string to maintain order
+            # Leave the chunk empty to keep the order; a rerun will retry it
     
-    # Combine all transcriptions
-    full_transcription = " ".join(transcriptions)
-    return full_transcription
+    if pending:
+        print(timer.summary())
+    return _finish_plan(results, journal, merge)
+
 
+def _finish_plan(results, journal=None, merge=merge_results) -> Dict:
+    """Merge chunk results; drop the journal once every chunk has succeeded"""
+    if journal is not None and all(result is not None for result in results):
+        journal.remove()
+    return merge(results)
 
-def save_transcription_to_output_folder(transcription: str, original_file_path: str) -> str:
+
+def transcribe_long_audio_batched(file_path: str, model_size: str = "base", chunk_duration: Optional[float] = None,
+                                  batch_size: int = 8, resume: bool = True, language: Optional[str] = None,
+                                  prefetch_depth: int = DEFAULT_PREFETCH_DEPTH,
+                                  encoder_cache: Optional[EncoderCache] = None) -> str:
+    """
+    Transcribe long audio files in chunks, batching the 30-second windows of each chunk
+    
+    Args:
+        file_path (str): Path to the audio file
+        model_size (str): Size of the Whisper model to use
+        chunk_duration (float): Duration of each chunk in seconds; None picks the
+            longest (up to 10 minutes) that fits the memory budget
+        batch_size (int): Number of 30-second windows per encoder/decoder pass
+        resume (bool): Journal finished chunks and skip them on a rerun (default: True)
+        language (str): Language code for every window; detected once per file if None
+        prefetch_depth (int): Chunks read and turned into log-mel spectrograms in
+            the background while one is transcribed; 0 does it inline (default: 1)
+        encoder_cache (EncoderCache): Reuse and store encoder outputs per window,
+            for decoding the same audio again (see encoder_cache.py); a single
+            pass never hits, so the default is None
+    
+    Returns:
+        str: Transcribed text
+    """
+    return str(transcribe_long_audio_batched_result(file_path, model_size, chunk_duration, batch_size,
+                                                    resume, language, prefetch_depth, encoder_cache)["text"])
+
+
+def transcribe_long_audio_batched_result(file_path: str, model_size: str = "base",
+                                         chunk_duration: Optional[float] = None,
+                                         batch_size: int = 8, resume: bool = True,
+                                         language: Optional[str] = None,
+                                         prefetch_depth: int = DEFAULT_PREFETCH_DEPTH,
+                                         encoder_cache: Optional[EncoderCache] = None) -> Dict:
+    """
+    Batched chunked transcription, returning the full result
+    
+    Takes the same arguments as transcribe_long_audio_batched.
+    
+    Returns:
+        dict: {"text", "segments", "language"} with segment timestamps in file time
+    """
+    if chunk_duration is None:
+        chunk_duration = plan_job(audio_info(file_path).duration, model_size, batch_size=batch_size,
+                                  prefetch_depth=prefetch_depth, chunked=True,
+                                  encoder_cache=encoder_cache is not None).chunk_duration
+    print(f"Processing long audio file in {chunk_duration/60:.1f}-minute chunks "
+          f"({batch_size} windows per batch)...")
+    
+    # Get the Whisper model (loaded once per process)
+    model = get_model(model_size)
+    
+    # Planning, language detection and chunk reads all share one 16 kHz decode
+    audio_path = decoded_path(file_path)
+    
+    # Cut chunks at quiet gaps, packed into whole 30-second windows
+    plan = plan_chunks(audio_path, chunk_duration)
+    
+    journal = None
+    if resume:
+        fingerprint = model_fingerprint(model_size, file_sha256(file_path), mode="batched", language=language)
+        journal = open_journal(file_path, plan, fingerprint)
+    
+    # Detect the language once for the whole file instead of once per chunk
+    language = resolve_language(model, audio_path, model_size, language)
+    
+    def transcribe_chunk(audio_chunk, offset):
+        return transcribe_batched(model, audio_chunk, batch_size=batch_size, language=language,
+                                  time_offset=offset, encoder_cache=encoder_cache)
+    
+    # The batched engine takes the mel directly, so it is computed ahead too
+    return _transcribe_plan(audio_path, plan, transcribe_chunk, journal,
+                            prepare=lambda audio_chunk: padded_mel(audio_chunk, model.dims.n_mels),
+                            prefetch_depth=prefetch_depth)
+
+
+def transcribe_multichannel(file_path: str, model_size: str = "base", chunk_duration: Optional[float] = None,
+                            batch_size: int = 1, resume: bool = True, language: Optional[str] = None,
+                            prefetch_depth: int = DEFAULT_PREFETCH_DEPTH,
+                            encoder_cache: Optional[EncoderCache] = None) -> str:
+    """
+    Transcribe each channel of a file as its own stream, in chunks
+    
+    Every chunk's channels are decoded together: their 30-second windows at
+    the same offset share one batched encoder/decoder pass, so a two-party
+    call recording takes about as long as one channel.
+    
+    Args:
+        file_path (str): Path to the audio file
+        model_size (str): Size of the Whisper model to use
+        chunk_duration (float): Duration of each chunk in seconds; None picks the
+            longest (up to 10 minutes) that fits the memory budget
+        batch_size (int): 30-second windows per channel in each encoder/decoder pass
+        resume (bool): Journal finished chunks and skip them on a rerun (default: True)
+        language (str): Language code for every channel; detected once per channel if None
+        prefetch_depth (int): Chunks read and turned into log-mel spectrograms in
+            the background while one is transcribed; 0 does it inline (default: 1)
+        encoder_cache (EncoderCache): Reuse and store encoder outputs per window,
+            for decoding the same audio again (see encoder_cache.py); a single
+            pass never hits, so the default is None
+    
+    Returns:
+        str: One "Channel N: ..." line per turn, in time order
+    """
+    return str(transcribe_multichannel_result(file_path, model_size, chunk_duration, batch_size, resume,
+                                              language, prefetch_depth, encoder_cache)["text"])
+
+
+def transcribe_multichannel_result(file_path: str, model_size: str = "base", chunk_duration: Optional[float] = None,
+                                   batch_size: int = 1, resume: bool = True, language: Optional[str] = None,
+                                   prefetch_depth: int = DEFAULT_PREFETCH_DEPTH,
+                                   encoder_cache: Optional[EncoderCache] = None) -> Dict:
+    """
+    Multichannel chunked transcription, returning the full result
+    
+    Takes the same arguments as transcribe_multichannel.
+    
+    Returns:
+        dict: {"text", "segments", "language", "channels"} (see multichannel_stt.merge_channels)
+            with segment timestamps in file time
+    """
+    file_info = audio_info(file_path)
+    if chunk_duration is None:
+        chunk_duration = plan_job(file_info.duration, model_size, batch_size=batch_size,
+                                  prefetch_depth=prefetch_depth, channels=file_info.channels, chunked=True,
+                                  streams=file_info.channels, encoder_cache=encoder_cache is not None).chunk_duration
+    print(f"Processing {file_info.channels} channel(s) separately in {chunk_duration/60:.1f}-minute chunks "
+          f"({batch_size} windows per channel per batch)...")
+    
+    # Get the Whisper model (loaded once per process)
+    model = get_model(model_size)
+    
+    # Chunks are cut at quiet gaps in the mix, then read from each channel's own 16 kHz decode
+    audio_path = decoded_path(file_path)
+    paths = channel_paths(file_path)
+    plan = plan_chunks(audio_path, chunk_duration)
+    
+    journal = None
+    if resume:
+        fingerprint = model_fingerprint(model_size, file_sha256(file_path), mode="multichannel",
+                                        batch_size=batch_size, language=language)
+        journal = open_journal(file_path, plan, fingerprint)
+    
+    # Detect each channel's language once for the whole file
+    languages = [resolve_language(model, path, model_size, language) for path in paths]
+    
+    def transcribe_chunk(audio_chunks, offset):
+        return transcribe_channels(model, audio_chunks, batch_size=batch_size, language=languages,
+                                   time_offset=offset, encoder_cache=encoder_cache)
+    
+    return _transcribe_plan(audio_path, plan, transcribe_chunk, journal,
+                            prepare=lambda audio_chunks: [padded_mel(chunk, model.dims.n_mels)
+                                                          for chunk in audio_chunks],
+                            prefetch_depth=prefetch_depth, channel_files=paths, merge=merge_channel_chunks)
+
+
+def iter_transcription_segments(file_path: str, model_size: str = "base", batch_size: int = 8,
+                                language: Optional[str] = None, chunk_duration: Optional[float] = None,
+                                encoder_cache: Optional[EncoderCache] = None) -> Iterator[Dict]:
+    """
+    Transcribe a file incrementally, yielding segments as each batch of windows finishes
+    
+    Only one chunk of audio is held in memory at a time and segments are not
+    accumulated, so memory stays flat however long the file is.
+    The file's memory reservation is held while the generator is alive;
+    a consumer that stops early should close() it to release the reservation
+    and stop the read-ahead right away.
+    
+    Args:
+        file_path (str): Path to the audio file
+        model_size (str): Size of the Whisper model to use
+        batch_size (int): 30-second windows per encoder/decoder pass; smaller
+            values yield the first segments sooner
+        language (str): Language code; detected once per file if None
+        chunk_duration (float): Seconds of audio read per chunk; None picks the
+            longest (up to 10 minutes) that fits the memory budget
+        encoder_cache (EncoderCache): Reuse and store encoder outputs per window,
+            for decoding the same audio again (see encoder_cache.py); a single
+            pass never hits, so the default is None
+    
+    Yields:
+        dict: Segments with "id", "start", "end" (file time) and "text", in time order
+    """
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"Audio file not found: {file_path}")
+    
+    file_info = audio_info(file_path)
+    memory_plan = plan_job(file_info.duration, model_size, batch_size=batch_size, channels=file_info.channels,
+                           chunked=True, encoder_cache=encoder_cache is not None)
+    if chunk_duration is None:
+        chunk_duration = memory_plan.chunk_duration
+    
+    # Held until the generator is exhausted, closed or abandoned by a failing consumer. The finally
+    # also runs on GeneratorExit, so close() releases it right away rather than at garbage collection.
+    budget = get_memory_budget()
+    ticket = budget.acquire(memory_plan.peak_mb, os.path.basename(file_path))
+    chunks = None
+    try:
+        model = get_model(model_size)
+        language = resolve_language(model, file_path, model_size, language)
+        
+        segment_id = 0
+        plan = plan_chunks(file_path, chunk_duration)
+        # Read the next chunk and compute its mel while this one is decoded
+        prepare = lambda chunk: (chunk[0], chunk[1], padded_mel(chunk[2], model.dims.n_mels))
+        chunks = prefetch(iter_audio_chunks(file_path, ranges=plan, sample_rate=whisper.audio.SAMPLE_RATE), prepare)
+        for start_sample, _, chunk_mel in chunks:
+            for segment in iter_batched_segments(model, chunk_mel, batch_size=batch_size, language=language,
+                                                 time_offset=start_sample / file_info.samplerate,
+                                                 encoder_cache=encoder_cache):
+                if not segment["text"].strip():
+                    continue
+                yield {"id": segment_id, **segment}
+                segment_id += 1
+    finally:
+        # Stop the read-ahead thread before giving the memory back
+        if chunks is not None:
+            chunks.close()
+        budget.release(ticket)
+
+
+def save_transcription_to_output_folder(transcription: Union[str, Dict], original_file_path: str,
+                                        output_name: Optional[str] = None) -> str:
     """
     Save transcription to an 'output' folder with the same base name as the original file
     
     Args:
-        transcription (str): The transcribed text
+        transcription (str or dict): The transcribed text, or a full result dict
+            (e.g. a cache hit) whose "text" is written
         original_file_path (str): Path to the original audio file
+        output_name (str): Name to save under instead of the base name; may
+            contain subdirectories of the output folder
     
     Returns:
         str: Path to the saved transcription file
@@ -124,8 +607,12 @@ def save_transcription_to_output_folder(transcription: str, original_file_path:
         print(f"Created output directory: {output_dir}")
     
     # Generate output file path
-    base_name = os.path.splitext(os.path.basename(original_file_path))[0]
+    base_name = output_name or os.path.splitext(os.path.basename(original_file_path))[0]
     output_file = os.path.join(output_dir, f"{base_name}_transcription.txt")
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+    
+    if isinstance(transcription, dict):
+        transcription = str(transcription["text"])
     
     # Save transcription
     with open(output_file, "w", encoding="utf-8") as f:
@@ -134,30 +621,126 @@ def save_transcription_to_output_folder(transcription: str, original_file_path:
     return output_file
 
 
+def stream_transcription(file_path: str, model_size: str = "base", formats=WRITER_EXTENSIONS,
+                         batch_size: int = 1, language: Optional[str] = None, target_rtf: Optional[float] = None,
+                         deadline: Optional[float] = None) -> None:
+    """Print segments as they arrive and append them to the output folder in each format"""
+    if model_size == AUTO_MODEL:
+        decision = route_file(file_path, language, target_rtf, deadline)
+        model_size, language = decision.model, decision.language
+    writers = open_writers(file_path, formats)
+    segments = iter_transcription_segments(file_path, model_size, batch_size=batch_size, language=language)
+    try:
+        for segment in segments:
+            print(f"[{segment['start']:8.2f} --> {segment['end']:8.2f}] {segment['text'].strip()}")
+            for writer in writers:
+                writer.write(segment)
+    finally:
+        # A writer that fails (e.g. a closed pipe) must not keep the memory reservation alive
+        segments.close()
+        for writer in writers:
+            writer.close()
+    for writer in writers:
+        print(f"Saved {writer.count} segments to: {writer.path}")
+
+
 def main():
-    # Check if audio file path is provided
-    if len(sys.argv) < 2:
-        print("Usage: python whisper_stt.py <audio_file_path> [model_size]")
-        print("Example: python whisper_stt.py audio.mp3 base")
-        print("\nAvailable model sizes: tiny, base, small, medium, large")
+    # "batch" subcommand: many files with one resident model
+    if len(sys.argv) > 1 and sys.argv[1] == "batch":
+        from batch_stt import batch_main
+        batch_main(sys.argv[2:])
         return
     
-    # Get file path and model size from command line arguments
-    audio_file_path = sys.argv[1]
-    model_size = sys.argv[2] if len(sys.argv) > 2 else "base"
+    parser = argparse.ArgumentParser(
+        description="Transcribe an audio file with OpenAI Whisper",
+        epilog="Example: python whisper_stt.py audio.mp3 base "
+               "(or: python whisper_stt.py batch DIR|GLOB... --model base)")
+    parser.add_argument("audio_file_path", help="Path to the audio file")
+    parser.add_argument("model_size", nargs="?", default="base",
+                        help="Model size: tiny, base, small, medium, large, optionally with a dtype (small:int8), "
+                             "or auto to choose per file from calibrated throughput (default: base)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Worker processes for chunked transcription of long files (default: 1)")
+    parser.add_argument("--batch-size", type=int, default=1,
+                        help="30-second windows per batched encoder/decoder pass for long files (default: 1)")
+    parser.add_argument("--multichannel", action="store_true",
+                        help="Transcribe each channel as its own stream (e.g. both sides of a call) instead of "
+                             "the mono mix; the channels are batched together")
+    parser.add_argument("--speech-only", action="store_true",
+                        help="Only transcribe detected speech regions, skipping silence")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Don't reuse or store results in the transcription cache")
+    parser.add_argument("--language", default=None,
+                        help="Language code of the audio, e.g. en or ko (default: detect once per file)")
+    parser.add_argument("--stream", nargs="*", metavar="FORMAT", choices=WRITER_EXTENSIONS,
+                        help="Print segments as they are transcribed and append them to output files "
+                             f"({', '.join(WRITER_EXTENSIONS)}; default: all)")
+    parser.add_argument("--cascade", metavar="MODEL", default=None,
+                        help="Re-transcribe low-confidence segments with this larger model "
+                             "(e.g. tiny --cascade medium)")
+    parser.add_argument("--draft", metavar="MODEL", default=None,
+                        help="Speculative decoding: this smaller model proposes tokens that the main model "
+                             "verifies; same output, faster on long outputs (e.g. medium --draft tiny)")
+    parser.add_argument("--dtype", choices=SUPPORTED_DTYPES, default=None,
+                        help="Weight precision; int8 quantizes Linear layers for faster CPU inference "
+                             "(default: fp32, or $WHISPER_STT_DTYPE)")
+    parser.add_argument("--target-rtf", type=float, default=None,
+                        help="With model auto: largest acceptable processing time / audio duration (default: 1.0)")
+    parser.add_argument("--deadline", type=float, default=None,
+                        help="With model auto: seconds the file may take")
+    parser.add_argument("--profile", action="store_true",
+                        help="Record where the time goes (audio decode, log-mel, encoder, decoder steps, "
+                             "fallbacks, language detection) and save output/<name>_profile.json and a "
+                             "Chrome trace output/<name>_trace.json; disables the result cache")
+    parser.add_argument("--memory-mb", type=float, default=None,
+                        help="Memory budget shared by all transcription jobs on this machine; sets chunk size "
+                             "and workers, and queues jobs that don't fit (default: 80%% of RAM, "
+                             "or $WHISPER_STT_MEMORY_MB)")
+    args = parser.parse_args()
+    if args.multichannel and args.stream is not None:
+        parser.error("--multichannel can't be combined with --stream")
+    if args.draft and args.stream is not None:
+        parser.error("--draft can't be combined with --stream")
+    if args.dtype:
+        set_default_dtype(args.dtype)
+    if args.memory_mb:
+        set_memory_budget(args.memory_mb)
+    
+    audio_file_path = args.audio_file_path
+    model_size = args.model_size
     
     try:
-        # Transcribe the audio
-        transcription: str = transcribe_audio(audio_file_path, model_size)
+        # Profiling times a real run, so nothing comes from the cache
+        with profiling(Profiler() if args.profile else None) as profiler:
+            if args.stream is not None:
+                stream_transcription(audio_file_path, model_size, args.stream or WRITER_EXTENSIONS,
+                                     batch_size=max(args.batch_size, 1), language=args.language,
+                                     target_rtf=args.target_rtf, deadline=args.deadline)
+            else:
+                # Transcribe the audio (or fetch it from the cache)
+                result = transcribe_audio_result(audio_file_path, model_size, workers=args.workers,
+                                                 batch_size=args.batch_size, speech_only=args.speech_only,
+                                                 use_cache=not (args.no_cache or args.profile),
+                                                 language=args.language, cascade_model=args.cascade,
+                                                 draft_model=args.draft, target_rtf=args.target_rtf,
+                                                 deadline=args.deadline, multichannel=args.multichannel)
+        
+        if profiler is not None:
+            duration = audio_info(audio_file_path).duration
+            print(profiler.summary(duration))
+            report_path, trace_path = profiler.save(audio_file_path, duration, model=model_size)
+            print(f"Profile saved to: {report_path} (Chrome trace: {trace_path})")
+        if args.stream is not None:
+            return
         
         # Print the result
         print("\nTranscription:")
         print("=" * 50)
-        print(transcription)
+        print(result["text"])
         print("=" * 50)
         
         # Save to output folder
-        output_file = save_transcription_to_output_folder(transcription, audio_file_path)
+        output_file = save_transcription_to_output_folder(result, audio_file_path)
         print(f"\nTranscription saved to: {output_file}")
         
     except Exception as e:
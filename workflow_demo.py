@@ -8,11 +8,34 @@ import os
 import sys
 import subprocess
 
-def demo_workflow():
+def transcribe_with_service(audio_file):
+    """Transcribe through the warm Whisper service if it is running, else run whisper_stt.py"""
+    sys.path.insert(0, "OpenAI Whisper")
+    # The client only needs urllib, so checking for the service stays cheap
+    from stt_client import server_available, transcribe_remote
+    
+    print(f"Step 1: Transcribing {audio_file}")
+    if server_available():
+        # The service already has the model loaded, so this skips startup and model load
+        result = transcribe_remote(file_path=audio_file)
+        base_name = os.path.splitext(os.path.basename(audio_file))[0]
+        os.makedirs("OpenAI Whisper/output", exist_ok=True)
+        with open(f"OpenAI Whisper/output/{base_name}_transcription.txt", "w", encoding="utf-8") as f:
+            f.write(str(result["text"]))
+        print("✓ Transcribed by the running service")
+    else:
+        print("Transcription service not running; starting whisper_stt.py")
+        subprocess.run([sys.executable, "whisper_stt.py", os.path.abspath(audio_file)], cwd="OpenAI Whisper")
+
+def demo_workflow(audio_file=None):
     """Demonstrate the complete workflow from Whisper to Korean TTS"""
     print("Complete Workflow Demo: Whisper -> Korean TTS")
     print("=" * 50)
     
+    # Optional step 1: transcribe a new audio file first
+    if audio_file:
+        transcribe_with_service(audio_file)
+    
     # Step 1: Show available Whisper transcriptions
     whisper_output_dir = "OpenAI Whisper/output"
     if os.path.exists(whisper_output_dir):
@@ -22,9 +45,15 @@ def demo_workflow():
             for i, f in enumerate(txt_files, 1):
                 print(f"  {i}. {f}")
             
-            # Use the first transcription file for demo
-            transcription_file = os.path.join(whisper_output_dir, txt_files[0])
-            print(f"\nUsing transcription: {txt_files[0]}")
+            # Use the new transcription, or the first transcription file for demo
+            chosen = txt_files[0]
+            if audio_file:
+                chosen = f"{os.path.splitext(os.path.basename(audio_file))[0]}_transcription.txt"
+                if chosen not in txt_files:
+                    print(f"Transcription {chosen} was not created")
+                    return
+            transcription_file = os.path.join(whisper_output_dir, chosen)
+            print(f"\nUsing transcription: {chosen}")
             
             # Show first few lines of the transcription
             with open(transcription_file, 'r', encoding='utf-8') as f:
@@ -73,7 +102,10 @@ def demo_workflow():
 
 if __name__ == "__main__":
     # Make sure we're in the right directory (adSTTS root)
+    # Optional argument: an audio file to transcribe before the TTS step
+    audio_file = os.path.abspath(sys.argv[1]) if len(sys.argv) > 1 else None
+    
     script_dir = os.path.dirname(os.path.abspath(__file__))
     os.chdir(script_dir)
     
-    demo_workflow()
\ No newline at end of file
+    demo_workflow(audio_file)
\ No newline at end of file